@@ -1,3 +1,5 @@
+import json
+
 import unfold.decorators
 from django.conf import settings
 from django.contrib import admin
@@ -5,6 +7,7 @@ from django.contrib import messages
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.utils import timezone
+from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
 from superapp.apps.admin_portal.admin import SuperAppModelAdmin
@@ -15,8 +18,8 @@ from superapp.apps.backups.tasks.backup import process_backup
 
 @admin.register(Backup, site=superapp_admin_site)
 class BackupAdmin(SuperAppModelAdmin):
-    list_display = ['name', 'created_at', 'type', 'file', 'done']
-    list_filter = ['created_at', 'type', 'done']
+    list_display = ['name', 'created_at', 'type', 'mode', 'file', 'done']
+    list_filter = ['created_at', 'type', 'mode', 'done']
     search_fields = ['name', 'created_at', 'file']
     autocomplete_fields = ['tenant'] if MULTI_TENANT_ENABLED else []
     actions = []
@@ -41,7 +44,7 @@ class BackupAdmin(SuperAppModelAdmin):
                 fields.insert(1, 'tenant')
             return fields
         # Editing an existing object
-        fields = ['name', 'type', 'file', 'done', 'started_at', 'finished_at', 'created_at', 'updated_at']
+        fields = ['name', 'type', 'mode', 'parent', 'file', 'done', 'started_at', 'finished_at', 'formatted_stats', 'created_at', 'updated_at']
         if MULTI_TENANT_ENABLED:
             fields.insert(1, 'tenant')
         return fields
@@ -54,11 +57,21 @@ class BackupAdmin(SuperAppModelAdmin):
         if obj is None:  # Adding a new object
             return []
         # Editing an existing object
-        readonly_fields = ['name', 'type', 'created_at', 'updated_at', 'file', 'done', 'started_at', 'finished_at']
+        readonly_fields = ['name', 'type', 'mode', 'parent', 'created_at', 'updated_at', 'file', 'done', 'started_at',
+                           'finished_at', 'formatted_stats']
         if MULTI_TENANT_ENABLED:
             readonly_fields.insert(1, 'tenant')
         return readonly_fields
 
+    @admin.display(description=_("Statistics"))
+    def formatted_stats(self, obj):
+        """
+        Show the phase durations and volumes of the backup as indented JSON.
+        """
+        if not obj.stats:
+            return '-'
+        return format_html('<pre>{}</pre>', json.dumps(obj.stats, indent=2))
+
     @unfold.decorators.action(description=_("Retry Backup"))
     def retry_backup(self, request, object_id: int):
         """
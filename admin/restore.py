@@ -1,3 +1,5 @@
+import json
+
 import unfold.decorators
 from django.conf import settings
 from django.contrib import admin
@@ -5,6 +7,7 @@ from django.contrib import messages
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.utils import timezone
+from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
 from superapp.apps.admin_portal.admin import SuperAppModelAdmin
@@ -41,7 +44,7 @@ class RestoreAdmin(SuperAppModelAdmin):
                 fields.insert(1, 'tenant')
             return fields
         # Editing an existing object
-        fields = ['name', 'file', 'backup', 'done', 'started_at', 'finished_at', 'created_at', 'updated_at']
+        fields = ['name', 'file', 'backup', 'done', 'started_at', 'finished_at', 'formatted_stats', 'created_at', 'updated_at']
         if MULTI_TENANT_ENABLED:
             fields.insert(1, 'tenant')
         return fields
@@ -53,11 +56,20 @@ class RestoreAdmin(SuperAppModelAdmin):
         if obj is None:  # Adding a new object
             return []
         # Editing an existing object
-        readonly_fields = ['name', 'type', 'file', 'backup', 'created_at', 'updated_at', 'done', 'started_at', 'finished_at', 'cleanup_existing_data']
+        readonly_fields = ['name', 'type', 'file', 'backup', 'created_at', 'updated_at', 'done', 'started_at', 'finished_at', 'formatted_stats', 'cleanup_existing_data']
         if MULTI_TENANT_ENABLED:
             readonly_fields.insert(1, 'tenant')
         return readonly_fields
 
+    @admin.display(description=_("Statistics"))
+    def formatted_stats(self, obj):
+        """
+        Show the phase durations and volumes of the restore as indented JSON.
+        """
+        if not obj.stats:
+            return '-'
+        return format_html('<pre>{}</pre>', json.dumps(obj.stats, indent=2))
+
     @unfold.decorators.action(description=_("Retry Restore"))
     def retry_restore(self, request, object_id: int):
         """
@@ -0,0 +1,538 @@
+"""
+Utilities for writing backup ZIP archives incrementally.
+
+Format version 2 manifests describe every entry (sizes, CRC-32 of the
+uncompressed content), every model (row count, the byte ranges holding its
+rows and a schema fingerprint) and every media file (size and SHA-256), so
+archives can be inspected and verified without parsing their data.
+"""
+import json
+import logging
+import shutil
+import tempfile
+import time
+import zipfile
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.utils import timezone
+
+from superapp.apps.backups.compression import (
+    CODEC_DEFLATE,
+    CODEC_STORED,
+    CODEC_ZSTD,
+    SIGNATURE_SIZE,
+    ZSTD_SUFFIX,
+    ChecksumReader,
+    ChecksumWriter,
+    CompressionPolicy,
+    CompressionStats,
+    TimedWriter,
+    compress_stream,
+    decompress_zstd_stream,
+)
+from superapp.apps.backups.serializers import dumps
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DATA_FILE = 'backup.json'
+ARCHIVE_MANIFEST_FILE = 'backup_manifest.json'
+ARCHIVE_MEDIA_DIRECTORY = 'media/'
+ARCHIVE_DATA_DIRECTORY = 'data/'
+ARCHIVE_FORMAT_VERSION = '2.0'
+
+# Layouts of the data entries: a single backup.json fixture, or one JSON lines entry per model
+DATA_FORMAT_JSON = 'json'
+DATA_FORMAT_JSONL = 'jsonl'
+
+COPY_BUFFER_SIZE = 1024 * 1024
+# Entries prepared by worker threads stay in memory up to this size
+PREPARED_SPOOL_SIZE = 8 * 1024 * 1024
+
+# An entry prepared ahead of time, ready to be copied into the archive. 'blob' holds the zstd frame of zstd
+# entries and the uncompressed content otherwise. 'crc' and 'file_size' describe the uncompressed zip member,
+# 'content_crc', 'content_size' and 'sha256' the uncompressed content.
+PreparedEntry = namedtuple(
+    'PreparedEntry', [
+        'arcname', 'member_name', 'codec', 'crc', 'file_size', 'blob', 'cpu_seconds',
+        'content_crc', 'content_size', 'sha256',
+    ]
+)
+
+
+def get_data_segment_name(model_label, index=None, data_format=DATA_FORMAT_JSON):
+    """
+    Get the archive entry name of a data segment holding one partition of a
+    model, or all of its rows when index is None.
+    """
+    if index is None:
+        return f"{ARCHIVE_DATA_DIRECTORY}{model_label}.{data_format}"
+    return f"{ARCHIVE_DATA_DIRECTORY}{model_label}.{index:04d}.{data_format}"
+
+
+def iter_ordered(func, items, workers):
+    """
+    Apply func to items in a thread pool and yield the results in the order of the items.
+
+    At most twice the number of workers results are pending at a time, so
+    large results (e.g. prepared archive entries) do not pile up in memory.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='backup-compress') as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            result = pending.popleft().result()
+            for item in items:
+                pending.append(executor.submit(func, item))
+                break
+            yield result
+
+
+def encode_fixture_object(obj):
+    """
+    Encode a fixture object ({'model', 'pk', 'fields'}) as compact JSON, with the values formatted the same way
+    the Django JSON serializer does.
+    """
+    return dumps(obj)
+
+
+class FixtureStreamWriter:
+    """
+    Write Django fixture objects to a binary stream as a JSON array, one object at a time.
+    The output can be loaded with `loaddata` like any `dumpdata` JSON fixture.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+        # Number of bytes written so far, used to locate the rows of each model in the entry
+        self.position = 0
+        self._write(b'[')
+
+    def _write(self, data):
+        self.stream.write(data)
+        self.position += len(data)
+
+    def write(self, obj):
+        """
+        Append a single fixture object ({'model', 'pk', 'fields'}) to the array.
+        """
+        self.write_encoded(encode_fixture_object(obj))
+
+    def write_encoded(self, data):
+        """
+        Append an already encoded fixture object to the array.
+        """
+        self._write(b'\n' if self.count == 0 else b',\n')
+        self._write(data)
+        self.count += 1
+
+    def close(self):
+        self._write(b'\n]\n' if self.count else b']\n')
+
+
+class JsonLinesWriter:
+    """
+    Write Django fixture objects to a binary stream as JSON lines, one compact object per line.
+    The output can be loaded with `loaddata` as a "jsonl" fixture and read one row at a time.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+        self.position = 0
+
+    def write(self, obj):
+        self.write_encoded(encode_fixture_object(obj))
+
+    def write_encoded(self, data):
+        self.stream.write(data)
+        self.stream.write(b'\n')
+        self.position += len(data) + 1
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+class BackupArchiveWriter:
+    """
+    Build a backup ZIP archive entry by entry.
+
+    Entries are written straight into the archive, so data never needs to be
+    staged on disk or held in memory before it is compressed. Each entry is
+    compressed according to the CompressionPolicy and the CPU time spent
+    compressing is collected in 'compression_stats'.
+
+    The size and checksum of every entry are collected for the manifest,
+    engines locate the rows of each model with record_model_data().
+    """
+
+    def __init__(self, file, policy=None):
+        self.zipfile = zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED, allowZip64=True)
+        self.policy = policy or CompressionPolicy(data_codec=CODEC_DEFLATE, media_codec=CODEC_DEFLATE)
+        self.compression_stats = CompressionStats()
+        # Logical entry name -> zip member name of the zstd compressed entries
+        self.zstd_entries = {}
+        # Logical entry name -> manifest description of the entry
+        self.entries = {}
+        # Model label -> list of {'entry', 'offset', 'length'} locating its rows
+        self.model_data = {}
+        # Media path -> {'entry', 'size', 'sha256'}
+        self.media = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _open_member(self, arcname, codec):
+        if codec == CODEC_DEFLATE:
+            return self.zipfile.open(arcname, 'w', force_zip64=True)
+        zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime(time.time())[:6])
+        zinfo.compress_type = zipfile.ZIP_STORED
+        return self.zipfile.open(zinfo, 'w', force_zip64=True)
+
+    @contextmanager
+    def open_entry(self, arcname):
+        """
+        Open a writable stream for a new data entry. Sizes do not need to be
+        known up front, the entry is always written with ZIP64 extensions.
+        """
+        codec = self.policy.data_codec
+        if codec != CODEC_ZSTD:
+            member_name = arcname
+            with self._open_member(arcname, codec) as member:
+                checksum = ChecksumWriter(TimedWriter(member, self.compression_stats))
+                yield checksum
+                # Closing the member flushes the compressor
+                started = time.thread_time()
+        else:
+            member_name = f"{arcname}{ZSTD_SUFFIX}"
+            with self._open_member(member_name, CODEC_STORED) as member:
+                with self.policy.get_zstd_compressor().stream_writer(member, closefd=False) as compressor:
+                    checksum = ChecksumWriter(TimedWriter(compressor, self.compression_stats))
+                    yield checksum
+                    started = time.thread_time()
+            self.zstd_entries[arcname] = member_name
+        self.compression_stats.add_cpu_seconds(time.thread_time() - started)
+        self.compression_stats.record_entry(codec)
+        self.record_entry(arcname, member_name, codec, checksum.crc, checksum.size)
+
+    def write_file(self, path, arcname):
+        """
+        Add a local file as a data entry.
+        """
+        with open(path, 'rb') as source, self.open_entry(arcname) as entry:
+            shutil.copyfileobj(source, entry, COPY_BUFFER_SIZE)
+        logger.debug(f"Added to archive: {arcname}")
+
+    def prepare_entry(self, source, arcname, codec):
+        """
+        Copy the content of a binary stream into a PreparedEntry, compressing zstd entries.
+
+        This does not touch the zip file, so entries can be prepared by worker
+        threads and written with write_prepared() in a deterministic order.
+        Deflated entries are kept uncompressed and deflated by write_prepared().
+        """
+        started = time.thread_time()
+        member_name = f"{arcname}{ZSTD_SUFFIX}" if codec == CODEC_ZSTD else arcname
+        blob = tempfile.SpooledTemporaryFile(max_size=PREPARED_SPOOL_SIZE)
+        # Media files are identified by the hash of their content
+        content = ChecksumReader(source, sha256=arcname.startswith(ARCHIVE_MEDIA_DIRECTORY))
+        try:
+            crc, file_size = compress_stream(
+                content, blob, CODEC_ZSTD if codec == CODEC_ZSTD else CODEC_STORED, self.policy, COPY_BUFFER_SIZE
+            )
+        except Exception:
+            blob.close()
+            raise
+        return PreparedEntry(
+            arcname, member_name, codec, crc, file_size, blob, time.thread_time() - started,
+            content.crc, content.size, content.sha256,
+        )
+
+    def prepare_data_entry(self, source, arcname):
+        return self.prepare_entry(source, arcname, self.policy.data_codec)
+
+    def prepare_media_entry(self, source, arcname):
+        head = source.read(SIGNATURE_SIZE)
+        source.seek(0)
+        return self.prepare_entry(source, arcname, self.policy.get_media_codec(arcname, head))
+
+    def record_entry(self, arcname, member_name, codec, crc, size, sha256=None):
+        """
+        Describe a written entry in the manifest. The CRC-32 and size are those of the uncompressed content.
+        """
+        entry = {
+            'member': member_name,
+            'codec': codec,
+            'size': size,
+            'compressed_size': self.zipfile.getinfo(member_name).compress_size,
+            'crc32': f'{crc:08x}',
+        }
+        if sha256 is not None:
+            entry['sha256'] = sha256
+        self.entries[arcname] = entry
+        if arcname.startswith(ARCHIVE_MEDIA_DIRECTORY):
+            media_path = arcname[len(ARCHIVE_MEDIA_DIRECTORY):]
+            self.media[media_path] = {'entry': arcname, 'size': size, 'sha256': sha256}
+
+    def record_model_data(self, label, arcname, offset=None, length=None):
+        """
+        Record that rows of a model were written to an entry.
+
+        Args:
+            label: Model label
+            arcname: Logical name of the entry holding the rows
+            offset: Offset of the rows in the uncompressed entry, None if unknown
+            length: Length of the rows in bytes, None for the whole entry or if unknown
+        """
+        self.model_data.setdefault(label, []).append({'entry': arcname, 'offset': offset, 'length': length})
+
+    def write_prepared(self, entry):
+        """
+        Copy a PreparedEntry into the archive.
+
+        Stored and zstd members are copied as is. Deflated members are
+        compressed while they are copied, ZipFile has no public API for
+        writing already compressed data.
+        """
+        zinfo = zipfile.ZipInfo(entry.member_name, date_time=time.localtime(time.time())[:6])
+        zinfo.compress_type = zipfile.ZIP_DEFLATED if entry.codec == CODEC_DEFLATE else zipfile.ZIP_STORED
+        # Lets ZipFile decide whether the member needs ZIP64 extensions
+        zinfo.file_size = entry.file_size
+        with entry.blob as blob, self.zipfile.open(zinfo, 'w') as member:
+            blob.seek(0)
+            shutil.copyfileobj(blob, TimedWriter(member, self.compression_stats), COPY_BUFFER_SIZE)
+            started = time.thread_time()
+        self.compression_stats.add_cpu_seconds(time.thread_time() - started)
+
+        if entry.codec == CODEC_ZSTD:
+            self.zstd_entries[entry.arcname] = entry.member_name
+        self.compression_stats.add_cpu_seconds(entry.cpu_seconds)
+        self.compression_stats.record_entry(entry.codec)
+        self.record_entry(
+            entry.arcname, entry.member_name, entry.codec, entry.content_crc, entry.content_size, entry.sha256
+        )
+        logger.debug(f"Added to archive: {entry.member_name} ({entry.codec})")
+
+    def write_stored_file(self, fileobj, arcname):
+        """
+        Add an open binary file that is compressed on its own (e.g. a Parquet file) as an entry stored as is.
+        """
+        self.write_prepared(self.prepare_entry(fileobj, arcname, CODEC_STORED))
+
+    def write_media_fileobj(self, fileobj, arcname):
+        """
+        Copy an open, seekable binary file into a new media entry, reading it in chunks.
+        Already compressed files (by extension or leading bytes) are stored without compression.
+        """
+        self.write_prepared(self.prepare_media_entry(fileobj, arcname))
+
+    def write_media_directory(self, media_dir):
+        """
+        Add all files of a local media directory inside the "media/" folder of the archive.
+        Files are compressed by 'compression_workers' threads.
+
+        Args:
+            media_dir: Local directory containing the media files
+
+        Returns:
+            Number of media files added
+        """
+        media_dir = Path(media_dir)
+        count = 0
+        if not media_dir.exists():
+            return count
+
+        def prepare(file_path):
+            relative_path = file_path.relative_to(media_dir).as_posix()
+            with open(file_path, 'rb') as media_file:
+                return self.prepare_media_entry(media_file, f"{ARCHIVE_MEDIA_DIRECTORY}{relative_path}")
+
+        # Files are compressed concurrently and added in sorted order
+        file_paths = sorted(file_path for file_path in media_dir.rglob('*') if file_path.is_file())
+        for entry in iter_ordered(prepare, file_paths, self.policy.workers):
+            self.write_prepared(entry)
+            count += 1
+        return count
+
+    def get_models_manifest(self, row_counts, schemas=None):
+        """
+        Describe the data of every model.
+
+        The compressed size of rows sharing an entry with other models is the
+        share of the entry matching their uncompressed size. Sizes are None
+        when the rows of a model cannot be located in a shared entry.
+
+        Args:
+            row_counts: Dict mapping model label -> row count
+            schemas: Optional dict mapping model label -> schema fingerprint
+
+        Returns:
+            Dict mapping model label -> {'rows', 'size', 'compressed_size', 'entries', 'schema'}
+        """
+        schemas = schemas or {}
+        entry_models = {}
+        for label, locations in self.model_data.items():
+            for location in locations:
+                entry_models.setdefault(location['entry'], set()).add(label)
+
+        models = {}
+        for label in sorted(set(row_counts) | set(self.model_data)):
+            size = 0
+            compressed_size = 0
+            for location in self.model_data.get(label, []):
+                entry = self.entries.get(location['entry'])
+                if entry is None:
+                    continue
+                length = location['length']
+                if length is None:
+                    if len(entry_models[location['entry']]) > 1:
+                        size = compressed_size = None
+                        break
+                    length = entry['size']
+                size += length
+                if entry['size']:
+                    compressed_size += entry['compressed_size'] * length / entry['size']
+            models[label] = {
+                'rows': row_counts.get(label, 0),
+                'size': size,
+                'compressed_size': round(compressed_size) if compressed_size is not None else None,
+                'entries': self.model_data.get(label, []),
+                'schema': schemas.get(label),
+            }
+        return models
+
+    def write_manifest(self, row_counts=None, schemas=None, media=None, **extra):
+        """
+        Add the backup manifest describing the archive layout.
+
+        Args:
+            row_counts: Dict mapping model label -> row count
+            schemas: Dict mapping model label -> schema fingerprint
+            media: Dict mapping media path -> {'size', 'sha256'} for media not stored in the
+                archive, defaults to the media entries
+            **extra: Additional manifest keys
+        """
+        manifest = {
+            'backup_type': 'data_with_media',
+            'created_at': timezone.now().isoformat(),
+            'json_file': ARCHIVE_DATA_FILE,
+            'media_directory': ARCHIVE_MEDIA_DIRECTORY,
+            'format_version': ARCHIVE_FORMAT_VERSION,
+            'compression': dict(self.policy.as_manifest(), entries=self.zstd_entries),
+            'entries': self.entries,
+            'models': self.get_models_manifest(row_counts or {}, schemas),
+            'media': self.media if media is None else media,
+        }
+        manifest.update(extra)
+        self.zipfile.writestr(ARCHIVE_MANIFEST_FILE, json.dumps(manifest, indent=2))
+        return manifest
+
+    def close(self):
+        self.zipfile.close()
+
+
+def read_archive_manifest(archive_path):
+    """
+    Read the manifest of a backup archive without extracting it.
+
+    Returns:
+        The parsed manifest, or an empty dict for archives without a manifest
+    """
+    with zipfile.ZipFile(archive_path, 'r') as zipf:
+        try:
+            return json.loads(zipf.read(ARCHIVE_MANIFEST_FILE))
+        except KeyError:
+            return {}
+
+
+def verify_archive(archive_path):
+    """
+    Check the entries of a backup archive against the sizes and checksums of its manifest.
+
+    Entries are decompressed in a streaming fashion, nothing is extracted.
+    Archives older than format version 2 only get the CRC check of their zip members.
+
+    Returns:
+        List of problems found, empty if the archive is intact
+    """
+    problems = []
+    with zipfile.ZipFile(archive_path, 'r') as zipf:
+        try:
+            manifest = json.loads(zipf.read(ARCHIVE_MANIFEST_FILE))
+        except KeyError:
+            manifest = {}
+
+        if 'entries' not in manifest:
+            bad_member = zipf.testzip()
+            if bad_member is not None:
+                problems.append(f'{bad_member}: CRC mismatch')
+            return problems
+
+        for arcname, entry in manifest['entries'].items():
+            checksum = ChecksumWriter(sha256='sha256' in entry)
+            try:
+                with zipf.open(entry['member']) as member:
+                    if entry['codec'] == CODEC_ZSTD:
+                        decompress_zstd_stream(member, checksum)
+                    else:
+                        shutil.copyfileobj(member, checksum, COPY_BUFFER_SIZE)
+            except KeyError:
+                problems.append(f'{arcname}: missing from the archive')
+                continue
+            except (zipfile.BadZipFile, ValueError, OSError) as e:
+                problems.append(f'{arcname}: unreadable ({e})')
+                continue
+
+            if checksum.size != entry['size']:
+                problems.append(f"{arcname}: size is {checksum.size} bytes, expected {entry['size']}")
+            if f'{checksum.crc:08x}' != entry['crc32']:
+                problems.append(f"{arcname}: CRC-32 mismatch")
+            if 'sha256' in entry and checksum.sha256 != entry['sha256']:
+                problems.append(f"{arcname}: SHA-256 mismatch")
+    return problems
+
+
+def extract_archive(archive_path, extract_dir, skip_entries=()):
+    """
+    Extract a backup archive, decompressing the zstd compressed entries listed in its manifest.
+
+    Args:
+        archive_path: Path to the ZIP archive
+        extract_dir: Directory to extract files to
+        skip_entries: Logical names of entries not to extract
+    """
+    extract_root = Path(extract_dir).resolve()
+    with zipfile.ZipFile(archive_path, 'r') as zipf:
+        try:
+            manifest = json.loads(zipf.read(ARCHIVE_MANIFEST_FILE))
+        except KeyError:
+            manifest = {}
+        zstd_members = {
+            member_name: arcname
+            for arcname, member_name in manifest.get('compression', {}).get('entries', {}).items()
+        }
+
+        for member in zipf.infolist():
+            if zstd_members.get(member.filename, member.filename) in skip_entries:
+                continue
+            if member.filename not in zstd_members:
+                zipf.extract(member, extract_dir)
+                continue
+
+            target_path = (extract_root / zstd_members[member.filename]).resolve()
+            if extract_root not in target_path.parents:
+                raise ValueError(f'Archive entry {member.filename} points outside of the extraction directory')
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            with zipf.open(member) as source, open(target_path, 'wb') as dest:
+                decompress_zstd_stream(source, dest)
@@ -0,0 +1,184 @@
+"""
+Deletion of the existing rows of the restored models (the cleanup_existing_data option of restores).
+
+The Django deletion collector loads every row into Python to resolve
+cascades and send signals, which takes longer than the restore itself on
+large tables. Since every row of the restored models is deleted anyway,
+most models can be emptied with set-based statements instead:
+
+- 'fast' empties the tables with one `TRUNCATE` on PostgreSQL, or one raw
+  `DELETE` per table on other backends and under a tenant context (the
+  delete is then filtered by the tenant manager of the model). Models whose
+  rows cannot be deleted that way fall back to the collector.
+- 'collector' deletes every model with the Django deletion collector.
+"""
+import logging
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import DO_NOTHING, signals
+
+# Conditional imports for multi-tenant support
+try:
+    from django_multitenant.utils import get_current_tenant
+except ImportError:
+    def get_current_tenant():
+        return None
+
+logger = logging.getLogger(__name__)
+
+CLEANUP_STRATEGIES = ('fast', 'collector')
+DEFAULT_CLEANUP_STRATEGY = 'fast'
+
+
+def get_referencing_relations(model_class):
+    """
+    Get the relations whose rows are deleted along with the rows of a model (reverse foreign keys and one-to-ones).
+    """
+    return [
+        field for field in model_class._meta.get_fields(include_hidden=True)
+        if field.auto_created and not field.concrete and (field.one_to_one or field.one_to_many)
+    ]
+
+
+def is_auto_created_through(model_class):
+    # auto_created holds the model declaring the many-to-many field, False for regular models
+    return bool(model_class._meta.auto_created)
+
+
+def can_raw_delete(model_class, model_classes):
+    """
+    Whether the rows of a model can be deleted without the Django deletion collector.
+
+    That is the case when no delete signals are connected for the model, it is
+    not a multi-table inherited child, has no generic relations, and every
+    relation pointing at it comes from a model that is cleaned up as well, from
+    an auto-created many-to-many table or does nothing on delete.
+    """
+    if signals.pre_delete.has_listeners(model_class) or signals.post_delete.has_listeners(model_class):
+        return False
+    if model_class._meta.parents:
+        return False
+    if any(hasattr(field, 'bulk_related_objects') for field in model_class._meta.private_fields):
+        return False
+    for relation in get_referencing_relations(model_class):
+        related_model = relation.related_model
+        if related_model in model_classes or is_auto_created_through(related_model):
+            continue
+        if relation.field.remote_field.on_delete is not DO_NOTHING:
+            return False
+    return True
+
+
+def get_truncatable_models(model_classes):
+    """
+    Get the models whose tables can be truncated together.
+
+    PostgreSQL refuses to truncate a table referenced by a table that is not
+    truncated in the same statement, so models referenced by a model outside
+    of the set are left out until no such reference remains. Tables are not
+    truncated with CASCADE, which would also empty tables outside of the restore.
+    """
+    truncatable = set(model_classes)
+    changed = True
+    while changed:
+        changed = False
+        for model_class in list(truncatable):
+            for relation in get_referencing_relations(model_class):
+                related_model = relation.related_model
+                if related_model not in truncatable and not is_auto_created_through(related_model):
+                    truncatable.discard(model_class)
+                    changed = True
+                    break
+    return [model_class for model_class in model_classes if model_class in truncatable]
+
+
+def get_through_relations(model_class):
+    """
+    Get the foreign keys of the auto-created many-to-many tables that point at a model.
+    """
+    return [
+        relation.field for relation in get_referencing_relations(model_class)
+        if is_auto_created_through(relation.related_model)
+    ]
+
+
+def truncate_models(model_classes, using=DEFAULT_DB_ALIAS):
+    """
+    Empty the tables of the models, and of their auto-created many-to-many tables, with a single TRUNCATE.
+    """
+    connection = connections[using]
+    table_names = []
+    for model_class in model_classes:
+        for through_field in get_through_relations(model_class):
+            table_names.append(through_field.model._meta.db_table)
+        table_names.append(model_class._meta.db_table)
+    table_names = list(dict.fromkeys(table_names))
+
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"TRUNCATE {', '.join(quote_name(table_name) for table_name in table_names)}")
+    logger.info(f"Truncated {len(table_names)} tables: {', '.join(table_names)}")
+
+
+def raw_delete_model(model_class, using=DEFAULT_DB_ALIAS):
+    """
+    Delete the rows of a model visible through its default manager with set-based DELETE statements.
+
+    The rows of the auto-created many-to-many tables pointing at the deleted
+    rows are deleted first, selected with a subquery.
+
+    Returns:
+        The number of deleted rows of the model
+    """
+    queryset = model_class._default_manager.using(using).all()
+    for through_field in get_through_relations(model_class):
+        through_queryset = through_field.model._base_manager.using(using).filter(
+            **{f'{through_field.name}__in': queryset.values('pk')}
+        )
+        # Same single statement delete the collector uses for rows without dependencies
+        through_queryset._raw_delete(using)
+    return queryset._raw_delete(using)
+
+
+def delete_existing_rows(model_classes, using=DEFAULT_DB_ALIAS, strategy=DEFAULT_CLEANUP_STRATEGY):
+    """
+    Delete the existing rows of the models before they are restored.
+
+    Args:
+        model_classes: Model classes in delete order (most dependent first)
+        using: Database alias to delete from
+        strategy: One of CLEANUP_STRATEGIES
+
+    Returns:
+        Dict mapping model label -> number of deleted rows, None for truncated tables
+    """
+    if strategy not in CLEANUP_STRATEGIES:
+        raise ValueError(f'Unknown cleanup strategy "{strategy}". Available strategies: {", ".join(CLEANUP_STRATEGIES)}')
+
+    connection = connections[using]
+    raw_models = []
+    if strategy == 'fast':
+        raw_models = [model_class for model_class in model_classes if can_raw_delete(model_class, model_classes)]
+    # Truncating would empty the tables for all tenants
+    truncated_models = []
+    if connection.vendor == 'postgresql' and get_current_tenant() is None:
+        truncated_models = get_truncatable_models(raw_models)
+
+    deleted = {}
+    with transaction.atomic(using=using):
+        if truncated_models:
+            truncate_models(truncated_models, using=using)
+            deleted.update({model_class._meta.label_lower: None for model_class in truncated_models})
+
+        with connection.constraint_checks_disabled():
+            for model_class in model_classes:
+                label = model_class._meta.label_lower
+                if model_class in truncated_models:
+                    continue
+                if model_class in raw_models:
+                    deleted[label] = raw_delete_model(model_class, using=using)
+                else:
+                    deleted[label], _ = model_class.objects.using(using).all().delete()
+                logger.info(f"Deleted {deleted[label]} records from {label}")
+
+    return deleted
@@ -0,0 +1,302 @@
+"""
+Compression policy of backup archive entries.
+"""
+import hashlib
+import logging
+import os
+import time
+import zlib
+
+from superapp.apps.backups.conf import get_backup_type_option
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODEC_STORED = 'stored'
+CODEC_DEFLATE = 'deflate'
+CODEC_ZSTD = 'zstd'
+
+DATA_CODECS = (CODEC_ZSTD, CODEC_DEFLATE, CODEC_STORED)
+DEFAULT_DATA_CODEC = CODEC_ZSTD
+# Codecs of media entries that are not already compressed
+MEDIA_CODECS = (CODEC_ZSTD, CODEC_DEFLATE)
+DEFAULT_MEDIA_CODEC = CODEC_ZSTD
+DEFAULT_ZSTD_LEVEL = 3
+DEFAULT_COMPRESSION_WORKERS = min(8, os.cpu_count() or 1)
+ZSTD_SUFFIX = '.zst'
+
+# Formats that are already compressed and do not shrink when deflated again
+PRECOMPRESSED_EXTENSIONS = {
+    # Images
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.heic', '.heif',
+    # Documents
+    '.pdf', '.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp', '.epub',
+    # Audio and video
+    '.mp3', '.m4a', '.aac', '.ogg', '.oga', '.opus', '.flac',
+    '.mp4', '.m4v', '.mov', '.webm', '.mkv', '.avi',
+    # Archives
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.7z', '.rar', '.br',
+}
+
+PRECOMPRESSED_SIGNATURES = (
+    b'\xff\xd8\xff',        # JPEG
+    b'\x89PNG\r\n\x1a\n',   # PNG
+    b'GIF87a', b'GIF89a',   # GIF
+    b'%PDF-',               # PDF
+    b'PK\x03\x04',          # ZIP and the office formats built on it
+    b'\x1f\x8b',            # gzip
+    b'BZh',                 # bzip2
+    b'\xfd7zXZ\x00',        # xz
+    b'\x28\xb5\x2f\xfd',    # zstd
+    b'7z\xbc\xaf\x27\x1c',  # 7z
+    b'Rar!\x1a\x07',        # RAR
+    b'ID3',                 # MP3 with ID3 tag
+    b'OggS',                # Ogg
+    b'fLaC',                # FLAC
+    b'\x1aE\xdf\xa3',       # Matroska / WebM
+)
+
+# Number of leading bytes needed to detect a precompressed format
+SIGNATURE_SIZE = 16
+
+
+def is_precompressed(name, head=b''):
+    """
+    Check whether a file is already compressed, by extension or by its leading bytes.
+
+    Args:
+        name: File name or archive entry name
+        head: The first bytes of the file, if available
+
+    Returns:
+        True if compressing the file again is not worth the CPU time
+    """
+    dot = name.rfind('.')
+    if dot != -1 and name[dot:].lower() in PRECOMPRESSED_EXTENSIONS:
+        return True
+    if head.startswith(PRECOMPRESSED_SIGNATURES):
+        return True
+    # ISO base media (MP4, MOV, HEIC, AVIF) and RIFF containers (WebP, AVI)
+    if head[4:8] == b'ftyp' or (head[:4] == b'RIFF' and head[8:12] in (b'WEBP', b'AVI ')):
+        return True
+    return False
+
+
+class CompressionPolicy:
+    """
+    Decide how each archive entry is compressed.
+
+    Data entries use the configured codec, zstd entries are written as
+    "<name>.zst" members stored without zip compression and are listed in the
+    manifest so the restore side can decompress them. Media entries use the
+    media codec unless they are already compressed, in which case they are
+    stored as is.
+
+    Zstd entries are compressed by worker threads before they are added to the
+    archive. ZipFile can only deflate members itself, so deflated entries are
+    compressed one at a time while they are written.
+    """
+
+    def __init__(self, data_codec=DEFAULT_DATA_CODEC, zstd_level=DEFAULT_ZSTD_LEVEL, store_precompressed=True,
+                 workers=1, media_codec=DEFAULT_MEDIA_CODEC):
+        if data_codec not in DATA_CODECS:
+            raise ValueError(f'Unknown data compression "{data_codec}". Available codecs: {", ".join(DATA_CODECS)}')
+        if media_codec not in MEDIA_CODECS:
+            raise ValueError(f'Unknown media compression "{media_codec}". '
+                             f'Available codecs: {", ".join(MEDIA_CODECS)}')
+        if data_codec == CODEC_ZSTD and zstandard is None:
+            logger.warning("The zstandard package is not installed, compressing data entries with deflate")
+            data_codec = CODEC_DEFLATE
+        if media_codec == CODEC_ZSTD and zstandard is None:
+            logger.warning("The zstandard package is not installed, compressing media entries serially with deflate")
+            media_codec = CODEC_DEFLATE
+        self.data_codec = data_codec
+        self.media_codec = media_codec
+        self.zstd_level = zstd_level
+        self.store_precompressed = store_precompressed
+        self.workers = max(1, workers)
+
+    @classmethod
+    def for_backup_type(cls, backup_type):
+        return cls(
+            data_codec=get_backup_type_option(backup_type, 'data_compression', DEFAULT_DATA_CODEC),
+            zstd_level=get_backup_type_option(backup_type, 'zstd_level', DEFAULT_ZSTD_LEVEL),
+            store_precompressed=get_backup_type_option(backup_type, 'store_precompressed_media', True),
+            workers=get_backup_type_option(backup_type, 'compression_workers', DEFAULT_COMPRESSION_WORKERS),
+            media_codec=get_backup_type_option(backup_type, 'media_compression', DEFAULT_MEDIA_CODEC),
+        )
+
+    def get_media_codec(self, name, head=b''):
+        if self.store_precompressed and is_precompressed(name, head):
+            return CODEC_STORED
+        return self.media_codec
+
+    def get_zstd_compressor(self, threaded=True):
+        """
+        Get a zstd compressor. Threaded compressors spread a single stream over
+        all compression workers, entries compressed from a worker pool use a
+        single thread each.
+        """
+        threads = self.workers if threaded and self.workers > 1 else 0
+        return zstandard.ZstdCompressor(level=self.zstd_level, threads=threads)
+
+    def as_manifest(self):
+        manifest = {'data': self.data_codec, 'media': self.media_codec}
+        if CODEC_ZSTD in (self.data_codec, self.media_codec):
+            manifest['zstd_level'] = self.zstd_level
+        return manifest
+
+
+class TimedWriter:
+    """
+    Wrap a writable stream and add the CPU time spent in its write calls to a counter.
+
+    Writing into a compressing stream runs the compressor in the calling
+    thread, so the thread CPU time of the writes is the compression cost.
+    """
+
+    def __init__(self, stream, stats):
+        self.stream = stream
+        self.stats = stats
+
+    def write(self, data):
+        started = time.thread_time()
+        try:
+            return self.stream.write(data)
+        finally:
+            self.stats.add_cpu_seconds(time.thread_time() - started)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class ChecksumWriter:
+    """
+    Wrap a writable stream and compute the CRC-32, size and optionally the
+    SHA-256 of the written bytes. Without stream the bytes are only checksummed.
+    """
+
+    def __init__(self, stream=None, sha256=False):
+        self.stream = stream
+        self.crc = 0
+        self.size = 0
+        self.digest = hashlib.sha256() if sha256 else None
+
+    def write(self, data):
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        if self.digest is not None:
+            self.digest.update(data)
+        if self.stream is None:
+            return len(data)
+        return self.stream.write(data)
+
+    def flush(self):
+        if self.stream is not None:
+            self.stream.flush()
+
+    @property
+    def sha256(self):
+        return self.digest.hexdigest() if self.digest is not None else None
+
+
+class ChecksumReader:
+    """
+    Wrap a readable binary stream and compute the CRC-32, size and optionally
+    the SHA-256 of the bytes read from it.
+    """
+
+    def __init__(self, stream, sha256=False):
+        self.stream = stream
+        self.crc = 0
+        self.size = 0
+        self.digest = hashlib.sha256() if sha256 else None
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        if self.digest is not None:
+            self.digest.update(data)
+        return data
+
+    @property
+    def sha256(self):
+        return self.digest.hexdigest() if self.digest is not None else None
+
+
+def compress_stream(source, dest, codec, policy, chunk_size=1024 * 1024):
+    """
+    Compress a binary stream into another one, as the content of a zip member.
+
+    Deflate output is a raw deflate stream (as stored in zip members), zstd
+    output is a complete zstd frame stored as is in the member.
+
+    Returns:
+        Tuple of (CRC-32 of the member content, member content size) where the
+        member content is the uncompressed data for stored and deflated
+        members, and the zstd frame for zstd members
+    """
+    if codec == CODEC_ZSTD:
+        checksum = ChecksumWriter(dest)
+        with policy.get_zstd_compressor(threaded=False).stream_writer(checksum, closefd=False) as writer:
+            for chunk in iter(lambda: source.read(chunk_size), b''):
+                writer.write(chunk)
+        return checksum.crc, checksum.size
+
+    crc = 0
+    size = 0
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15) if codec == CODEC_DEFLATE else None
+    for chunk in iter(lambda: source.read(chunk_size), b''):
+        crc = zlib.crc32(chunk, crc)
+        size += len(chunk)
+        dest.write(compressor.compress(chunk) if compressor else chunk)
+    if compressor:
+        dest.write(compressor.flush())
+    return crc, size
+
+
+class CompressionStats:
+    """
+    Collect the CPU time and sizes of compressed archive entries.
+    """
+
+    def __init__(self):
+        self.cpu_seconds = 0.0
+        self.entries = {CODEC_STORED: 0, CODEC_DEFLATE: 0, CODEC_ZSTD: 0}
+
+    def add_cpu_seconds(self, seconds):
+        self.cpu_seconds += seconds
+
+    def record_entry(self, codec):
+        self.entries[codec] += 1
+
+    def as_dict(self):
+        return {
+            'cpu_seconds': round(self.cpu_seconds, 3),
+            'entries': dict(self.entries),
+        }
+
+
+def open_zstd_reader(source):
+    """
+    Wrap a zstd compressed binary stream into a readable stream of its decompressed content.
+    """
+    if zstandard is None:
+        raise ImportError('The zstandard package is required to restore zstd compressed backup entries')
+    return zstandard.ZstdDecompressor().stream_reader(source)
+
+
+def decompress_zstd_stream(source, dest, chunk_size=1024 * 1024):
+    """
+    Decompress a zstd stream into a writable binary stream.
+    """
+    if zstandard is None:
+        raise ImportError('The zstandard package is required to restore zstd compressed backup entries')
+    with zstandard.ZstdDecompressor().stream_reader(source) as reader:
+        for chunk in iter(lambda: reader.read(chunk_size), b''):
+            dest.write(chunk)
@@ -0,0 +1,42 @@
+"""
+Helpers for reading the BACKUPS settings.
+"""
+from django.conf import settings
+
+
+def get_backups_settings():
+    """
+    Get the BACKUPS settings dictionary.
+
+    Returns:
+        The BACKUPS settings, or an empty dict if they are not configured
+    """
+    return getattr(settings, 'BACKUPS', {})
+
+
+def get_backup_type_config(backup_type):
+    """
+    Get the configuration of a backup type from BACKUPS.BACKUP_TYPES.
+
+    Args:
+        backup_type: The backup type string
+
+    Returns:
+        The backup type configuration, or an empty dict for unknown backup types
+    """
+    return get_backups_settings().get('BACKUP_TYPES', {}).get(backup_type, {})
+
+
+def get_backup_type_option(backup_type, option, default=None):
+    """
+    Get a single option of a backup type configuration.
+
+    Args:
+        backup_type: The backup type string
+        option: The option name (e.g. 'engine', 'chunk_size')
+        default: Value returned when the option is not configured
+
+    Returns:
+        The configured option value or the default
+    """
+    return get_backup_type_config(backup_type).get(option, default)
@@ -0,0 +1,185 @@
+"""
+Dependency graph of the installed models, shared by restore cleanup and loading.
+
+A model depends on the models its foreign keys and one-to-one fields
+(including multi-table inheritance parent links) point at, and on the
+targets of its many-to-many fields with an auto-created through table,
+whose rows are restored along with the model. Explicit through models are
+models of their own and depend on both sides through their foreign keys.
+
+The graph is built once per process. Restore plans for a set of models find
+the strongly connected components of the dependencies between them in
+linear time (iterative Tarjan), so models depending on each other in a cycle
+are loaded and deleted as one group, and are cached as well.
+"""
+import logging
+from collections import namedtuple
+from functools import lru_cache
+
+from django.apps import apps
+
+logger = logging.getLogger(__name__)
+
+# components: tuples of model classes in load order, every model only depends on earlier components.
+# waves: lists of components, every component only depends on components of earlier waves.
+RestorePlan = namedtuple('RestorePlan', ['components', 'waves'])
+
+
+def get_model_dependencies(model_class):
+    """
+    Get the models the rows of a model reference, without the model itself.
+    """
+    dependencies = set()
+    for field in model_class._meta.concrete_fields:
+        if field.is_relation and field.related_model is not None:
+            dependencies.add(field.related_model._meta.concrete_model)
+    for field in model_class._meta.local_many_to_many:
+        if field.remote_field.through._meta.auto_created:
+            dependencies.add(field.related_model._meta.concrete_model)
+    dependencies.discard(model_class)
+    return dependencies
+
+
+def find_strongly_connected_components(nodes, get_successors):
+    """
+    Find the strongly connected components of a directed graph with Tarjan's algorithm, without recursion.
+
+    Args:
+        nodes: Iterable of the nodes of the graph
+        get_successors: Callable returning the successors of a node
+
+    Returns:
+        List of components (lists of nodes). A component comes after every component it has edges to.
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    components = []
+
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(get_successors(root)))]
+
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = lowlink[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(get_successors(successor))))
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member is node:
+                            break
+                    components.append(component)
+    return components
+
+
+class ModelDependencyGraph:
+    """
+    Dependencies between the concrete models of the installed apps.
+    """
+
+    def __init__(self, models):
+        self.dependencies = {model_class: get_model_dependencies(model_class) for model_class in models}
+
+    def get_dependencies(self, model_class):
+        if model_class not in self.dependencies:
+            self.dependencies[model_class] = get_model_dependencies(model_class)
+        return self.dependencies[model_class]
+
+    def plan(self, models):
+        """
+        Plan the load and delete order of a set of models, considering only the dependencies between them.
+
+        Returns:
+            A RestorePlan
+        """
+        models = sorted(set(models), key=lambda model_class: model_class._meta.label_lower)
+        model_set = set(models)
+
+        def get_successors(model_class):
+            return sorted(
+                (dependency for dependency in self.get_dependencies(model_class) if dependency in model_set),
+                key=lambda dependency: dependency._meta.label_lower,
+            )
+
+        components = [
+            tuple(sorted(component, key=lambda model_class: model_class._meta.label_lower))
+            for component in find_strongly_connected_components(models, get_successors)
+        ]
+
+        # Components come after their dependencies, so levels are known when a component is reached
+        levels = {}
+        waves = []
+        for component in components:
+            level = 0
+            for model_class in component:
+                for dependency in get_successors(model_class):
+                    if dependency not in component:
+                        level = max(level, levels[dependency] + 1)
+            for model_class in component:
+                levels[model_class] = level
+            if level == len(waves):
+                waves.append([])
+            waves[level].append(component)
+
+        cyclic = [component for component in components if len(component) > 1]
+        if cyclic:
+            logger.info(f"Models depending on each other: "
+                        f"{[[model_class._meta.label_lower for model_class in component] for component in cyclic]}")
+        return RestorePlan(components, waves)
+
+
+@lru_cache(maxsize=None)
+def get_dependency_graph():
+    """
+    Get the dependency graph of the installed models, built once per process.
+    """
+    return ModelDependencyGraph(
+        model_class for model_class in apps.get_models() if not model_class._meta.proxy
+    )
+
+
+@lru_cache(maxsize=128)
+def _get_restore_plan(models):
+    return get_dependency_graph().plan(models)
+
+
+def get_restore_plan(models):
+    """
+    Get the cached RestorePlan of an iterable of model classes.
+    """
+    return _get_restore_plan(frozenset(models))
+
+
+def get_load_order(models):
+    """
+    Get the model classes in load order, referenced models first.
+    """
+    return [model_class for component in get_restore_plan(models).components for model_class in component]
+
+
+def get_delete_order(models):
+    """
+    Get the model classes in delete order, referencing models first.
+    """
+    return get_load_order(models)[::-1]
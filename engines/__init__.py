@@ -0,0 +1,36 @@
+from django.utils.module_loading import import_string
+
+from superapp.apps.backups.conf import get_backup_type_option
+
+DEFAULT_BACKUP_ENGINE = 'streaming'
+
+BACKUP_ENGINES = {
+    'streaming': 'superapp.apps.backups.engines.streaming.StreamingBackupEngine',
+    'postgres_copy': 'superapp.apps.backups.engines.postgres_copy.PostgresCopyBackupEngine',
+    'dumpdata': 'superapp.apps.backups.engines.dumpdata.DumpdataBackupEngine',
+    'parquet': 'superapp.apps.backups.engines.parquet.ParquetBackupEngine',
+}
+
+
+def get_backup_engine(backup_type, **kwargs):
+    """
+    Instantiate the backup engine configured for a backup type.
+
+    The engine is selected with the 'engine' option of the backup type in
+    BACKUPS.BACKUP_TYPES and defaults to the streaming engine.
+
+    Args:
+        backup_type: The backup type string
+        **kwargs: Extra arguments passed to the engine (e.g. tenant)
+
+    Returns:
+        A backup engine instance
+    """
+    engine_name = get_backup_type_option(backup_type, 'engine', DEFAULT_BACKUP_ENGINE)
+    if engine_name not in BACKUP_ENGINES:
+        raise ValueError(
+            f'Unknown backup engine "{engine_name}" for backup type "{backup_type}". '
+            f'Available engines: {", ".join(BACKUP_ENGINES)}'
+        )
+    engine_class = import_string(BACKUP_ENGINES[engine_name])
+    return engine_class(backup_type, **kwargs)
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import logging
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, connections, router
+
+from superapp.apps.backups.conf import get_backup_type_option
+from superapp.apps.backups.media import get_file_field_names, normalize_media_path
+from superapp.apps.backups.stats import PipelineStats
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def resolve_models(model_labels, using=DEFAULT_DB_ALIAS):
+    """
+    Resolve the 'models' option of a backup type into model classes.
+
+    Args:
+        model_labels: '*' for all models, or a list of 'app_label' / 'app_label.model_name' labels
+        using: Database alias the models will be read from
+
+    Returns:
+        List of model classes, in configuration order and without duplicates
+    """
+    if model_labels == '*':
+        candidates = [
+            model
+            for app_config in apps.get_app_configs()
+            for model in app_config.get_models()
+        ]
+    else:
+        candidates = []
+        for label in model_labels:
+            if '.' in label:
+                app_label, model_name = label.split('.', 1)
+                candidates.append(apps.get_model(app_label, model_name))
+            else:
+                candidates.extend(apps.get_app_config(label).get_models())
+
+    resolved = []
+    for model in candidates:
+        # Same rules as dumpdata: proxies share the concrete model table
+        if model in resolved or model._meta.proxy:
+            continue
+        if not router.allow_migrate_model(using, model):
+            continue
+        resolved.append(model)
+    return resolved
+
+
+def estimate_row_count(model_class, using=DEFAULT_DB_ALIAS):
+    """
+    Estimate the number of rows of a model table without scanning it.
+
+    PostgreSQL and MySQL statistics are used when available, other backends
+    fall back to a COUNT query.
+
+    Args:
+        model_class: The model class to inspect
+        using: Database alias to query
+
+    Returns:
+        The estimated number of rows in the table
+    """
+    connection = connections[using]
+    table_name = model_class._meta.db_table
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [connection.ops.quote_name(table_name)],
+            )
+            row = cursor.fetchone()
+            # reltuples is -1 for tables that were never vacuumed or analyzed
+            if row and row[0] >= 0:
+                return row[0]
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES '
+                'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                [table_name],
+            )
+            row = cursor.fetchone()
+            if row and row[0] is not None:
+                return row[0]
+
+    return model_class._base_manager.using(using).count()
+
+
+def get_schema_fingerprint(model_class, excluded_field_names=()):
+    """
+    Compute a fingerprint of the fields of a model, as they are written to the backup.
+
+    The fingerprint changes when a field is added, removed, renamed or changes
+    its type, column, nullability or related model, so a restore can tell
+    whether the backed up rows still match the current schema.
+
+    Returns:
+        Hex encoded SHA-256 of the field descriptions
+    """
+    fields = []
+    for field in [*model_class._meta.concrete_fields, *model_class._meta.local_many_to_many]:
+        if field.name in excluded_field_names:
+            continue
+        fields.append([
+            field.name,
+            field.get_internal_type(),
+            field.column,
+            field.null,
+            field.related_model._meta.label_lower if field.is_relation and field.related_model else None,
+        ])
+    return hashlib.sha256(json.dumps(fields).encode('utf-8')).hexdigest()
+
+
+class BaseBackupEngine:
+    """
+    Base class for backup engines.
+
+    An engine writes the data of a backup type into a BackupArchiveWriter and
+    reports which media files are referenced by the backed up rows.
+    """
+    name = None
+    # Whether the engine can dump only the rows selected by 'row_filters'
+    supports_incremental = False
+    # Whether the engine passes the dumped rows to 'sqlite_snapshot'
+    supports_sqlite_snapshot = False
+
+    def __init__(self, backup_type, tenant=None, using=DEFAULT_DB_ALIAS):
+        self.backup_type = backup_type
+        self.tenant = tenant
+        self.using = using
+        # Model label -> Q object limiting the dumped rows, used by incremental backups
+        self.row_filters = {}
+        # SqliteSnapshotWriter receiving the serialized rows, when the backup type builds a snapshot
+        self.sqlite_snapshot = None
+        # PipelineStats of the backup, the engine times its own phases (e.g. 'filter') into it
+        self.stats = PipelineStats()
+        self.excluded_fields = get_backup_type_option(backup_type, 'exclude_fields', {}) or {}
+        self.chunk_size = get_backup_type_option(backup_type, 'chunk_size', DEFAULT_CHUNK_SIZE)
+        self._file_field_names = {}
+
+    def get_models(self):
+        return resolve_models(get_backup_type_option(self.backup_type, 'models', '*'), using=self.using)
+
+    def get_excluded_field_names(self, model_class):
+        return self.excluded_fields.get(model_class._meta.label_lower, [])
+
+    def get_schema_fingerprint(self, model_class):
+        return get_schema_fingerprint(model_class, self.get_excluded_field_names(model_class))
+
+    def get_file_field_names(self, model_class):
+        if model_class not in self._file_field_names:
+            self._file_field_names[model_class] = get_file_field_names(model_class)
+        return self._file_field_names[model_class]
+
+    def collect_media_files(self, model_class, fields, media_files):
+        """
+        Add the media files referenced by the serialized fields of one row to media_files.
+        """
+        for field_name in self.get_file_field_names(model_class):
+            file_path = normalize_media_path(fields.get(field_name))
+            if file_path:
+                media_files.add(file_path)
+
+    def dump(self, archive):
+        """
+        Write the backup data into the archive.
+
+        Args:
+            archive: A BackupArchiveWriter instance
+
+        Returns:
+            Dict with 'models' (model label -> row count), 'media_files' (set of media paths)
+            and optionally 'manifest' (extra keys for the archive manifest)
+        """
+        raise NotImplementedError
@@ -0,0 +1,74 @@
+import logging
+import os
+import tempfile
+
+from django.core.management import call_command
+
+from superapp.apps.backups.archive import ARCHIVE_DATA_FILE
+from superapp.apps.backups.engines.base import BaseBackupEngine
+from superapp.apps.backups.serializers import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+
+class DumpdataBackupEngine(BaseBackupEngine):
+    """
+    Legacy engine running `dumpdata` (or `tenant_dumpdata`) into a temporary
+    fixture file that is loaded in memory to apply field exclusions.
+    """
+    name = 'dumpdata'
+    supports_sqlite_snapshot = True
+
+    def dump(self, archive):
+        from superapp.apps.backups.tasks.backup import (
+            MULTI_TENANT_ENABLED,
+            extract_media_files_from_fixture,
+            filter_excluded_fields_from_fixture,
+        )
+
+        args = [model_class._meta.label_lower for model_class in self.get_models()]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_file_path = os.path.join(temp_dir, ARCHIVE_DATA_FILE)
+
+            # Set up options for the dumpdata command
+            options = {
+                'output': temp_file_path,
+                'format': 'json',
+                'database': self.using,
+            }
+
+            # If multi-tenant is enabled and we have a tenant, use tenant-specific commands
+            if MULTI_TENANT_ENABLED and self.tenant:
+                options['tenant_pk'] = self.tenant.pk
+                call_command('tenant_dumpdata', *args, **options)
+            else:
+                call_command('dumpdata', *args, **options)
+
+            with open(temp_file_path, 'rb') as f:
+                fixture_data = loads(f.read())
+
+            if self.excluded_fields:
+                logger.info(f"Applying field exclusions: {self.excluded_fields}")
+                with self.stats.phase('filter'):
+                    fixture_data = filter_excluded_fields_from_fixture(fixture_data, self.excluded_fields)
+
+                    # Write the filtered data back to the file
+                    with open(temp_file_path, 'wb') as f:
+                        f.write(dumps(fixture_data))
+
+            models = {}
+            for obj in fixture_data:
+                models[obj['model']] = models.get(obj['model'], 0) + 1
+                if self.sqlite_snapshot is not None:
+                    self.sqlite_snapshot.add(obj)
+
+            archive.write_file(temp_file_path, ARCHIVE_DATA_FILE)
+            # dumpdata output is not grouped by model, the rows of each model cannot be located
+            for label in models:
+                archive.record_model_data(label, ARCHIVE_DATA_FILE)
+
+        return {
+            'models': models,
+            'media_files': extract_media_files_from_fixture(fixture_data),
+        }
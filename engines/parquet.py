@@ -0,0 +1,313 @@
+import json
+import logging
+import tempfile
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from superapp.apps.backups.archive import ARCHIVE_DATA_DIRECTORY
+from superapp.apps.backups.conf import get_backup_type_option
+from superapp.apps.backups.engines.base import BaseBackupEngine
+from superapp.apps.backups.engines.snapshot import database_snapshot
+from superapp.apps.backups.media import normalize_media_path
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARQUET_COMPRESSION = 'zstd'
+DEFAULT_PARQUET_BATCH_ROWS = 50000
+# Decimals with more digits do not fit a decimal128 column and are written as strings
+MAX_DECIMAL128_DIGITS = 38
+
+INTEGER_TYPES = {
+    'SmallAutoField': 'int16',
+    'SmallIntegerField': 'int16',
+    'PositiveSmallIntegerField': 'int16',
+    'AutoField': 'int32',
+    'IntegerField': 'int32',
+    'PositiveIntegerField': 'int64',
+    'BigAutoField': 'int64',
+    'BigIntegerField': 'int64',
+    'PositiveBigIntegerField': 'int64',
+}
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise ImportError('The pyarrow package is required to write and restore Parquet backups')
+
+
+def get_column_field(field):
+    """
+    Get the field holding the values of a column: the target field for foreign keys.
+    """
+    while field.is_relation:
+        field = field.target_field
+    return field
+
+
+def get_arrow_type(field):
+    """
+    Map a concrete model field to an Arrow type. Foreign keys use the type of the field they point to,
+    JSON and UUID values are written as strings.
+    """
+    value_field = get_column_field(field)
+    internal_type = value_field.get_internal_type()
+    if internal_type in INTEGER_TYPES:
+        return getattr(pyarrow, INTEGER_TYPES[internal_type])()
+    if internal_type == 'BooleanField':
+        return pyarrow.bool_()
+    if internal_type == 'FloatField':
+        return pyarrow.float64()
+    if internal_type == 'DecimalField' and value_field.max_digits <= MAX_DECIMAL128_DIGITS:
+        return pyarrow.decimal128(value_field.max_digits, value_field.decimal_places)
+    if internal_type == 'DateTimeField':
+        return pyarrow.timestamp('us', tz='UTC' if settings.USE_TZ else None)
+    if internal_type == 'DateField':
+        return pyarrow.date32()
+    if internal_type == 'TimeField':
+        return pyarrow.time64('us')
+    if internal_type == 'DurationField':
+        return pyarrow.duration('us')
+    if internal_type == 'BinaryField':
+        return pyarrow.binary()
+    return pyarrow.string()
+
+
+def _get_value_encoder(field):
+    """
+    Get the function converting the values of a field into values of its Arrow column, or None.
+    """
+    value_field = get_column_field(field)
+    internal_type = value_field.get_internal_type()
+    if internal_type == 'JSONField':
+        return lambda value: json.dumps(value, cls=value_field.encoder or DjangoJSONEncoder)
+    if internal_type == 'UUIDField' or (
+        internal_type == 'DecimalField' and value_field.max_digits > MAX_DECIMAL128_DIGITS
+    ):
+        return str
+    if internal_type == 'BinaryField':
+        return bytes
+    return None
+
+
+def _get_value_decoder(field):
+    """
+    Get the function converting the values of an Arrow column back into field values, or None.
+    """
+    value_field = get_column_field(field)
+    if value_field.get_internal_type() == 'JSONField':
+        return lambda value: json.loads(value, cls=value_field.decoder)
+    return None
+
+
+class ParquetBackupEngine(BaseBackupEngine):
+    """
+    Export each model table as an Apache Parquet file.
+
+    Rows are read column by column with values_list() in primary key order,
+    converted into Arrow record batches with typed columns (timestamps,
+    decimals, dates, foreign keys as the type of their target) and written
+    as row groups of a Parquet file per table. Parquet files are compressed
+    on their own and stored in the archive as is, so they can also be loaded
+    into a data warehouse directly. Auto-created many-to-many tables of the
+    backed up models are exported as tables of their own.
+    """
+    name = 'parquet'
+
+    def __init__(self, backup_type, **kwargs):
+        super().__init__(backup_type, **kwargs)
+        _require_pyarrow()
+        self.compression = get_backup_type_option(backup_type, 'parquet_compression', DEFAULT_PARQUET_COMPRESSION)
+        self.batch_rows = get_backup_type_option(backup_type, 'parquet_batch_rows', DEFAULT_PARQUET_BATCH_ROWS)
+
+    def dump(self, archive):
+        result = {'models': {}, 'media_files': set(), 'manifest': {'parquet_tables': [], 'json_file': None}}
+
+        with database_snapshot(self.using):
+            for model_class, queryset, fields, m2m_of in self.iter_tables():
+                label = model_class._meta.label_lower
+                entry_name = f"{ARCHIVE_DATA_DIRECTORY}{label}.parquet"
+
+                with tempfile.TemporaryFile() as parquet_file:
+                    media_files = result['media_files'] if m2m_of is None else None
+                    row_count = self.write_table(model_class, queryset, fields, parquet_file, media_files)
+                    parquet_file.seek(0)
+                    archive.write_stored_file(parquet_file, entry_name)
+
+                result['models'][label] = row_count
+                archive.record_model_data(label, entry_name)
+                result['manifest']['parquet_tables'].append({
+                    'model': label,
+                    'table': model_class._meta.db_table,
+                    'columns': [field.attname for field in fields],
+                    'entry': entry_name,
+                    'rows': row_count,
+                    'm2m_of': m2m_of,
+                })
+                logger.debug(f"Wrote {row_count} rows of {label} to {entry_name}")
+
+        return result
+
+    def iter_tables(self):
+        """
+        Yield (model_class, queryset, fields, m2m_of) for every table to export.
+        """
+        for model_class in self.get_models():
+            queryset = model_class._default_manager.using(self.using).order_by(model_class._meta.pk.attname)
+            excluded_field_names = self.get_excluded_field_names(model_class)
+            fields = [field for field in model_class._meta.concrete_fields if field.name not in excluded_field_names]
+            yield model_class, queryset, fields, None
+
+            for m2m_field in model_class._meta.local_many_to_many:
+                through = m2m_field.remote_field.through
+                if not through._meta.auto_created or m2m_field.name in excluded_field_names:
+                    continue
+                source_field_name = m2m_field.m2m_field_name()
+                through_queryset = through._base_manager.using(self.using).filter(
+                    **{f'{source_field_name}__in': queryset.values('pk')}
+                ).order_by('pk')
+                yield through, through_queryset, list(through._meta.concrete_fields), model_class._meta.label_lower
+
+    def write_table(self, model_class, queryset, fields, stream, media_files=None):
+        """
+        Write the rows of a queryset to a Parquet file, one row group per batch of rows.
+
+        Args:
+            model_class: The model of the rows
+            queryset: The rows to export
+            fields: Concrete fields to export, in column order
+            stream: Writable binary stream receiving the Parquet file
+            media_files: Optional set receiving the media paths referenced by the rows
+
+        Returns:
+            Number of rows written
+        """
+        schema = pyarrow.schema([
+            pyarrow.field(field.attname, get_arrow_type(field), nullable=True) for field in fields
+        ])
+        encoders = [_get_value_encoder(field) for field in fields]
+        file_columns = []
+        if media_files is not None:
+            file_field_names = self.get_file_field_names(model_class)
+            file_columns = [index for index, field in enumerate(fields) if field.name in file_field_names]
+
+        pk_index = [field.attname for field in fields].index(model_class._meta.pk.attname)
+        values_queryset = queryset.values_list(*[field.attname for field in fields])
+
+        row_count = 0
+        with pyarrow.parquet.ParquetWriter(stream, schema, compression=self.compression) as writer:
+            last_pk = None
+            while True:
+                page = values_queryset if last_pk is None else values_queryset.filter(pk__gt=last_pk)
+                rows = list(page[:self.batch_rows])
+                if not rows:
+                    break
+
+                columns = [list(column) for column in zip(*rows)]
+                for index, encoder in enumerate(encoders):
+                    if encoder is not None:
+                        columns[index] = [None if value is None else encoder(value) for value in columns[index]]
+                for index in file_columns:
+                    for value in columns[index]:
+                        file_path = normalize_media_path(value)
+                        if file_path:
+                            media_files.add(file_path)
+
+                writer.write_batch(pyarrow.RecordBatch.from_arrays(
+                    [pyarrow.array(column, type=schema.field(index).type) for index, column in enumerate(columns)],
+                    schema=schema,
+                ))
+                row_count += len(rows)
+                if len(rows) < self.batch_rows:
+                    break
+                last_pk = rows[-1][pk_index]
+        return row_count
+
+
+def load_parquet_tables(extract_dir, manifest, exclude_models=None, using=DEFAULT_DB_ALIAS,
+                        batch_rows=DEFAULT_PARQUET_BATCH_ROWS):
+    """
+    Load the tables of a Parquet archive with bulk inserts, one record batch at a time.
+
+    All tables are loaded in one transaction with constraint checks disabled,
+    like loaddata does, so the load order does not matter. Sequences are
+    reset afterwards.
+
+    Args:
+        extract_dir: Directory where archive was extracted
+        manifest: Parsed backup manifest
+        exclude_models: List of model labels not to import
+        using: Database alias to load into
+        batch_rows: Number of rows decoded and inserted at a time
+
+    Returns:
+        Dict mapping model label -> loaded row count
+    """
+    _require_pyarrow()
+    connection = connections[using]
+    excluded = {label.lower() for label in (exclude_models or [])}
+    loaded = {}
+    loaded_models = []
+
+    with transaction.atomic(using=using):
+        with connection.constraint_checks_disabled():
+            for table in manifest.get('parquet_tables', []):
+                if table['model'] in excluded or table.get('m2m_of') in excluded:
+                    logger.info(f"Excluding model from import: {table['model']}")
+                    continue
+
+                model_class = apps.get_model(table['model'])
+                loaded[table['model']] = _load_parquet_table(
+                    Path(extract_dir) / table['entry'], model_class, table['columns'], using, batch_rows
+                )
+                loaded_models.append(model_class)
+                logger.info(f"Loaded {loaded[table['model']]} rows into {table['table']}")
+
+        table_names = [model_class._meta.db_table for model_class in loaded_models]
+        connection.check_constraints(table_names=table_names)
+
+        # Bulk inserts with explicit primary keys bypass sequences, reset them like loaddata does
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), loaded_models):
+                cursor.execute(sql)
+
+    return loaded
+
+
+def _load_parquet_table(path, model_class, columns, using, batch_rows):
+    fields_by_attname = {field.attname: field for field in model_class._meta.concrete_fields}
+    # Columns of fields removed since the backup are skipped
+    attnames = [attname for attname in columns if attname in fields_by_attname]
+    decoders = {attname: _get_value_decoder(fields_by_attname[attname]) for attname in attnames}
+    decoders = {attname: decoder for attname, decoder in decoders.items() if decoder is not None}
+    # Multi-table inherited models cannot be bulk created, their rows are saved like loaddata saves them
+    bulk = not model_class._meta.parents
+
+    row_count = 0
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=attnames):
+        values = batch.to_pydict()
+        for attname, decoder in decoders.items():
+            values[attname] = [None if value is None else decoder(value) for value in values[attname]]
+
+        objects = [
+            model_class(**dict(zip(attnames, row)))
+            for row in zip(*(values[attname] for attname in attnames))
+        ]
+        if bulk:
+            model_class._base_manager.using(using).bulk_create(objects, batch_size=batch_rows)
+        else:
+            for obj in objects:
+                obj.save_base(raw=True, using=using)
+        row_count += len(objects)
+    return row_count
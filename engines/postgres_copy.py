@@ -0,0 +1,198 @@
+import logging
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from superapp.apps.backups.archive import ARCHIVE_DATA_DIRECTORY
+from superapp.apps.backups.conf import get_backup_type_option
+from superapp.apps.backups.engines.base import BaseBackupEngine
+from superapp.apps.backups.engines.snapshot import database_snapshot
+from superapp.apps.backups.media import normalize_media_path
+
+logger = logging.getLogger(__name__)
+
+COPY_FORMATS = {
+    'csv': 'csv',
+    'binary': 'copy',
+}
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def _copy_options(copy_format):
+    if copy_format not in COPY_FORMATS:
+        raise ValueError(f'Unknown COPY format "{copy_format}". Available formats: {", ".join(COPY_FORMATS)}')
+    return f'(FORMAT {copy_format})'
+
+
+def copy_to_stream(cursor, sql, params, stream):
+    """
+    Run a `COPY ... TO STDOUT` statement and write its output to a binary stream.
+    Supports both psycopg (3) and psycopg2 connections.
+
+    Returns:
+        Number of copied rows
+    """
+    raw_cursor = cursor.cursor
+    if hasattr(raw_cursor, 'copy'):
+        with raw_cursor.copy(sql, params) as copy:
+            for data in copy:
+                stream.write(data)
+    else:
+        raw_cursor.copy_expert(raw_cursor.mogrify(sql, params).decode(), stream, size=COPY_BUFFER_SIZE)
+    return raw_cursor.rowcount
+
+
+def copy_from_stream(cursor, sql, stream):
+    """
+    Run a `COPY ... FROM STDIN` statement reading its input from a binary stream.
+    Supports both psycopg (3) and psycopg2 connections.
+
+    Returns:
+        Number of copied rows
+    """
+    raw_cursor = cursor.cursor
+    if hasattr(raw_cursor, 'copy'):
+        with raw_cursor.copy(sql) as copy:
+            for data in iter(lambda: stream.read(COPY_BUFFER_SIZE), b''):
+                copy.write(data)
+    else:
+        raw_cursor.copy_expert(sql, stream, size=COPY_BUFFER_SIZE)
+    return raw_cursor.rowcount
+
+
+class PostgresCopyBackupEngine(BaseBackupEngine):
+    """
+    Export each model table with PostgreSQL `COPY (SELECT ...) TO STDOUT`.
+
+    The rows never go through the Django serializer, the server streams them
+    in CSV or binary COPY format straight into one archive entry per table.
+    The SELECT is built from the default manager, so the tenant filter is
+    applied when a tenant is set. Auto-created many-to-many tables of the
+    backed up models are exported as tables of their own.
+    """
+    name = 'postgres_copy'
+
+    def __init__(self, backup_type, **kwargs):
+        super().__init__(backup_type, **kwargs)
+        self.copy_format = get_backup_type_option(backup_type, 'copy_format', 'csv')
+
+    def dump(self, archive):
+        connection = connections[self.using]
+        if connection.vendor != 'postgresql':
+            raise ValueError(f'The {self.name} engine requires PostgreSQL, database "{self.using}" is {connection.vendor}')
+
+        copy_options = _copy_options(self.copy_format)
+        result = {'models': {}, 'media_files': set(), 'manifest': {'tables': []}}
+
+        with database_snapshot(self.using):
+            with connection.cursor() as cursor:
+                for model_class, queryset, fields, m2m_of in self.iter_tables():
+                    label = model_class._meta.label_lower
+                    entry_name = f"{ARCHIVE_DATA_DIRECTORY}{label}.{COPY_FORMATS[self.copy_format]}"
+
+                    values_queryset = queryset.values_list(*[field.attname for field in fields])
+                    select_sql, params = values_queryset.query.get_compiler(using=self.using).as_sql()
+                    sql = f'COPY ({select_sql}) TO STDOUT WITH {copy_options}'
+
+                    with archive.open_entry(entry_name) as entry:
+                        row_count = copy_to_stream(cursor, sql, params, entry)
+
+                    if m2m_of is None:
+                        self.collect_queryset_media_files(model_class, queryset, result['media_files'])
+
+                    result['models'][label] = row_count
+                    archive.record_model_data(label, entry_name)
+                    result['manifest']['tables'].append({
+                        'model': label,
+                        'table': model_class._meta.db_table,
+                        'columns': [field.column for field in fields],
+                        'entry': entry_name,
+                        'format': self.copy_format,
+                        'rows': row_count,
+                        'm2m_of': m2m_of,
+                    })
+                    logger.debug(f"Copied {row_count} rows from {model_class._meta.db_table}")
+
+        return result
+
+    def iter_tables(self):
+        """
+        Yield (model_class, queryset, fields, m2m_of) for every table to export.
+        """
+        for model_class in self.get_models():
+            queryset = model_class._default_manager.using(self.using).order_by()
+            excluded_field_names = self.get_excluded_field_names(model_class)
+            fields = [field for field in model_class._meta.concrete_fields if field.name not in excluded_field_names]
+            yield model_class, queryset, fields, None
+
+            for m2m_field in model_class._meta.local_many_to_many:
+                through = m2m_field.remote_field.through
+                if not through._meta.auto_created or m2m_field.name in excluded_field_names:
+                    continue
+                source_field_name = m2m_field.m2m_field_name()
+                through_queryset = through._base_manager.using(self.using).filter(
+                    **{f'{source_field_name}__in': queryset.values('pk')}
+                ).order_by()
+                yield through, through_queryset, list(through._meta.concrete_fields), model_class._meta.label_lower
+
+    def collect_queryset_media_files(self, model_class, queryset, media_files):
+        file_field_names = self.get_file_field_names(model_class)
+        if not file_field_names:
+            return
+        for values in queryset.values_list(*file_field_names).iterator(chunk_size=self.chunk_size):
+            for value in values:
+                file_path = normalize_media_path(value)
+                if file_path:
+                    media_files.add(file_path)
+
+
+def load_copy_tables(extract_dir, manifest, exclude_models=None, using=DEFAULT_DB_ALIAS):
+    """
+    Load the tables of a COPY archive with `COPY ... FROM STDIN`.
+
+    All tables are loaded in one transaction with deferred constraints, so
+    the load order does not matter. Sequences are reset afterwards.
+
+    Args:
+        extract_dir: Directory where archive was extracted
+        manifest: Parsed backup manifest
+        exclude_models: List of model labels not to import
+        using: Database alias to load into
+
+    Returns:
+        Dict mapping model label -> loaded row count
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        raise ValueError(f'COPY archives can only be restored on PostgreSQL, database "{using}" is {connection.vendor}')
+
+    excluded = {label.lower() for label in (exclude_models or [])}
+    loaded = {}
+    loaded_models = []
+
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+
+            for table in manifest.get('tables', []):
+                if table['model'] in excluded or table.get('m2m_of') in excluded:
+                    logger.info(f"Excluding model from import: {table['model']}")
+                    continue
+
+                quote_name = connection.ops.quote_name
+                columns = ', '.join(quote_name(column) for column in table['columns'])
+                sql = f"COPY {quote_name(table['table'])} ({columns}) FROM STDIN WITH {_copy_options(table['format'])}"
+
+                with open(Path(extract_dir) / table['entry'], 'rb') as stream:
+                    loaded[table['model']] = copy_from_stream(cursor, sql, stream)
+                loaded_models.append(apps.get_model(table['model']))
+                logger.info(f"Loaded {loaded[table['model']]} rows into {table['table']}")
+
+            # COPY bypasses sequences, reset them like loaddata does
+            for sql in connection.ops.sequence_reset_sql(no_style(), loaded_models):
+                cursor.execute(sql)
+
+    return loaded
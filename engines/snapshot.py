@@ -0,0 +1,55 @@
+import logging
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def database_snapshot(using=DEFAULT_DB_ALIAS):
+    """
+    Open a consistent read transaction for the duration of a dump.
+
+    On PostgreSQL the transaction runs with REPEATABLE READ isolation and its
+    snapshot is exported, so other connections can read exactly the same data.
+
+    Args:
+        using: Database alias to read from
+
+    Yields:
+        The exported snapshot identifier, or None if the snapshot cannot be shared
+    """
+    connection = connections[using]
+
+    if connection.in_atomic_block:
+        # The isolation level can only be changed at the start of a transaction
+        logger.info("Dump is running inside an existing transaction, database snapshot will not be shared")
+        yield None
+        return
+
+    with transaction.atomic(using=using):
+        snapshot_id = None
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+                cursor.execute('SELECT pg_export_snapshot()')
+                snapshot_id = cursor.fetchone()[0]
+            logger.info(f"Exported database snapshot {snapshot_id}")
+        yield snapshot_id
+
+
+@contextmanager
+def attach_to_snapshot(snapshot_id, using=DEFAULT_DB_ALIAS):
+    """
+    Open a transaction on the current thread's connection that reads from an exported snapshot.
+
+    Args:
+        snapshot_id: Identifier returned by database_snapshot()
+        using: Database alias to read from
+    """
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            cursor.execute('SET TRANSACTION SNAPSHOT %s', [snapshot_id])
+        yield
@@ -0,0 +1,365 @@
+import logging
+import math
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.serializers.python import Serializer as PythonSerializer
+from django.db import connections
+from django.db.models import Max, Min
+
+from superapp.apps.backups.archive import (
+    ARCHIVE_DATA_FILE,
+    DATA_FORMAT_JSON,
+    DATA_FORMAT_JSONL,
+    FixtureStreamWriter,
+    JsonLinesWriter,
+    encode_fixture_object,
+    get_data_segment_name,
+)
+from superapp.apps.backups.conf import get_backup_type_option
+from superapp.apps.backups.engines.base import BaseBackupEngine, estimate_row_count
+from superapp.apps.backups.engines.snapshot import attach_to_snapshot, database_snapshot
+
+# Conditional imports for multi-tenant support
+try:
+    from django_multitenant.utils import unset_current_tenant
+    from superapp.apps.multi_tenant.middleware import set_current_tenant
+    MULTI_TENANT_ENABLED = True
+except ImportError:
+    MULTI_TENANT_ENABLED = False
+
+    def unset_current_tenant():
+        pass
+
+    def set_current_tenant(tenant):
+        pass
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PARTITION_THRESHOLD = 1000000
+DEFAULT_PARTITION_ROWS = 250000
+
+INTEGER_PK_TYPES = (
+    'AutoField', 'BigAutoField', 'SmallAutoField',
+    'IntegerField', 'BigIntegerField', 'SmallIntegerField',
+    'PositiveIntegerField', 'PositiveBigIntegerField', 'PositiveSmallIntegerField',
+)
+
+# A unit of dump work: a whole model or one primary key range (pk_range) of a large model. The
+# segment is the entry the rows are written to, None for models merged into the main data entry
+DumpTask = namedtuple('DumpTask', ['model_class', 'segment', 'pk_range'])
+
+
+def has_integer_pk(model_class):
+    pk_field = model_class._meta.pk
+    target_field = pk_field.target_field if pk_field.is_relation else pk_field
+    return target_field.get_internal_type() in INTEGER_PK_TYPES
+
+
+class StreamingBackupEngine(BaseBackupEngine):
+    """
+    Serialize querysets in chunks straight into the archive data entry.
+
+    Rows are read with keyset pagination, filtered and scanned for media
+    references one chunk at a time and written to the compressed archive entry
+    immediately, so peak memory only depends on the chunk size.
+
+    With 'dump_workers' greater than 1 models are dumped concurrently by a
+    thread pool. Every worker reads from the snapshot exported by the main
+    transaction, so the backup stays point-in-time consistent.
+
+    Tables whose estimated row count exceeds 'partition_threshold' are split
+    into primary key ranges that are dumped as separate archive segments.
+
+    With the "jsonl" data format (the default) every model is written to its
+    own JSON lines entry, the "json" format merges all whole models into a
+    single backup.json fixture.
+    """
+    name = 'streaming'
+    supports_incremental = True
+    supports_sqlite_snapshot = True
+
+    def __init__(self, backup_type, **kwargs):
+        super().__init__(backup_type, **kwargs)
+        self.dump_workers = get_backup_type_option(backup_type, 'dump_workers', 1)
+        self.partition_threshold = get_backup_type_option(
+            backup_type, 'partition_threshold', DEFAULT_PARTITION_THRESHOLD
+        )
+        self.partition_rows = get_backup_type_option(backup_type, 'partition_rows', DEFAULT_PARTITION_ROWS)
+        self.data_format = get_backup_type_option(backup_type, 'data_format', DATA_FORMAT_JSONL)
+        if self.data_format not in (DATA_FORMAT_JSON, DATA_FORMAT_JSONL):
+            raise ValueError(f'Unknown data format "{self.data_format}" for the {self.name} engine. '
+                             f'Available formats: {DATA_FORMAT_JSON}, {DATA_FORMAT_JSONL}')
+
+    def dump(self, archive):
+        result = {'models': {}, 'media_files': set(), 'manifest': {'data_segments': []}}
+        result['manifest']['data_format'] = self.data_format
+        if self.data_format != DATA_FORMAT_JSON:
+            result['manifest']['json_file'] = None
+
+        # Read all models from a single snapshot so the dump is consistent
+        with database_snapshot(self.using) as snapshot_id:
+            tasks = self.plan_dump(self.get_models())
+            if self.dump_workers > 1 and snapshot_id:
+                self.dump_parallel(tasks, snapshot_id, archive, result)
+            else:
+                if self.dump_workers > 1:
+                    logger.warning(f"Database snapshot cannot be shared on '{self.using}', dumping models serially")
+                self.dump_serial(tasks, archive, result)
+
+        logger.info(f"Dumped {sum(result['models'].values())} rows from {len(result['models'])} models "
+                    f"({len(result['manifest']['data_segments'])} segments)")
+        return result
+
+    def plan_dump(self, models):
+        """
+        Split the models into dump tasks, partitioning large tables by primary key range.
+        """
+        tasks = []
+        for model_class in models:
+            label = model_class._meta.label_lower
+            pk_ranges = self.get_partition_ranges(model_class)
+            if not pk_ranges:
+                segment = None
+                if self.data_format != DATA_FORMAT_JSON:
+                    segment = get_data_segment_name(label, data_format=self.data_format)
+                tasks.append(DumpTask(model_class, segment, None))
+                continue
+
+            logger.info(f"Partitioning {label} into {len(pk_ranges)} primary key ranges")
+            for index, pk_range in enumerate(pk_ranges, start=1):
+                tasks.append(DumpTask(model_class, get_data_segment_name(label, index, self.data_format), pk_range))
+        return tasks
+
+    def open_fixture(self, stream):
+        if self.data_format == DATA_FORMAT_JSON:
+            return FixtureStreamWriter(stream)
+        return JsonLinesWriter(stream)
+
+    def get_partition_ranges(self, model_class):
+        """
+        Compute primary key ranges for models whose estimated row count exceeds the partition threshold.
+
+        Returns:
+            List of (lower, upper) ranges with an exclusive upper bound (None for the last range),
+            or None if the model should be dumped as a whole
+        """
+        if not self.partition_threshold or not has_integer_pk(model_class):
+            return None
+
+        estimated_rows = estimate_row_count(model_class, self.using)
+        if estimated_rows < self.partition_threshold:
+            return None
+
+        bounds = self.get_queryset(model_class).aggregate(min_pk=Min('pk'), max_pk=Max('pk'))
+        min_pk, max_pk = bounds['min_pk'], bounds['max_pk']
+        if min_pk is None:
+            return None
+
+        partition_count = math.ceil(estimated_rows / self.partition_rows)
+        step = max(1, math.ceil((max_pk - min_pk + 1) / partition_count))
+
+        pk_ranges = []
+        lower = min_pk
+        while lower <= max_pk:
+            upper = lower + step
+            pk_ranges.append((lower, upper if upper <= max_pk else None))
+            lower = upper
+        return pk_ranges
+
+    def dump_serial(self, tasks, archive, result):
+        """
+        Dump all tasks one after the other straight into their archive entries.
+        """
+        if self.data_format == DATA_FORMAT_JSON:
+            with archive.open_entry(ARCHIVE_DATA_FILE) as entry:
+                fixture = FixtureStreamWriter(entry)
+                for task in tasks:
+                    if task.segment is None:
+                        offset = fixture.position
+                        row_count = self.dump_model(task.model_class, fixture.write, result['media_files'])
+                        self.record_task(task, row_count, result, archive, offset, fixture.position - offset)
+                fixture.close()
+
+        for task in tasks:
+            if task.segment is not None:
+                with archive.open_entry(task.segment) as entry:
+                    fixture = self.open_fixture(entry)
+                    row_count = self.dump_model(
+                        task.model_class, fixture.write, result['media_files'], pk_range=task.pk_range
+                    )
+                    fixture.close()
+                self.record_task(task, row_count, result, archive)
+
+    def dump_parallel(self, tasks, snapshot_id, archive, result):
+        """
+        Dump tasks concurrently into temporary files and merge them into the archive in plan order.
+        With the "json" data format whole models are merged into the main data entry, segment
+        entries are prepared (zstd compressed) by the workers as well.
+        """
+        logger.info(f"Dumping {len(tasks)} tasks with {self.dump_workers} workers from snapshot {snapshot_id}")
+
+        with ThreadPoolExecutor(max_workers=self.dump_workers, thread_name_prefix='backup-dump') as executor:
+            futures = [
+                executor.submit(self.dump_task_to_file, task, snapshot_id) if task.segment is None
+                else executor.submit(self.dump_segment_entry, task, snapshot_id, archive)
+                for task in tasks
+            ]
+            scheduled = list(zip(tasks, futures))
+
+            if self.data_format == DATA_FORMAT_JSON:
+                with archive.open_entry(ARCHIVE_DATA_FILE) as entry:
+                    fixture = FixtureStreamWriter(entry)
+                    for task, future in scheduled:
+                        if task.segment is None:
+                            self.merge_task_output(task, future.result(), fixture, result, archive)
+                    fixture.close()
+
+            # Segments are prepared by the workers, copy them into the archive in plan order
+            for task, future in scheduled:
+                if task.segment is not None:
+                    prepared_entry, row_count, media_files = future.result()
+                    archive.write_prepared(prepared_entry)
+                    result['media_files'].update(media_files)
+                    self.record_task(task, row_count, result, archive)
+
+    def merge_task_output(self, task, output, fixture, result, archive):
+        segment_file, row_count, media_files = output
+        offset = fixture.position
+        with segment_file:
+            segment_file.seek(0)
+            for line in segment_file:
+                fixture.write_encoded(line.rstrip(b'\n'))
+        result['media_files'].update(media_files)
+        self.record_task(task, row_count, result, archive, offset, fixture.position - offset)
+
+    def record_task(self, task, row_count, result, archive, offset=None, length=None):
+        """
+        Record the rows dumped by a task. Models merged into the main data entry are
+        located by offset and length, segments are entries of their own.
+        """
+        label = task.model_class._meta.label_lower
+        result['models'][label] = result['models'].get(label, 0) + row_count
+        if task.segment is None:
+            archive.record_model_data(label, ARCHIVE_DATA_FILE, offset, length)
+        else:
+            archive.record_model_data(label, task.segment)
+            result['manifest']['data_segments'].append({
+                'entry': task.segment,
+                'model': label,
+                'pk_range': list(task.pk_range) if task.pk_range is not None else None,
+                'rows': row_count,
+            })
+
+    def dump_task_to_file(self, task, snapshot_id):
+        """
+        Dump a single task from a worker thread into a temporary file, one encoded row per line.
+
+        Returns:
+            Tuple of (temporary file, row count, set of media paths)
+        """
+        media_files = set()
+        segment_file = tempfile.TemporaryFile()
+        try:
+            if MULTI_TENANT_ENABLED and self.tenant:
+                set_current_tenant(self.tenant)
+            with attach_to_snapshot(snapshot_id, self.using):
+                row_count = self.dump_model(
+                    task.model_class,
+                    lambda row: segment_file.write(encode_fixture_object(row) + b'\n'),
+                    media_files,
+                    pk_range=task.pk_range,
+                )
+        except Exception:
+            segment_file.close()
+            raise
+        finally:
+            unset_current_tenant()
+            # Worker threads own their connection, release it once the task is dumped
+            connections[self.using].close()
+        return segment_file, row_count, media_files
+
+    def dump_segment_entry(self, task, snapshot_id, archive):
+        """
+        Dump a segment from a worker thread and compress it into a prepared archive entry.
+
+        Returns:
+            Tuple of (PreparedEntry, row count, set of media paths)
+        """
+        segment_file, row_count, media_files = self.dump_task_to_file(task, snapshot_id)
+        if self.data_format == DATA_FORMAT_JSONL:
+            # The temporary file already holds one encoded row per line
+            with segment_file:
+                segment_file.seek(0)
+                return archive.prepare_data_entry(segment_file, task.segment), row_count, media_files
+
+        with segment_file, tempfile.TemporaryFile() as fixture_file:
+            segment_file.seek(0)
+            fixture = FixtureStreamWriter(fixture_file)
+            for line in segment_file:
+                fixture.write_encoded(line.rstrip(b'\n'))
+            fixture.close()
+            fixture_file.seek(0)
+            prepared_entry = archive.prepare_data_entry(fixture_file, task.segment)
+        return prepared_entry, row_count, media_files
+
+    def dump_model(self, model_class, write, media_files, pk_range=None):
+        """
+        Serialize the rows of a model (optionally limited to a primary key range) with the given write callable.
+
+        Returns:
+            Number of rows written
+        """
+        row_count = 0
+        for row in self.iter_model_rows(model_class, pk_range=pk_range):
+            self.process_row(model_class, row, media_files)
+            write(row)
+            row_count += 1
+        logger.debug(f"Dumped {row_count} rows from {model_class._meta.label_lower} (range: {pk_range})")
+        return row_count
+
+    def get_queryset(self, model_class):
+        # The default manager applies the tenant filter when a tenant is set
+        # Ordering by the key column, a relation name (e.g. parent_ptr) would follow the related Meta.ordering
+        queryset = model_class._default_manager.using(self.using).order_by(model_class._meta.pk.attname)
+        row_filter = self.row_filters.get(model_class._meta.label_lower)
+        if row_filter is not None:
+            queryset = queryset.filter(row_filter)
+        return queryset
+
+    def iter_model_rows(self, model_class, pk_range=None):
+        """
+        Yield the serialized rows of a model, reading the table in chunks with keyset pagination.
+        """
+        serializer = PythonSerializer()
+        queryset = self.get_queryset(model_class)
+        if pk_range is not None:
+            lower, upper = pk_range
+            queryset = queryset.filter(pk__gte=lower)
+            if upper is not None:
+                queryset = queryset.filter(pk__lt=upper)
+
+        last_pk = None
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            chunk = list(page[:self.chunk_size])
+            if not chunk:
+                return
+            yield from serializer.serialize(chunk)
+            if len(chunk) < self.chunk_size:
+                return
+            last_pk = chunk[-1].pk
+
+    def process_row(self, model_class, row, media_files):
+        """
+        Apply field exclusions to a serialized row, collect its media references and add it to the SQLite snapshot.
+        """
+        excluded_field_names = self.get_excluded_field_names(model_class)
+        if excluded_field_names:
+            for field_name in excluded_field_names:
+                row['fields'].pop(field_name, None)
+        self.collect_media_files(model_class, row['fields'], media_files)
+        if self.sqlite_snapshot is not None:
+            self.sqlite_snapshot.add(row)
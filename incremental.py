@@ -0,0 +1,299 @@
+"""
+Change tracking for incremental backups.
+
+An incremental backup only contains the rows changed since its parent
+backup. Changes are detected with a change tracking field (an auto_now
+DateTimeField such as `updated_at`, or the field configured in
+'change_tracking_fields') compared against the high-water mark recorded for
+the parent, and with the optional change journal for models without such a
+field. Deleted rows are only known through the change journal.
+
+The same per-model state carries a fingerprint of the table, which lets
+scheduled backups be skipped when nothing changed since the previous one.
+"""
+import hashlib
+import json
+import logging
+from functools import lru_cache
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.models import Count, Max, Q
+
+from superapp.apps.backups.conf import get_backup_type_option, get_backups_settings
+from superapp.apps.backups.engines.base import resolve_models
+from superapp.apps.backups.models.backup import Backup, BackupMode
+from superapp.apps.backups.models.backup_model_state import BackupModelState
+from superapp.apps.backups.models.change_journal import ChangeJournalAction, ChangeJournalEntry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FULL_BACKUP_EVERY = 24
+ARCHIVE_DELETIONS_FILE = 'deletions.json'
+
+
+def is_incremental_backup_type(backup_type):
+    return get_backup_type_option(backup_type, 'backup_mode', BackupMode.FULL) == BackupMode.INCREMENTAL
+
+
+def get_tracking_field_name(model_class, backup_type):
+    """
+    Get the name of the field telling when a row last changed, or None if the model has none.
+    """
+    overrides = get_backup_type_option(backup_type, 'change_tracking_fields', {}) or {}
+    label = model_class._meta.label_lower
+    if label in overrides:
+        return overrides[label]
+    for field in model_class._meta.concrete_fields:
+        if isinstance(field, models.DateTimeField) and field.auto_now:
+            return field.name
+    return None
+
+
+def is_backup_bookkeeping_model(model_class):
+    """
+    Whether a model belongs to the backups app itself, whose rows every backup run changes.
+    """
+    return model_class._meta.app_label == Backup._meta.app_label
+
+
+@lru_cache(maxsize=None)
+def get_journaled_models():
+    """
+    Get the models whose changes are written to the change journal.
+
+    Returns:
+        Dict mapping model label -> whether saves are journaled as well (models
+        without a change tracking field) or only deletions
+    """
+    journaled = {}
+    for backup_type in get_backups_settings().get('BACKUP_TYPES', {}):
+        if not is_incremental_backup_type(backup_type):
+            continue
+        if not get_backup_type_option(backup_type, 'change_journal', False):
+            continue
+        for model_class in resolve_models(get_backup_type_option(backup_type, 'models', '*')):
+            # Never journal the backup bookkeeping itself
+            if is_backup_bookkeeping_model(model_class):
+                continue
+            label = model_class._meta.label_lower
+            journal_saves = get_tracking_field_name(model_class, backup_type) is None
+            journaled[label] = journaled.get(label, False) or journal_saves
+    return journaled
+
+
+def get_backup_chain(backup):
+    """
+    Get the backups needed to restore a backup, from its full backup to itself.
+    Unchanged backups share the archive of their parent and are left out.
+    """
+    chain = []
+    while backup is not None:
+        if backup.mode != BackupMode.UNCHANGED:
+            chain.append(backup)
+        backup = backup.parent
+    return list(reversed(chain))
+
+
+def get_previous_backup(backup):
+    """
+    Get the latest completed backup of the same type with an archive of its own.
+    """
+    return Backup.objects.filter(
+        type=backup.type, done=True
+    ).exclude(pk=backup.pk).exclude(mode=BackupMode.UNCHANGED).order_by('-created_at').first()
+
+
+def get_table_change_markers(model_class, backup_type, tenant=None, using=DEFAULT_DB_ALIAS):
+    """
+    Read cheap markers that change whenever rows of a model are inserted, updated or deleted.
+
+    The row count, the highest primary key and the latest change tracking
+    value are read with a single aggregate query. Without tenant, the
+    PostgreSQL statistics counters of the table are added, they also catch
+    updates of models without a change tracking field.
+
+    Returns:
+        Dict of markers, 'max_tracking' holds the high-water mark of the change tracking field
+    """
+    aggregates = {'rows': Count('pk'), 'max_pk': Max('pk')}
+    tracking_field = get_tracking_field_name(model_class, backup_type)
+    if tracking_field:
+        aggregates['max_tracking'] = Max(tracking_field)
+    markers = model_class._default_manager.using(using).aggregate(**aggregates)
+
+    connection = connections[using]
+    if tenant is None and connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT n_tup_ins, n_tup_upd, n_tup_del FROM pg_stat_user_tables WHERE relid = %s::regclass',
+                [connection.ops.quote_name(model_class._meta.db_table)],
+            )
+            markers['table_stats'] = cursor.fetchone()
+    return markers
+
+
+def get_fingerprint(markers):
+    return hashlib.sha256(json.dumps(markers, sort_keys=True, cls=DjangoJSONEncoder).encode('utf-8')).hexdigest()
+
+
+def has_changes_since(previous, model_classes, tenant=None, using=DEFAULT_DB_ALIAS):
+    """
+    Compare the current fingerprints of the models against those recorded for a previous backup.
+
+    The models of the backups app are left out, every backup run changes their rows.
+
+    Returns:
+        True if a model changed, was added or removed, or has no recorded fingerprint
+    """
+    model_classes = [model_class for model_class in model_classes if not is_backup_bookkeeping_model(model_class)]
+    previous_fingerprints = dict(previous.model_states.values_list('model', 'fingerprint'))
+    if set(previous_fingerprints) != {model_class._meta.label_lower for model_class in model_classes}:
+        return True
+
+    for model_class in model_classes:
+        markers = get_table_change_markers(model_class, previous.type, tenant=tenant, using=using)
+        if previous_fingerprints[model_class._meta.label_lower] != get_fingerprint(markers):
+            logger.info(f"{model_class._meta.label_lower} changed since backup {previous.pk}")
+            return True
+    return False
+
+
+def choose_parent_backup(backup):
+    """
+    Choose the parent of a new backup, or None if a full backup should be taken.
+
+    A full backup is taken when the backup type is not incremental, when no
+    completed backup of the type exists yet, or when the chain of the latest
+    one already holds 'full_backup_every' backups.
+    """
+    if not is_incremental_backup_type(backup.type):
+        return None
+
+    previous = get_previous_backup(backup)
+    if previous is None or not previous.model_states.exists():
+        return None
+
+    full_backup_every = get_backup_type_option(backup.type, 'full_backup_every', DEFAULT_FULL_BACKUP_EVERY)
+    if len(get_backup_chain(previous)) >= full_backup_every:
+        return None
+    return previous
+
+
+class IncrementalPlan:
+    """
+    Compute what an incremental backup has to contain relative to its parent.
+
+    Without a parent every model is dumped in full, the plan then only
+    records the model states the next incremental backup (or unchanged
+    check) starts from.
+    """
+
+    def __init__(self, backup_type, parent=None, tenant=None, using=DEFAULT_DB_ALIAS):
+        self.backup_type = backup_type
+        self.parent = parent
+        self.tenant = tenant
+        self.using = using
+        self.use_journal = get_backup_type_option(backup_type, 'change_journal', False)
+        self.parent_states = {}
+        if parent is not None:
+            self.parent_states = {state.model: state for state in parent.model_states.all()}
+
+    def capture_states(self, model_classes):
+        """
+        Capture the current state of the models, before they are dumped.
+        The models of the backups app are left out like has_changes_since does.
+
+        Returns:
+            List of unsaved BackupModelState objects
+        """
+        journal_position = None
+        if self.use_journal:
+            journal_position = ChangeJournalEntry.objects.using(self.using).aggregate(
+                position=Max('id')
+            )['position'] or 0
+
+        states = []
+        for model_class in model_classes:
+            if is_backup_bookkeeping_model(model_class):
+                continue
+            markers = get_table_change_markers(model_class, self.backup_type, tenant=self.tenant, using=self.using)
+            states.append(BackupModelState(
+                model=model_class._meta.label_lower,
+                high_water_mark=markers.get('max_tracking'),
+                journal_position=journal_position,
+                fingerprint=get_fingerprint(markers),
+            ))
+        return states
+
+    def get_row_filters(self, model_classes):
+        """
+        Get the filter selecting the changed rows of each model.
+
+        Returns:
+            Dict mapping model label -> Q object. Models missing from the dict
+            are dumped in full.
+        """
+        if self.parent is None:
+            return {}
+
+        row_filters = {}
+        for model_class in model_classes:
+            label = model_class._meta.label_lower
+            parent_state = self.parent_states.get(label)
+            if parent_state is None:
+                logger.info(f"{label} is not part of the parent backup, dumping it in full")
+                continue
+
+            tracking_field = get_tracking_field_name(model_class, self.backup_type)
+            if tracking_field:
+                if parent_state.high_water_mark is not None:
+                    # Rows changed in the same instant as the mark are dumped again, loading is idempotent
+                    row_filters[label] = Q(**{f'{tracking_field}__gte': parent_state.high_water_mark})
+            elif self.use_journal and parent_state.journal_position is not None:
+                saved_pks, _ = self.get_journaled_changes(model_class, parent_state.journal_position)
+                row_filters[label] = Q(pk__in=saved_pks)
+            else:
+                logger.info(f"{label} has no change tracking field and no change journal, dumping it in full")
+        return row_filters
+
+    def get_deletions(self, model_classes):
+        """
+        Get the primary keys of the rows deleted since the parent backup.
+
+        Returns:
+            Dict mapping model label -> list of deleted primary keys (as strings)
+        """
+        if self.parent is None or not self.use_journal:
+            return {}
+
+        deletions = {}
+        for model_class in model_classes:
+            label = model_class._meta.label_lower
+            parent_state = self.parent_states.get(label)
+            if parent_state is None or parent_state.journal_position is None:
+                continue
+            _, deleted_pks = self.get_journaled_changes(model_class, parent_state.journal_position)
+            if deleted_pks:
+                deletions[label] = deleted_pks
+        return deletions
+
+    def get_journaled_changes(self, model_class, journal_position):
+        """
+        Get the rows saved and deleted since a journal position, the last action of each row wins.
+
+        Returns:
+            Tuple of (saved primary keys, deleted primary keys)
+        """
+        entries = ChangeJournalEntry.objects.using(self.using).filter(
+            model=model_class._meta.label_lower, id__gt=journal_position
+        )
+        if self.tenant is not None:
+            entries = entries.filter(tenant_id=str(self.tenant.pk))
+
+        last_actions = {}
+        for object_pk, action in entries.order_by('id').values_list('object_pk', 'action').iterator():
+            last_actions[object_pk] = action
+        saved = [pk for pk, action in last_actions.items() if action == ChangeJournalAction.SAVED]
+        deleted = [pk for pk, action in last_actions.items() if action == ChangeJournalAction.DELETED]
+        return saved, deleted
@@ -0,0 +1,50 @@
+"""
+Metrics and tracing hooks of the backup and restore pipelines.
+
+The backend is configured with BACKUPS['INSTRUMENTATION']['backend'], either
+one of INSTRUMENTATION_BACKENDS or the dotted path of a BaseInstrumentation
+subclass. The other keys of BACKUPS['INSTRUMENTATION'] are passed to the backend.
+"""
+from functools import lru_cache
+
+from django.utils.module_loading import import_string
+
+from superapp.apps.backups.conf import get_backups_settings
+
+DEFAULT_INSTRUMENTATION_BACKEND = 'noop'
+
+INSTRUMENTATION_BACKENDS = {
+    'noop': 'superapp.apps.backups.instrumentation.base.NoopInstrumentation',
+    'memory': 'superapp.apps.backups.instrumentation.memory.InMemoryInstrumentation',
+    'prometheus': 'superapp.apps.backups.instrumentation.prometheus.PrometheusInstrumentation',
+    'opentelemetry': 'superapp.apps.backups.instrumentation.opentelemetry.OpenTelemetryInstrumentation',
+}
+
+
+@lru_cache(maxsize=None)
+def get_instrumentation():
+    """
+    Get the instrumentation backend configured in the BACKUPS settings.
+
+    The backend is created once per process, metrics have to be registered
+    only once. Call reset_instrumentation() after changing the settings.
+
+    Returns:
+        A BaseInstrumentation instance
+    """
+    options = dict(get_backups_settings().get('INSTRUMENTATION', {}))
+    backend = options.pop('backend', DEFAULT_INSTRUMENTATION_BACKEND)
+    if backend not in INSTRUMENTATION_BACKENDS and '.' not in backend:
+        raise ValueError(
+            f'Unknown instrumentation backend "{backend}". '
+            f'Available backends: {", ".join(INSTRUMENTATION_BACKENDS)}'
+        )
+    backend_class = import_string(INSTRUMENTATION_BACKENDS.get(backend, backend))
+    return backend_class(**options)
+
+
+def reset_instrumentation():
+    """
+    Drop the cached instrumentation backend, the next get_instrumentation() call creates it again.
+    """
+    get_instrumentation.cache_clear()
@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+
+# Spans of the pipeline stages are also recorded as a histogram by backends without tracing
+STAGE_SECONDS_METRIC = 'backups_stage_seconds'
+ROWS_METRIC = 'backups_rows'
+BYTES_METRIC = 'backups_bytes'
+STORAGE_CALLS_METRIC = 'backups_storage_calls'
+MEDIA_TRANSFER_SECONDS_METRIC = 'backups_media_transfer_seconds'
+
+# Metric name -> (kind, description, label names)
+METRICS = {
+    STAGE_SECONDS_METRIC: (HISTOGRAM, 'Duration of the backup and restore pipeline stages', ('stage', 'status')),
+    ROWS_METRIC: (COUNTER, 'Rows dumped or restored', ('pipeline', 'model')),
+    BYTES_METRIC: (COUNTER, 'Bytes read and written by the pipelines', ('pipeline', 'direction')),
+    STORAGE_CALLS_METRIC: (COUNTER, 'Requests sent to the file storages', ('operation',)),
+    MEDIA_TRANSFER_SECONDS_METRIC: (HISTOGRAM, 'Duration of the transfer of a single media file', ('outcome',)),
+}
+
+
+class BaseInstrumentation:
+    """
+    Hooks called by the backup and restore pipelines.
+
+    Subclasses forward them to a metrics or tracing library. Metrics are
+    declared in METRICS, labels are passed as keyword arguments.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Trace the block as a pipeline stage (e.g. 'backup.dump').
+        """
+        yield
+
+    def increment(self, metric, value=1, **labels):
+        """
+        Add a value to a counter.
+        """
+
+    def observe(self, metric, value, **labels):
+        """
+        Record a value (e.g. a duration in seconds) in a histogram.
+        """
+
+
+class NoopInstrumentation(BaseInstrumentation):
+    """
+    Default backend, all hooks do nothing.
+    """
@@ -0,0 +1,88 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from superapp.apps.backups.instrumentation.base import BaseInstrumentation
+
+
+class InMemoryInstrumentation(BaseInstrumentation):
+    """
+    Keep spans, counters and histogram observations in memory.
+
+    Meant for tests and local runs: configure the 'memory' backend, run a
+    backup and inspect the recorded data, e.g.
+    get_instrumentation().get_counter('backups_rows', pipeline='backup').
+    """
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            # List of {'name', 'attributes', 'parent', 'duration', 'error'} in the order the spans ended
+            self.spans = []
+            # (metric, sorted label items) -> value
+            self.counters = {}
+            # (metric, sorted label items) -> list of values
+            self.observations = {}
+
+    @contextmanager
+    def span(self, name, **attributes):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        record = {
+            'name': name,
+            'attributes': attributes,
+            'parent': stack[-1] if stack else None,
+            'duration': None,
+            'error': None,
+        }
+        stack.append(name)
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            record['error'] = repr(e)
+            raise
+        finally:
+            stack.pop()
+            record['duration'] = time.monotonic() - started
+            with self.lock:
+                self.spans.append(record)
+
+    def increment(self, metric, value=1, **labels):
+        key = (metric, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, metric, value, **labels):
+        key = (metric, tuple(sorted(labels.items())))
+        with self.lock:
+            self.observations.setdefault(key, []).append(value)
+
+    def get_spans(self, name=None):
+        return [span for span in self.spans if name is None or span['name'] == name]
+
+    def get_counter(self, metric, **labels):
+        """
+        Get the total of a counter over all label sets matching the given labels.
+        """
+        return sum(
+            value for (name, label_items), value in self.counters.items()
+            if name == metric and labels.items() <= dict(label_items).items()
+        )
+
+    def get_observations(self, metric, **labels):
+        """
+        Get the values recorded in a histogram for all label sets matching the given labels.
+        """
+        return [
+            value
+            for (name, label_items), values in self.observations.items()
+            if name == metric and labels.items() <= dict(label_items).items()
+            for value in values
+        ]
@@ -0,0 +1,55 @@
+import threading
+from contextlib import contextmanager
+
+from superapp.apps.backups.instrumentation.base import COUNTER, METRICS, BaseInstrumentation
+
+try:
+    from opentelemetry import metrics as otel_metrics
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_metrics = None
+    otel_trace = None
+
+INSTRUMENTATION_SCOPE = 'superapp.apps.backups'
+
+
+class OpenTelemetryInstrumentation(BaseInstrumentation):
+    """
+    Emit the pipeline stages as OpenTelemetry spans and the metrics as OpenTelemetry instruments.
+
+    The global tracer and meter providers are used unless 'tracer_provider'
+    or 'meter_provider' are given, e.g. a TracerProvider with an
+    InMemorySpanExporter in tests.
+    """
+
+    def __init__(self, tracer_provider=None, meter_provider=None, **options):
+        super().__init__(**options)
+        if otel_trace is None:
+            raise ImportError('The opentelemetry-api package is required by the opentelemetry instrumentation backend')
+        self.tracer = otel_trace.get_tracer(INSTRUMENTATION_SCOPE, tracer_provider=tracer_provider)
+        self.meter = otel_metrics.get_meter(INSTRUMENTATION_SCOPE, meter_provider=meter_provider)
+        self.lock = threading.Lock()
+        self.instruments = {}
+
+    def get_instrument(self, metric):
+        with self.lock:
+            if metric not in self.instruments:
+                kind, description, label_names = METRICS[metric]
+                if kind == COUNTER:
+                    self.instruments[metric] = self.meter.create_counter(metric, description=description)
+                else:
+                    self.instruments[metric] = self.meter.create_histogram(metric, unit='s', description=description)
+            return self.instruments[metric]
+
+    @contextmanager
+    def span(self, name, **attributes):
+        # Exceptions are recorded on the span and set its status to error
+        attributes = {key: value for key, value in attributes.items() if value is not None}
+        with self.tracer.start_as_current_span(name, attributes=attributes):
+            yield
+
+    def increment(self, metric, value=1, **labels):
+        self.get_instrument(metric).add(value, attributes=labels)
+
+    def observe(self, metric, value, **labels):
+        self.get_instrument(metric).record(value, attributes=labels)
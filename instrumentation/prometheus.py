@@ -0,0 +1,66 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from superapp.apps.backups.instrumentation.base import (
+    COUNTER,
+    METRICS,
+    STAGE_SECONDS_METRIC,
+    BaseInstrumentation,
+)
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+
+class PrometheusInstrumentation(BaseInstrumentation):
+    """
+    Export the metrics with prometheus_client.
+
+    Prometheus has no spans, the duration of the pipeline stages is recorded
+    in the 'backups_stage_seconds' histogram. Metrics are registered in the
+    default registry unless a 'registry' is given. Exposing them is left to
+    the project (e.g. django-prometheus or prometheus_client.start_http_server).
+    """
+
+    def __init__(self, registry=None, buckets=None, **options):
+        super().__init__(**options)
+        if prometheus_client is None:
+            raise ImportError('The prometheus_client package is required by the prometheus instrumentation backend')
+        self.registry = registry or prometheus_client.REGISTRY
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.metrics = {}
+
+    def get_metric(self, metric):
+        with self.lock:
+            if metric not in self.metrics:
+                kind, description, label_names = METRICS[metric]
+                if kind == COUNTER:
+                    self.metrics[metric] = prometheus_client.Counter(
+                        metric, description, label_names, registry=self.registry
+                    )
+                else:
+                    extra = {'buckets': self.buckets} if self.buckets else {}
+                    self.metrics[metric] = prometheus_client.Histogram(
+                        metric, description, label_names, registry=self.registry, **extra
+                    )
+            return self.metrics[metric]
+
+    @contextmanager
+    def span(self, name, **attributes):
+        started = time.monotonic()
+        status = 'error'
+        try:
+            yield
+            status = 'ok'
+        finally:
+            self.observe(STAGE_SECONDS_METRIC, time.monotonic() - started, stage=name, status=status)
+
+    def increment(self, metric, value=1, **labels):
+        self.get_metric(metric).labels(**labels).inc(value)
+
+    def observe(self, metric, value, **labels):
+        self.get_metric(metric).labels(**labels).observe(value)
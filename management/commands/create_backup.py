@@ -4,12 +4,7 @@ from django.utils import timezone
 from django.conf import settings
 
 from superapp.apps.backups.models.backup import Backup
-from superapp.apps.backups.tasks.backup import (
-    get_models_for_backup_type,
-    extract_media_files_from_fixture,
-    copy_media_files_to_backup,
-    create_backup_archive
-)
+from superapp.apps.backups.tasks.backup import build_backup_archive
 
 # Conditional imports for multi-tenant support
 try:
@@ -134,11 +129,9 @@ class Command(BaseCommand):
         """
         import tempfile
         import os
-        import json
+        import shutil
         from pathlib import Path
         from django.core.files.base import File
-        from django.core.management import call_command
-        from django.apps import apps
 
         # Create target directory if it doesn't exist
         target_path = Path(target_file_path)
@@ -147,63 +140,22 @@ class Command(BaseCommand):
             target_dir.mkdir(parents=True, exist_ok=True)
             self.stdout.write(f'Created directory: {target_dir}')
 
-        # Get models to backup based on backup type
-        models_to_backup = get_models_for_backup_type(backup.type)
-
-        # If models_to_backup is '*', backup all models
-        if models_to_backup == '*':
-            args = []
-            for app_config in apps.get_app_configs():
-                for model in app_config.get_models():
-                    model_name = f"{model._meta.app_label}.{model._meta.model_name}"
-                    args.append(model_name)
-        else:
-            args = models_to_backup
-
-        self.stdout.write(f'Backing up models: {", ".join(args)}')
+        tenant = getattr(backup, 'tenant', None) if MULTI_TENANT_ENABLED else None
 
         # Create a temporary directory for the backup process
         with tempfile.TemporaryDirectory() as temp_dir:
-            temp_file_path = os.path.join(temp_dir, 'backup.json')
-
-            # Set up options for the dumpdata command
-            options = {
-                'output': temp_file_path,
-                'format': 'json',
-                'indent': 2,
-                'database': 'default',
-            }
-
-            # If multi-tenant is enabled and we have a tenant, use tenant-specific commands
-            tenant = getattr(backup, 'tenant', None) if MULTI_TENANT_ENABLED else None
-            if MULTI_TENANT_ENABLED and tenant:
-                options['tenant_pk'] = tenant.pk
-                call_command('tenant_dumpdata', *args, **options)
-            else:
-                call_command('dumpdata', *args, **options)
-
-            # Read the generated JSON file to extract media file references
-            with open(temp_file_path, 'r') as f:
-                fixture_data = json.load(f)
-
-            # Extract media files referenced in the fixture
-            media_files = extract_media_files_from_fixture(fixture_data)
-            self.stdout.write(f'Found {len(media_files)} media files referenced in backup')
-
-            # Copy media files to backup directory
-            media_copy_result = copy_media_files_to_backup(media_files, temp_dir)
-            self.stdout.write(f'Copied {len(media_copy_result["copied"])} media files, '
-                            f'{len(media_copy_result["missing"])} files were missing')
-
             # Create archive name based on target file path
-            target_path = Path(target_file_path)
             archive_name = target_path.stem
+            archive_path = os.path.join(temp_dir, f'{archive_name}.zip')
+
+            # Dump data and media files straight into the zip archive
+            build_result = build_backup_archive(backup.type, archive_path, temp_dir, tenant=tenant, backup=backup)
+            media_copy_result = build_result['media_stats']
 
-            # Create zip archive with JSON data and media files
-            archive_path = create_backup_archive(temp_file_path, temp_dir, archive_name)
+            self.stdout.write(f'Backed up {sum(build_result["models"].values())} rows '
+                            f'from {len(build_result["models"])} models')
 
             # Copy the archive to the target location
-            import shutil
             shutil.copy2(archive_path, target_file_path)
 
             # Also save to the backup model for record keeping
@@ -216,8 +168,16 @@ class Command(BaseCommand):
 
             # Log backup statistics
             self.stdout.write(f'Media files: {len(media_copy_result["copied"])} copied, '
-                            f'{len(media_copy_result["missing"])} missing')
+                            f'{len(media_copy_result["missing"])} missing, '
+                            f'{len(media_copy_result["failed"])} failed '
+                            f'({media_copy_result["files_per_second"]} files/s, '
+                            f'{media_copy_result["megabytes_per_second"]} MB/s)')
+            self.stdout.write(f'Compression CPU time: {build_result["compression_stats"]["cpu_seconds"]}s')
             if media_copy_result['missing']:
                 self.stdout.write(
                     self.style.WARNING(f'Missing media files: {media_copy_result["missing"]}')
-                )
\ No newline at end of file
+                )
+            if media_copy_result['failed']:
+                self.stdout.write(
+                    self.style.WARNING(f'Failed media files: {media_copy_result["failed"]}')
+                )
@@ -0,0 +1,75 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from superapp.apps.backups.archive import read_archive_manifest, verify_archive
+
+
+class Command(BaseCommand):
+    help = 'Show the content of a backup archive from its manifest and optionally verify its integrity'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            type=str,
+            required=True,
+            help='Path to the backup archive (.zip) to inspect'
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            default=False,
+            help='Check the size and checksum of every entry (default: False)'
+        )
+
+    def handle(self, *args, **options):
+        file_path = options['file']
+        if not os.path.exists(file_path):
+            raise CommandError(f'Backup file does not exist: {file_path}')
+
+        manifest = read_archive_manifest(file_path)
+        if not manifest:
+            raise CommandError(f'{file_path} has no backup manifest')
+
+        self.stdout.write(f'Format version: {manifest.get("format_version")}')
+        self.stdout.write(f'Created at: {manifest.get("created_at")}')
+        self.stdout.write(f'Engine: {manifest.get("engine", "unknown")}')
+        if manifest.get('mode'):
+            self.stdout.write(f'Mode: {manifest["mode"]} (parent backup {manifest.get("parent_backup_id")})')
+
+        models = manifest.get('models', {})
+        if models:
+            self.stdout.write(f'\n{"Model":<50} {"Rows":>12} {"Size":>14} {"Compressed":>14}')
+            for label, model in models.items():
+                self.stdout.write(
+                    f'{label:<50} {model["rows"]:>12} {_format_size(model["size"]):>14} '
+                    f'{_format_size(model["compressed_size"]):>14}'
+                )
+            self.stdout.write(f'Total: {sum(model["rows"] for model in models.values())} rows in {len(models)} models')
+        elif manifest.get('format_version', '1') < '2':
+            self.stdout.write('Archives older than format version 2 do not describe their models')
+
+        media = manifest.get('media', {})
+        if media:
+            total_size = sum(entry['size'] for entry in media.values())
+            location = 'in the media store' if manifest.get('media_store') else 'in the archive'
+            self.stdout.write(f'\nMedia: {len(media)} files, {_format_size(total_size)} {location}')
+
+        if options['verify']:
+            self.stdout.write('\nVerifying archive entries...')
+            problems = verify_archive(file_path)
+            if problems:
+                for problem in problems:
+                    self.stdout.write(self.style.ERROR(problem))
+                raise CommandError(f'{len(problems)} problems found in {file_path}')
+            self.stdout.write(self.style.SUCCESS('Archive is intact'))
+
+
+def _format_size(size):
+    if size is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} TB'
@@ -0,0 +1,158 @@
+import json
+import os
+import tempfile
+
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from superapp.apps.backups.models.backup import Backup
+from superapp.apps.backups.sqlite_snapshot import SqliteSnapshot, extract_sqlite_snapshot
+
+# Conditional imports for multi-tenant support
+try:
+    from django_multitenant.utils import unset_current_tenant
+    from superapp.apps.multi_tenant.middleware import set_current_tenant
+    from superapp.apps.multi_tenant.models import Tenant
+    MULTI_TENANT_ENABLED = True
+except ImportError:
+    MULTI_TENANT_ENABLED = False
+
+    def unset_current_tenant():
+        pass
+
+    def set_current_tenant(tenant):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Look up rows in the SQLite snapshot of a backup and optionally restore them'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument(
+            '--file',
+            type=str,
+            help='Path to a local backup archive (.zip)'
+        )
+        source.add_argument(
+            '--backup-id',
+            type=int,
+            help='ID of a backup whose archive is read from the backup storage'
+        )
+        parser.add_argument(
+            '--model',
+            type=str,
+            help='Model label (app_label.model_name) to look up, lists the models of the snapshot if omitted'
+        )
+        parser.add_argument(
+            '--pk',
+            nargs='+',
+            default=[],
+            help='Primary keys of the rows to look up'
+        )
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            help='Field lookup as field=value, values are parsed as JSON scalars when possible (repeatable)'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Maximum number of rows to return (default: 20)'
+        )
+        parser.add_argument(
+            '--restore',
+            action='store_true',
+            default=False,
+            help='Save the matching rows into the database, over existing rows with the same primary key. '
+                 'Other rows are not deleted and media files are not restored (default: False)'
+        )
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            help='Tenant ID set as the current tenant while restoring rows (if multi-tenant is enabled)'
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory(prefix='query_backup_') as temp_dir:
+            snapshot_path = self._get_snapshot_path(options, temp_dir)
+
+            with SqliteSnapshot(snapshot_path) as snapshot:
+                if not options['model']:
+                    for model, row_count in snapshot.get_models():
+                        self.stdout.write(f'{model:<50} {row_count:>12}')
+                    return
+
+                rows = snapshot.get_rows(
+                    options['model'],
+                    pks=options['pk'],
+                    filters=dict(self._parse_filter(lookup) for lookup in options['filter']),
+                    limit=options['limit'],
+                )
+
+        self.stdout.write(json.dumps(rows, indent=2, ensure_ascii=False))
+        self.stdout.write(f'{len(rows)} rows found')
+
+        if options['restore'] and rows:
+            self._restore_rows(rows, options.get('tenant_id'))
+            self.stdout.write(self.style.SUCCESS(f'Restored {len(rows)} rows'))
+
+    def _restore_rows(self, rows, tenant_id=None):
+        """
+        Save rows into the database without cleaning up existing data, under the tenant context if given.
+        """
+        tenant = None
+        if MULTI_TENANT_ENABLED and tenant_id:
+            try:
+                tenant = Tenant.objects.get(pk=tenant_id)
+            except Tenant.DoesNotExist:
+                raise CommandError(f'Tenant with ID {tenant_id} does not exist')
+
+        unset_current_tenant()
+        if tenant:
+            set_current_tenant(tenant)
+            self.stdout.write(f'Set tenant context: {tenant}')
+        try:
+            with transaction.atomic():
+                for deserialized in serializers.deserialize('python', rows, ignorenonexistent=True):
+                    deserialized.save()
+        finally:
+            unset_current_tenant()
+
+    def _get_snapshot_path(self, options, temp_dir):
+        try:
+            if options['file']:
+                if not os.path.exists(options['file']):
+                    raise CommandError(f'Backup file does not exist: {options["file"]}')
+                return extract_sqlite_snapshot(options['file'])
+
+            try:
+                backup = Backup.objects.get(pk=options['backup_id'])
+            except Backup.DoesNotExist:
+                raise CommandError(f'Backup with ID {options["backup_id"]} does not exist')
+            if not backup.file:
+                raise CommandError(f'Backup {backup.pk} has no archive')
+
+            archive_path = os.path.join(temp_dir, 'backup.zip')
+            with backup.file.open('rb') as source, open(archive_path, 'wb') as dest:
+                for chunk in source.chunks():
+                    dest.write(chunk)
+            return extract_sqlite_snapshot(archive_path)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    def _parse_filter(self, lookup):
+        if '=' not in lookup:
+            raise CommandError(f'Invalid filter "{lookup}", expected field=value')
+        field_name, value = lookup.split('=', 1)
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+        # Values are bound as SQLite parameters and compared with json_extract(), which only works for scalars
+        if isinstance(value, (dict, list)):
+            raise CommandError(f'Invalid filter "{lookup}", only strings, numbers, booleans and null are supported')
+        return field_name, value
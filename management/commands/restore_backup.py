@@ -1,20 +1,14 @@
 import logging
 import os
-import tempfile
-import json
-from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from django.conf import settings
 
+from superapp.apps.backups.archive import read_archive_manifest
 from superapp.apps.backups.models.restore import Restore
-from superapp.apps.backups.tasks.restore import (
-    extract_backup_archive,
-    restore_media_files_after_loaddata,
-    determine_backup_type,
-    _cleanup_existing_data_for_non_tenant_restore
-)
+from superapp.apps.backups.stats import PipelineStats
+from superapp.apps.backups.tasks.restore import determine_backup_type, restore_backup_file
 
 # Conditional imports for multi-tenant support
 try:
@@ -132,12 +126,12 @@ class Command(BaseCommand):
             restore.save(update_fields=['started_at'])
 
             # Perform the synchronous restore
-            self._restore_backup_synchronously(restore, file_path, backup_type, cleanup_existing_data)
+            self._restore_backup_synchronously(restore, file_path, backup_type, cleanup_existing_data, tenant=tenant)
 
             # Mark as completed
             restore.finished_at = timezone.now()
             restore.done = True
-            restore.save(update_fields=['finished_at', 'done'])
+            restore.save(update_fields=['finished_at', 'done', 'stats'])
 
             self.stdout.write(
                 self.style.SUCCESS(f'Restore completed successfully: {restore_name}')
@@ -153,115 +147,36 @@ class Command(BaseCommand):
             if MULTI_TENANT_ENABLED:
                 unset_current_tenant()
 
-    def _restore_backup_synchronously(self, restore, source_file_path, backup_type, cleanup_existing_data):
+    def _restore_backup_synchronously(self, restore, source_file_path, backup_type, cleanup_existing_data,
+                                      tenant=None):
         """
         Restore backup synchronously using the same logic as the Celery task
         """
-        from django.core.management import call_command
-        import shutil
-
-        temp_dir = None
-        json_file_path = None
-        temp_source_path = None
-        has_media_files = False
-        backup_data = None
-
-        try:
-            # Determine backup file type
-            backup_file_type = determine_backup_type(source_file_path)
-            self.stdout.write(f'Detected backup file type: {backup_file_type}')
-
-            if backup_file_type == 'zip':
-                # Handle ZIP archive with media files
-                temp_dir = tempfile.mkdtemp(prefix='restore_')
-                self.stdout.write(f'Created temporary directory: {temp_dir}')
-
-                # Extract the archive and get JSON file path
-                json_file_path = extract_backup_archive(source_file_path, temp_dir)
-                self.stdout.write(f'Extracted JSON file to: {json_file_path}')
-
-                # Check if media directory exists
-                media_dir = Path(temp_dir) / 'media'
-                has_media_files = media_dir.exists() and any(media_dir.rglob('*'))
-                self.stdout.write(f'Archive contains media files: {has_media_files}')
-
-            else:
-                # Handle direct JSON file - copy to temporary location for consistent handling
-                temp_source_path = tempfile.mktemp(suffix='.json')
-                shutil.copy2(source_file_path, temp_source_path)
-                json_file_path = temp_source_path
-                self.stdout.write(f'Using JSON file: {json_file_path}')
-
-            # Parse backup data for later use in media restoration if needed
-            if has_media_files:
-                self.stdout.write('Parsing backup data for media file restoration...')
-                with open(json_file_path, 'r') as f:
-                    backup_data = json.load(f)
-
-            # Set up options for the loaddata command
-            backup_config = settings.BACKUPS.get('BACKUP_TYPES', {}).get(backup_type, {})
-            exclude_models = backup_config.get('exclude_models_from_import', [])
-            
-            options = {
-                'database': 'default',
-                'exclude': exclude_models,
-            }
-
-            self.stdout.write(f'Exclude models: {exclude_models}')
-
-            # Handle tenant-specific vs non-tenant restore
-            if MULTI_TENANT_ENABLED and hasattr(restore, 'tenant') and restore.tenant:
-                # Tenant-specific restore
-                options['no_cleanup'] = not cleanup_existing_data
-                options['tenant_pk'] = restore.tenant.pk
-                self.stdout.write(f'Running tenant_loaddata for tenant {restore.tenant.pk}')
-                call_command('tenant_loaddata', json_file_path, **options)
-            else:
-                # Non-tenant restore
-                self.stdout.write('Running loaddata (no tenant)')
-                if cleanup_existing_data:
-                    self.stdout.write('Cleanup existing data is enabled, cleaning up existing data from fixture models')
-                    _cleanup_existing_data_for_non_tenant_restore(
-                        file_path=json_file_path,
-                        exclude_models=exclude_models,
-                        using=options.get('database', 'default')
-                    )
-
-                call_command('loaddata', json_file_path, **options)
-
-            # Restore media files AFTER loaddata commands are complete
-            if has_media_files and backup_data:
-                self.stdout.write('Starting media file restoration after successful data load...')
-                media_restore_result = restore_media_files_after_loaddata(temp_dir, backup_data)
-                self.stdout.write(f'Media restoration completed: {len(media_restore_result["restored"])} files restored, '
-                                f'{len(media_restore_result["failed"])} failed')
-                
-                if media_restore_result['failed']:
-                    self.stdout.write(
-                        self.style.WARNING(f'Failed to restore media files: {media_restore_result["failed"]}')
-                    )
-            else:
-                self.stdout.write('No media files to restore')
-
-        finally:
-            # Clean up temporary files and directories
-            if json_file_path and json_file_path != source_file_path and os.path.exists(json_file_path):
-                try:
-                    os.unlink(json_file_path)
-                    self.stdout.write(f'Cleaned up temporary JSON file: {json_file_path}')
-                except Exception as e:
-                    self.stdout.write(self.style.WARNING(f'Failed to clean up temporary JSON file: {e}'))
-
-            if temp_source_path and os.path.exists(temp_source_path):
-                try:
-                    os.unlink(temp_source_path)
-                    self.stdout.write(f'Cleaned up temporary source file: {temp_source_path}')
-                except Exception as e:
-                    self.stdout.write(self.style.WARNING(f'Failed to clean up temporary source file: {e}'))
-
-            if temp_dir and os.path.exists(temp_dir):
-                try:
-                    shutil.rmtree(temp_dir)
-                    self.stdout.write(f'Cleaned up temporary directory: {temp_dir}')
-                except Exception as e:
-                    self.stdout.write(self.style.WARNING(f'Failed to clean up temporary directory: {e}'))
\ No newline at end of file
+        if determine_backup_type(source_file_path) == 'zip':
+            manifest = read_archive_manifest(source_file_path)
+            if manifest.get('mode') == 'incremental':
+                self.stdout.write(self.style.WARNING(
+                    f'This archive is an incremental backup based on backup {manifest.get("parent_backup_id")}, '
+                    f'restore its parent archives first'
+                ))
+
+        stats = PipelineStats(pipeline='restore')
+        media_restore_result = restore_backup_file(
+            restore.file,
+            backup_type,
+            tenant=tenant,
+            cleanup_existing_data=cleanup_existing_data,
+            stats=stats,
+        )
+        restore.stats = stats.as_dict()
+        self.stdout.write(f'Loaded {restore.stats["total_rows"]} rows in {restore.stats["duration"]}s')
+
+        if media_restore_result is None:
+            self.stdout.write('No media files to restore')
+            return
+        self.stdout.write(f'Media restoration completed: {len(media_restore_result["restored"])} files restored, '
+                          f'{len(media_restore_result["failed"])} failed')
+        if media_restore_result['failed']:
+            self.stdout.write(
+                self.style.WARNING(f'Failed to restore media files: {media_restore_result["failed"]}')
+            )
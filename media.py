@@ -0,0 +1,398 @@
+"""
+Helpers for collecting the media files referenced by backed up data.
+"""
+import logging
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models
+
+from superapp.apps.backups.instrumentation import get_instrumentation
+from superapp.apps.backups.instrumentation.base import MEDIA_TRANSFER_SECONDS_METRIC, STORAGE_CALLS_METRIC
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEDIA_WORKERS = 8
+DEFAULT_MEDIA_RETRIES = 3
+DEFAULT_MEDIA_RETRY_BACKOFF = 1.0
+MEDIA_CHUNK_SIZE = 1024 * 1024
+MEDIA_SPOOL_SIZE = 8 * 1024 * 1024
+DEFAULT_INVENTORY_DEPTH = 1
+
+
+def get_file_field_names(model_class):
+    """
+    Get the names of the FileField and ImageField fields of a model.
+
+    Args:
+        model_class: The model class to inspect
+
+    Returns:
+        List of field names holding media file references
+    """
+    return [
+        field.name for field in model_class._meta.concrete_fields
+        if isinstance(field, (models.FileField, models.ImageField))
+    ]
+
+
+def normalize_media_path(field_value):
+    """
+    Convert a FileField value into a path relative to the media storage root.
+
+    Args:
+        field_value: The serialized FileField value (relative path or full URL)
+
+    Returns:
+        The normalized file path, or None if the value does not reference a file
+    """
+    if not isinstance(field_value, str) or not field_value.strip():
+        return None
+
+    # Handle both relative paths and full URLs
+    if field_value.startswith('http'):
+        parsed_url = urlparse(field_value)
+        file_path = parsed_url.path.lstrip('/')
+    else:
+        file_path = field_value.lstrip('/')
+
+    # Remove media URL prefix if present
+    if hasattr(settings, 'MEDIA_URL') and settings.MEDIA_URL:
+        media_url = settings.MEDIA_URL.strip('/')
+        if file_path.startswith(media_url + '/'):
+            file_path = file_path[len(media_url) + 1:]
+
+    return file_path or None
+
+
+def get_listing_prefixes(file_paths, depth=DEFAULT_INVENTORY_DEPTH):
+    """
+    Get the directory prefixes to list so that all given files are covered.
+
+    Args:
+        file_paths: Iterable of file paths relative to the storage root
+        depth: Number of leading directories used as a listing prefix
+
+    Returns:
+        Sorted list of prefixes ending with '/'. Files with fewer directories
+        than the depth are not covered by any prefix.
+    """
+    prefixes = set()
+    for file_path in file_paths:
+        parts = file_path.split('/')
+        if len(parts) > depth:
+            prefixes.add('/'.join(parts[:depth]) + '/')
+    return sorted(prefixes)
+
+
+class StorageInventory:
+    """
+    In-memory index of the objects stored under a set of prefixes.
+
+    Each prefix is listed once with paginated list requests (1000 objects per
+    S3 request) and the name, size and ETag of every object are cached, so
+    existence and size checks are answered locally instead of issuing one
+    HEAD request per file. Names outside of the listed prefixes fall back to
+    regular storage calls.
+    """
+
+    def __init__(self, storage=None):
+        self.storage = storage or default_storage
+        self.objects = {}
+        self.prefixes = []
+
+    @classmethod
+    def for_paths(cls, file_paths, storage=None, depth=DEFAULT_INVENTORY_DEPTH):
+        """
+        Build an inventory covering the given file paths.
+        """
+        inventory = cls(storage)
+        inventory.load(get_listing_prefixes(file_paths, depth=depth))
+        return inventory
+
+    def load(self, prefixes):
+        """
+        List the given prefixes and cache their objects.
+        """
+        instrumentation = get_instrumentation()
+        for prefix in prefixes:
+            if hasattr(self.storage, 'bucket'):
+                self._list_bucket(prefix)
+            elif self._has_local_path():
+                self._list_local(prefix)
+            else:
+                logger.debug(f"Storage {self.storage.__class__.__name__} cannot be listed, using per-file checks")
+                return
+            instrumentation.increment(STORAGE_CALLS_METRIC, operation='list')
+            self.prefixes.append(prefix)
+        logger.info(f"Listed {len(self.objects)} storage objects under {len(self.prefixes)} prefixes")
+
+    def _has_local_path(self):
+        try:
+            self.storage.path('')
+            return True
+        except NotImplementedError:
+            return False
+
+    def _list_bucket(self, prefix):
+        # S3 compatible storages: the boto3 collection paginates list requests transparently
+        location = getattr(self.storage, 'location', '').strip('/')
+        key_prefix = f"{location}/{prefix}" if location else prefix
+        for obj in self.storage.bucket.objects.filter(Prefix=key_prefix):
+            name = obj.key[len(location) + 1:] if location else obj.key
+            self.objects[name] = (obj.size, obj.e_tag.strip('"'))
+
+    def _list_local(self, prefix):
+        root = Path(self.storage.path(''))
+        directory = root / prefix
+        if not directory.is_dir():
+            return
+        for file_path in directory.rglob('*'):
+            if file_path.is_file():
+                name = file_path.relative_to(root).as_posix()
+                self.objects[name] = (file_path.stat().st_size, None)
+
+    def covers(self, name):
+        return any(name.startswith(prefix) for prefix in self.prefixes)
+
+    def exists(self, name):
+        if self.covers(name):
+            return name in self.objects
+        get_instrumentation().increment(STORAGE_CALLS_METRIC, operation='exists')
+        return self.storage.exists(name)
+
+    def size(self, name):
+        if self.covers(name):
+            if name not in self.objects:
+                raise FileNotFoundError(name)
+            return self.objects[name][0]
+        get_instrumentation().increment(STORAGE_CALLS_METRIC, operation='size')
+        return self.storage.size(name)
+
+    def etag(self, name):
+        """
+        Get the cached ETag of an object, or None if it is unknown.
+        """
+        return self.objects.get(name, (None, None))[1]
+
+
+class MediaFileMissing(Exception):
+    """
+    Raised when a referenced media file does not exist in the storage.
+    """
+
+
+class MediaFetcher:
+    """
+    Copy media files out of a storage with a bounded thread pool.
+
+    Each file is retried with exponential backoff on transient storage errors,
+    so a single flaky request does not fail the whole backup. Missing files are
+    reported without retrying. When a StorageInventory is given, existence
+    checks are answered from it instead of the storage.
+    """
+
+    def __init__(self, storage=None, workers=DEFAULT_MEDIA_WORKERS, max_retries=DEFAULT_MEDIA_RETRIES,
+                 retry_backoff=DEFAULT_MEDIA_RETRY_BACKOFF, inventory=None):
+        self.storage = storage or default_storage
+        self.inventory = inventory
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.instrumentation = get_instrumentation()
+
+    def exists(self, file_path):
+        if self.inventory is not None:
+            return self.inventory.exists(file_path)
+        self.instrumentation.increment(STORAGE_CALLS_METRIC, operation='exists')
+        return self.storage.exists(file_path)
+
+    def copy_file(self, file_path, dest_file):
+        """
+        Copy a single file from the storage into an open binary file, retrying transient errors.
+
+        Returns:
+            Number of bytes copied
+
+        Raises:
+            MediaFileMissing: If the file does not exist in the storage
+        """
+        started = time.monotonic()
+        outcome = 'failed'
+        try:
+            size = self._copy_file(file_path, dest_file)
+            outcome = 'copied'
+            return size
+        except MediaFileMissing:
+            outcome = 'missing'
+            raise
+        finally:
+            self.instrumentation.observe(MEDIA_TRANSFER_SECONDS_METRIC, time.monotonic() - started, outcome=outcome)
+
+    def _copy_file(self, file_path, dest_file):
+        attempt = 0
+        while True:
+            try:
+                if not self.exists(file_path):
+                    raise MediaFileMissing(file_path)
+
+                dest_file.seek(0)
+                dest_file.truncate()
+                size = 0
+                self.instrumentation.increment(STORAGE_CALLS_METRIC, operation='open')
+                with self.storage.open(file_path, 'rb') as source_file:
+                    # Copy in chunks to handle large files efficiently
+                    for chunk in iter(lambda: source_file.read(MEDIA_CHUNK_SIZE), b''):
+                        dest_file.write(chunk)
+                        size += len(chunk)
+                return size
+            except MediaFileMissing:
+                raise
+            except FileNotFoundError:
+                raise MediaFileMissing(file_path)
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.retry_backoff * (2 ** attempt)
+                attempt += 1
+                logger.warning(f"Transient error copying media file {file_path} (attempt {attempt}), "
+                               f"retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def copy_to_directory(self, media_files, dest_dir):
+        """
+        Copy media files into a local directory, preserving the directory structure.
+
+        Args:
+            media_files: Iterable of media file paths relative to the storage root
+            dest_dir: Local directory receiving the files
+
+        Returns:
+            Dict with 'copied', 'missing' and 'failed' file lists and throughput statistics
+        """
+        dest_dir = Path(dest_dir)
+        dest_dir.mkdir(parents=True, exist_ok=True)
+
+        def copy_one(file_path):
+            dest_path = dest_dir / file_path
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                with open(dest_path, 'wb') as dest_file:
+                    return self.copy_file(file_path, dest_file), dest_path
+            except Exception:
+                dest_path.unlink(missing_ok=True)
+                raise
+
+        stats = MediaTransferStats()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='backup-media') as executor:
+            futures = {executor.submit(copy_one, file_path): file_path for file_path in media_files}
+            for future in as_completed(futures):
+                stats.record(futures[future], future)
+        return stats.as_dict()
+
+    def iter_fetched(self, media_files, stats, prepare=None, spool_size=MEDIA_SPOOL_SIZE):
+        """
+        Fetch files concurrently into spooled temporary files and yield them in the order of media_files.
+
+        At most twice the number of workers files are held at a time, files
+        smaller than spool_size stay in memory and larger ones spill to a
+        temporary file, so local disk use is bounded by the largest files in
+        flight rather than by the total media size.
+
+        Args:
+            media_files: Iterable of media file paths relative to the storage root
+            stats: MediaTransferStats recording the outcome of every file
+            prepare: Optional callable (file path, spooled file) run by the worker
+                after the fetch, e.g. to compress the file. Its result is yielded
+                instead of the spooled file, which is closed afterwards.
+            spool_size: Size in bytes above which a fetched file spills to disk
+
+        Yields:
+            Tuples of (file path, spooled file positioned at its start, or the
+            result of prepare). The consumer is responsible for closing the
+            spooled file.
+        """
+        def fetch_one(file_path):
+            spool = tempfile.SpooledTemporaryFile(max_size=spool_size)
+            try:
+                size = self.copy_file(file_path, spool)
+                spool.seek(0)
+                if prepare is None:
+                    return size, spool
+                with spool:
+                    return size, prepare(file_path, spool)
+            except Exception:
+                spool.close()
+                raise
+
+        pending = iter(media_files)
+        max_in_flight = self.workers * 2
+        in_flight = deque()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='backup-media') as executor:
+            while True:
+                for file_path in pending:
+                    in_flight.append((file_path, executor.submit(fetch_one, file_path)))
+                    if len(in_flight) >= max_in_flight:
+                        break
+                if not in_flight:
+                    return
+
+                file_path, future = in_flight.popleft()
+                fetched = stats.record(file_path, future)
+                if fetched is not None:
+                    yield file_path, fetched
+
+
+class MediaTransferStats:
+    """
+    Collect the outcome of media transfers and compute their throughput.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.copied = []
+        self.missing = []
+        self.failed = []
+        self.bytes = 0
+
+    def record(self, file_path, future):
+        """
+        Record the outcome of a transfer future resolving to (size, copied file).
+
+        Returns:
+            The copied file, or None if the transfer failed
+        """
+        try:
+            size, copied_file = future.result()
+        except MediaFileMissing:
+            self.missing.append(file_path)
+            logger.warning(f"Media file not found in storage: {file_path}")
+            return None
+        except Exception as e:
+            self.failed.append(file_path)
+            logger.error(f"Error copying media file {file_path}: {e}")
+            return None
+
+        self.bytes += size
+        self.copied.append(file_path)
+        logger.debug(f"Copied media file from storage: {file_path}")
+        return copied_file
+
+    def as_dict(self):
+        duration = time.monotonic() - self.started
+        return {
+            'copied': self.copied,
+            'missing': self.missing,
+            'failed': self.failed,
+            'bytes': self.bytes,
+            'duration': round(duration, 3),
+            'files_per_second': round(len(self.copied) / duration, 2) if duration else 0,
+            'megabytes_per_second': round(self.bytes / (1024 * 1024) / duration, 2) if duration else 0,
+        }
@@ -0,0 +1,243 @@
+"""
+Content-addressed media store shared across backups.
+
+Media files are stored once per content under their SHA-256 in the backup
+storage, archives only carry a media manifest mapping paths to blobs.
+"""
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.files import File
+from django.utils import timezone
+
+from superapp.apps.backups.instrumentation import get_instrumentation
+from superapp.apps.backups.instrumentation.base import MEDIA_TRANSFER_SECONDS_METRIC, STORAGE_CALLS_METRIC
+from superapp.apps.backups.media import DEFAULT_MEDIA_WORKERS, MEDIA_CHUNK_SIZE, MediaTransferStats
+from superapp.apps.backups.models.backup import Backup, BackupMode
+from superapp.apps.backups.models.media_blob import BackupMediaFile, MediaBlob
+from superapp.apps.backups.storage import PrivateBackupStorage
+
+logger = logging.getLogger(__name__)
+
+MEDIA_BLOB_PREFIX = 'media-blobs/'
+MEDIA_MANIFEST_FILE = 'media_manifest.json'
+# Unreferenced blobs younger than this may be about to be referenced by a running backup
+DEFAULT_BLOB_GRACE_PERIOD = timedelta(days=1)
+
+
+def get_blob_name(sha256):
+    return f"{MEDIA_BLOB_PREFIX}{sha256[:2]}/{sha256}"
+
+
+def hash_stream(stream):
+    """
+    Compute the SHA-256 and size of a binary stream, reading it in chunks.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: stream.read(MEDIA_CHUNK_SIZE), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+class MediaStore:
+    """
+    Store the media files of backups as deduplicated, content-addressed blobs.
+
+    A file whose size and ETag did not change since the previous backup of the
+    same type reuses the blob of that backup without being downloaded. Other
+    files are downloaded and hashed, and only uploaded when no blob with the
+    same content exists yet.
+    """
+
+    def __init__(self, storage=None):
+        self.storage = storage or PrivateBackupStorage()
+
+    def get_previous_files(self, backup):
+        """
+        Get the media files of the latest completed backup of the same type, by path.
+        """
+        previous_backup = Backup.objects.filter(
+            type=backup.type, done=True
+        ).exclude(pk=backup.pk).exclude(mode=BackupMode.UNCHANGED).order_by('-created_at').first()
+        if previous_backup is None:
+            return {}
+        return {
+            media_file.path: media_file
+            for media_file in BackupMediaFile.objects.filter(backup=previous_backup).select_related('blob')
+        }
+
+    def store_media_files(self, backup, media_files, fetcher, inventory=None):
+        """
+        Store the media files referenced by a backup and link them to it.
+
+        Args:
+            backup: The Backup the files belong to
+            media_files: Set of media file paths relative to the source storage root
+            fetcher: MediaFetcher reading the source storage
+            inventory: Optional StorageInventory of the source storage, needed to
+                detect unchanged files without downloading them
+
+        Returns:
+            Tuple of (media manifest mapping path -> {'sha256', 'size'}, transfer
+            statistics with additional 'reused' and 'uploaded' counts)
+        """
+        previous_files = self.get_previous_files(backup)
+        stats = MediaTransferStats()
+        linked = {}
+        to_fetch = []
+
+        for file_path in sorted(media_files):
+            previous = previous_files.get(file_path)
+            etag = inventory.etag(file_path) if inventory is not None else None
+            if previous is not None and etag and previous.etag == etag and inventory.exists(file_path) \
+                    and inventory.size(file_path) == previous.size:
+                linked[file_path] = (previous.blob.sha256, previous.size, etag)
+            else:
+                to_fetch.append(file_path)
+        reused = len(linked)
+        logger.info(f"Reusing {reused} unchanged media blobs, fetching {len(to_fetch)} media files")
+
+        uploaded = 0
+        fetched = fetcher.iter_fetched(to_fetch, stats, prepare=self.prepare_blob)
+        for file_path, (sha256, size, was_uploaded) in fetched:
+            linked[file_path] = (sha256, size, inventory.etag(file_path) if inventory is not None else None)
+            uploaded += was_uploaded
+
+        # Register the blobs, touching existing ones so the garbage collector keeps them
+        blob_sizes = {sha256: size for sha256, size, _ in linked.values()}
+        MediaBlob.objects.bulk_create(
+            [MediaBlob(sha256=sha256, size=size, storage_name=get_blob_name(sha256))
+             for sha256, size in blob_sizes.items()],
+            ignore_conflicts=True,
+            batch_size=1000,
+        )
+        blobs = {}
+        for sha256_batch in _batched(list(blob_sizes), 1000):
+            MediaBlob.objects.filter(sha256__in=sha256_batch).update(last_referenced_at=timezone.now())
+            blobs.update(MediaBlob.objects.filter(sha256__in=sha256_batch).in_bulk(field_name='sha256'))
+
+        BackupMediaFile.objects.filter(backup=backup).delete()
+        BackupMediaFile.objects.bulk_create(
+            [BackupMediaFile(backup=backup, blob=blobs[sha256], path=file_path, size=size, etag=etag)
+             for file_path, (sha256, size, etag) in linked.items()],
+            batch_size=1000,
+        )
+
+        result = stats.as_dict()
+        result['reused'] = reused
+        result['uploaded'] = uploaded
+        logger.info(f"Media store: {reused} reused, {len(stats.copied)} fetched, {uploaded} new blobs uploaded")
+        media_manifest = {
+            file_path: {'sha256': sha256, 'size': size}
+            for file_path, (sha256, size, _) in linked.items()
+        }
+        return media_manifest, result
+
+    def prepare_blob(self, file_path, spooled_file):
+        """
+        Hash a fetched media file and upload it unless its blob already exists.
+        Runs in the media fetcher worker threads.
+
+        A reused blob is touched right away, so the garbage collector keeps it
+        until the backup links it.
+
+        Returns:
+            Tuple of (SHA-256, size, whether the blob was uploaded)
+        """
+        sha256, size = hash_stream(spooled_file)
+        blob_name = get_blob_name(sha256)
+        instrumentation = get_instrumentation()
+        instrumentation.increment(STORAGE_CALLS_METRIC, operation='exists')
+        if self.storage.exists(blob_name):
+            MediaBlob.objects.filter(sha256=sha256).update(last_referenced_at=timezone.now())
+            return sha256, size, False
+        spooled_file.seek(0)
+        instrumentation.increment(STORAGE_CALLS_METRIC, operation='save')
+        saved_name = self.storage.save(blob_name, File(spooled_file))
+        if saved_name != blob_name:
+            # Another backup uploaded the same content concurrently
+            self.storage.delete(saved_name)
+        logger.debug(f"Uploaded media blob {blob_name} for {file_path}")
+        return sha256, size, True
+
+    def fetch_to_directory(self, media_manifest, dest_dir, workers=DEFAULT_MEDIA_WORKERS):
+        """
+        Download the blobs of a media manifest into a local directory, under their original paths.
+
+        Args:
+            media_manifest: Dict mapping path -> {'sha256', 'size'}
+            dest_dir: Local directory the files are written to
+            workers: Number of blobs downloaded concurrently
+
+        Returns:
+            Dict with 'copied' and 'failed' file lists
+        """
+        dest_dir = Path(dest_dir).resolve()
+        instrumentation = get_instrumentation()
+
+        def fetch_one(file_path, sha256):
+            dest_path = (dest_dir / file_path).resolve()
+            if dest_dir not in dest_path.parents:
+                raise ValueError(f'Media path {file_path} points outside of the media directory')
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            instrumentation.increment(STORAGE_CALLS_METRIC, operation='open')
+            started = time.monotonic()
+            with self.storage.open(get_blob_name(sha256), 'rb') as source, open(dest_path, 'wb') as dest:
+                for chunk in iter(lambda: source.read(MEDIA_CHUNK_SIZE), b''):
+                    dest.write(chunk)
+            instrumentation.observe(MEDIA_TRANSFER_SECONDS_METRIC, time.monotonic() - started, outcome='copied')
+
+        copied, failed = [], []
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backup-media') as executor:
+            futures = {
+                executor.submit(fetch_one, file_path, entry['sha256']): file_path
+                for file_path, entry in media_manifest.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    copied.append(futures[future])
+                except Exception as e:
+                    failed.append(futures[future])
+                    logger.error(f"Error fetching media blob for {futures[future]}: {e}")
+        return {'copied': copied, 'failed': failed}
+
+
+def collect_unreferenced_blobs(storage=None, grace_period=DEFAULT_BLOB_GRACE_PERIOD):
+    """
+    Delete the media blobs no backup references anymore.
+
+    Blobs referenced within the grace period are kept, a running backup may
+    have uploaded or reused them without having linked them yet.
+
+    Returns:
+        Number of deleted blobs
+    """
+    storage = storage or PrivateBackupStorage()
+    unreferenced = MediaBlob.objects.filter(
+        files__isnull=True,
+        last_referenced_at__lt=timezone.now() - grace_period,
+    )
+    deleted = 0
+    for blob in unreferenced.iterator():
+        try:
+            storage.delete(blob.storage_name)
+        except Exception as e:
+            logger.warning(f"Could not delete media blob {blob.storage_name}: {e}")
+            continue
+        blob.delete()
+        deleted += 1
+    if deleted:
+        logger.info(f"Deleted {deleted} unreferenced media blobs")
+    return deleted
+
+
+def _batched(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -28,6 +28,12 @@ class BackupTypeChoices:
         for key, backup_type in backup_types.items():
             yield key, backup_type['name']
 
+class BackupMode(models.TextChoices):
+    FULL = 'full', _("Full")
+    INCREMENTAL = 'incremental', _("Incremental")
+    UNCHANGED = 'unchanged', _("Unchanged")
+
+
 class Backup(BaseModel):
     name = models.CharField(_("Name"), max_length=100, null=True, blank=True)
     type = models.CharField(
@@ -44,9 +50,25 @@ class Backup(BaseModel):
         null=True,
     )
     done = models.BooleanField(_("Done"), default=False)
+    mode = models.CharField(_("Mode"), max_length=20, choices=BackupMode.choices, default=BackupMode.FULL)
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        related_name='children',
+        blank=True,
+        null=True,
+        verbose_name=_("Parent backup"),
+        help_text=_("The backup an incremental backup is based on."),
+    )
 
     started_at = models.DateTimeField(_("Started at"), blank=True, null=True)
     finished_at = models.DateTimeField(_("Finished at"), blank=True, null=True)
+    stats = models.JSONField(
+        _("Statistics"),
+        default=dict,
+        blank=True,
+        help_text=_("Phase durations in seconds, rows per model, bytes in and out, media counts and peak RSS."),
+    )
 
     created_at = models.DateTimeField(_("created at"), auto_now_add=True)
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
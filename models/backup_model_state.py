@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from superapp.apps.backups.models.backup import Backup
+
+
+class BackupModelState(models.Model):
+    """
+    The state of one model at the time a backup was taken, used as the
+    starting point of the next incremental backup.
+    """
+    backup = models.ForeignKey(Backup, on_delete=models.CASCADE, related_name='model_states')
+    model = models.CharField(_("Model"), max_length=255)
+    row_count = models.BigIntegerField(_("Row count"), default=0)
+    high_water_mark = models.DateTimeField(
+        _("High-water mark"),
+        blank=True,
+        null=True,
+        help_text=_("Latest value of the change tracking field when the backup was taken."),
+    )
+    journal_position = models.BigIntegerField(
+        _("Journal position"),
+        blank=True,
+        null=True,
+        help_text=_("Latest change journal entry when the backup was taken."),
+    )
+    fingerprint = models.CharField(
+        _("Fingerprint"),
+        max_length=64,
+        blank=True,
+        null=True,
+        help_text=_("Hash of the row count, highest primary key and latest change of the model."),
+    )
+
+    class Meta:
+        verbose_name = _("Backup Model State")
+        verbose_name_plural = _("Backup Model States")
+        constraints = [
+            models.UniqueConstraint(fields=['backup', 'model'], name='backups_model_state_unique_model'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} ({self.backup_id})"
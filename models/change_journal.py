@@ -0,0 +1,32 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class ChangeJournalAction(models.TextChoices):
+    SAVED = 'saved', _("Saved")
+    DELETED = 'deleted', _("Deleted")
+
+
+class ChangeJournalEntry(models.Model):
+    """
+    A row saved or deleted in a model tracked by an incremental backup type.
+
+    Deletions can only be detected through the journal, saves are journaled
+    for models without a change tracking field.
+    """
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(_("Model"), max_length=255)
+    object_pk = models.CharField(_("Object primary key"), max_length=255)
+    tenant_id = models.CharField(_("Tenant ID"), max_length=255, blank=True, null=True)
+    action = models.CharField(_("Action"), max_length=10, choices=ChangeJournalAction.choices)
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Change Journal Entry")
+        verbose_name_plural = _("Change Journal Entries")
+        indexes = [
+            models.Index(fields=['model', 'id'], name='backups_journal_model_id'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.model} {self.object_pk}"
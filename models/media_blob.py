@@ -0,0 +1,48 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from superapp.apps.backups.models.backup import Backup
+
+
+class MediaBlob(models.Model):
+    """
+    A media file content stored once in the content-addressed media store,
+    under its SHA-256 in PrivateBackupStorage.
+    """
+    sha256 = models.CharField(_("SHA-256"), max_length=64, unique=True)
+    size = models.BigIntegerField(_("Size"))
+    storage_name = models.CharField(_("Storage name"), max_length=255)
+
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+    last_referenced_at = models.DateTimeField(_("last referenced at"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Media Blob")
+        verbose_name_plural = _("Media Blobs")
+
+    def __str__(self):
+        return f"{self.sha256} ({self.size} bytes)"
+
+
+class BackupMediaFile(models.Model):
+    """
+    A media file referenced by a backup, pointing to the blob holding its content.
+
+    The storage version (size and ETag) of the file at backup time lets the
+    next backup reuse the blob without downloading the file again.
+    """
+    backup = models.ForeignKey(Backup, on_delete=models.CASCADE, related_name='media_files')
+    blob = models.ForeignKey(MediaBlob, on_delete=models.PROTECT, related_name='files')
+    path = models.CharField(_("Path"), max_length=1024)
+    size = models.BigIntegerField(_("Size"))
+    etag = models.CharField(_("ETag"), max_length=128, blank=True, null=True)
+
+    class Meta:
+        verbose_name = _("Backup Media File")
+        verbose_name_plural = _("Backup Media Files")
+        constraints = [
+            models.UniqueConstraint(fields=['backup', 'path'], name='backups_media_file_unique_path'),
+        ]
+
+    def __str__(self):
+        return self.path
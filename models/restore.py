@@ -60,6 +60,12 @@ class Restore(BaseModel):
 
     started_at = models.DateTimeField(_("Started at"), blank=True, null=True)
     finished_at = models.DateTimeField(_("Finished at"), blank=True, null=True)
+    stats = models.JSONField(
+        _("Statistics"),
+        default=dict,
+        blank=True,
+        help_text=_("Phase durations in seconds, rows per model, bytes in and out, media counts and peak RSS."),
+    )
 
     created_at = models.DateTimeField(_("created at"), auto_now_add=True)
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
@@ -0,0 +1,91 @@
+"""
+Parallel loading of restores in dependency waves.
+
+The models of a restore are grouped into waves: the models of a wave only
+reference models of earlier waves, so they are loaded concurrently, each
+unit in its own transaction on its own database connection, and the next
+wave starts once all units of the current one are committed. Models that
+depend on each other in a cycle form a single unit, loaded in one
+transaction: its foreign keys are checked once all of its rows are saved
+(load_fixture_objects disables constraint checks until the end of the load,
+and foreign keys created by Django on PostgreSQL are deferred to the commit).
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Conditional imports for multi-tenant support
+try:
+    from django_multitenant.utils import unset_current_tenant
+    from superapp.apps.multi_tenant.middleware import set_current_tenant
+except ImportError:
+    def unset_current_tenant():
+        pass
+
+    def set_current_tenant(tenant):
+        pass
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESTORE_WORKERS = 1
+
+
+def get_restore_workers(workers, using=DEFAULT_DB_ALIAS):
+    """
+    Get the number of restore workers that can be used on a database.
+
+    SQLite allows a single writer at a time, so restores into it always run serially.
+    """
+    if workers > 1 and connections[using].vendor == 'sqlite':
+        logger.warning(f"Database '{using}' does not support concurrent writers, restoring serially")
+        return 1
+    return max(workers, 1)
+
+
+def run_restore_waves(waves, load_unit, workers=DEFAULT_RESTORE_WORKERS, using=DEFAULT_DB_ALIAS, tenant=None):
+    """
+    Load units of models wave after wave, the units of a wave concurrently.
+
+    Every unit runs in a worker thread with its own database connection,
+    closed once the unit is loaded, and under the tenant context of the
+    restore. The first failing unit stops the restore once the running units
+    of its wave finish, units of later waves are not started.
+
+    Args:
+        waves: List of waves, each a list of units (lists of model labels)
+        load_unit: Callable loading a unit in its own transaction, returning a dict of model label -> row count
+        workers: Maximum number of units loaded at a time
+        using: Database alias the units are loaded into
+        tenant: Optional tenant set as the current tenant of the workers
+
+    Returns:
+        Dict mapping model label -> loaded row count
+    """
+    loaded = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backups-restore') as executor:
+        for index, wave in enumerate(waves):
+            logger.info(f"Loading wave {index + 1}/{len(waves)}: {len(wave)} units of "
+                        f"{sum(len(unit) for unit in wave)} models")
+            futures = [executor.submit(_load_unit, load_unit, unit, using, tenant) for unit in wave]
+            try:
+                for future in as_completed(futures):
+                    for label, row_count in future.result().items():
+                        loaded[label] = loaded.get(label, 0) + row_count
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+    return loaded
+
+
+def _load_unit(load_unit, unit, using, tenant):
+    unset_current_tenant()
+    if tenant:
+        set_current_tenant(tenant)
+    try:
+        return load_unit(unit)
+    finally:
+        unset_current_tenant()
+        # Worker threads do not go through request_finished, close their connection explicitly
+        connections[using].close()
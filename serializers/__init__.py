@@ -0,0 +1,47 @@
+"""
+Fast JSON encoding of backup data.
+
+orjson is used when it is installed, the standard library is the fallback.
+Values are encoded like DjangoJSONEncoder does (dates, decimals, UUIDs,
+durations and lazy strings), objects are written without whitespace.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_django_encoder = DjangoJSONEncoder()
+
+
+def dumps(obj):
+    """
+    Encode a value as compact JSON.
+
+    Returns:
+        UTF-8 encoded bytes
+    """
+    if orjson is not None:
+        try:
+            # Dates and times go through DjangoJSONEncoder so the output matches the json serializer
+            return orjson.dumps(obj, default=_django_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            # Integers wider than 64 bits and non-string keys are only supported by the standard library
+            pass
+    return json.dumps(obj, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    """
+    Decode JSON from bytes or a string.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Integers wider than 64 bits are only supported by the standard library
+            pass
+    return json.loads(data)
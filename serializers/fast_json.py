@@ -0,0 +1,36 @@
+"""
+Drop-in replacement of Django's "json" serialization format using the fast JSON codec.
+
+The document layout is the one of the built-in format, so fixtures written by
+either format can be loaded by the other. Indented output is left to the
+built-in serializer.
+"""
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.json import Serializer as JSONSerializer
+from django.core.serializers.python import Deserializer as PythonDeserializer
+
+from superapp.apps.backups.serializers import dumps, loads
+
+
+class Serializer(JSONSerializer):
+
+    def end_object(self, obj):
+        if self.options.get('indent'):
+            super().end_object(obj)
+            return
+        if not self.first:
+            self.stream.write(',')
+        self.stream.write(dumps(self.get_dump_object(obj)).decode('utf-8'))
+        self._current = None
+
+
+def Deserializer(stream_or_string, **options):
+    if not isinstance(stream_or_string, (bytes, str)):
+        stream_or_string = stream_or_string.read()
+    try:
+        objects = loads(stream_or_string)
+        yield from PythonDeserializer(objects, **options)
+    except (GeneratorExit, DeserializationError):
+        raise
+    except Exception as exc:
+        raise DeserializationError(f"Error deserializing object: {exc}") from exc
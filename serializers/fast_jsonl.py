@@ -0,0 +1,35 @@
+"""
+Drop-in replacement of Django's "jsonl" serialization format using the fast JSON codec.
+
+Lines are decoded one at a time, so fixtures are never loaded in memory as a whole.
+"""
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.jsonl import Serializer as JSONLinesSerializer
+from django.core.serializers.python import Deserializer as PythonDeserializer
+
+from superapp.apps.backups.serializers import dumps, loads
+
+
+class Serializer(JSONLinesSerializer):
+
+    def end_object(self, obj):
+        self.stream.write(dumps(self.get_dump_object(obj)).decode('utf-8'))
+        self.stream.write('\n')
+        self._current = None
+
+
+def Deserializer(stream_or_string, **options):
+    if isinstance(stream_or_string, (bytes, str)):
+        stream_or_string = stream_or_string.splitlines()
+    try:
+        yield from PythonDeserializer(_iter_lines(stream_or_string), **options)
+    except (GeneratorExit, DeserializationError):
+        raise
+    except Exception as exc:
+        raise DeserializationError(f"Error deserializing object: {exc}") from exc
+
+
+def _iter_lines(lines):
+    for line in lines:
+        if line.strip():
+            yield loads(line)
@@ -45,6 +45,11 @@ def extend_superapp_settings(main_settings):
             main_settings,
         )
     )
+    # Fast JSON serializers for dumpdata/loaddata, projects can opt out by registering their own json/jsonl modules
+    serialization_modules = main_settings.setdefault('SERIALIZATION_MODULES', {})
+    serialization_modules.setdefault('json', 'superapp.apps.backups.serializers.fast_json')
+    serialization_modules.setdefault('jsonl', 'superapp.apps.backups.serializers.fast_jsonl')
+
     main_settings['UNFOLD']['SIDEBAR']['navigation'] += [
         {
             "title": _("Backups"),
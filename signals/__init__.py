@@ -1,2 +1,3 @@
 from .backup import *
 from .restore import *
+from .change_journal import *
@@ -0,0 +1,51 @@
+import logging
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from superapp.apps.backups.incremental import get_journaled_models
+from superapp.apps.backups.models.change_journal import ChangeJournalAction, ChangeJournalEntry
+
+logger = logging.getLogger(__name__)
+
+
+def record_change(sender, instance, action):
+    """
+    Write a change journal entry if the model is tracked by an incremental backup type.
+    """
+    journaled_models = get_journaled_models()
+    label = sender._meta.label_lower
+    if label not in journaled_models:
+        return
+    # Saves only need to be journaled for models without a change tracking field
+    if action == ChangeJournalAction.SAVED and not journaled_models[label]:
+        return
+
+    tenant_id = None
+    tenant_meta = getattr(sender, 'TenantMeta', None)
+    if tenant_meta is not None:
+        tenant_id = getattr(instance, tenant_meta.tenant_field_name, None)
+
+    ChangeJournalEntry.objects.using(instance._state.db or 'default').create(
+        model=label,
+        object_pk=str(instance.pk),
+        tenant_id=str(tenant_id) if tenant_id is not None else None,
+        action=action,
+    )
+
+
+@receiver(post_save)
+def change_journal_post_save(sender, instance, created, raw, **kwargs):
+    """
+    Journal saved rows of tracked models. Fixture loads (raw saves) are not journaled.
+    """
+    if raw:
+        return
+    record_change(sender, instance, ChangeJournalAction.SAVED)
+
+
+@receiver(post_delete)
+def change_journal_post_delete(sender, instance, **kwargs):
+    """
+    Journal deleted rows of tracked models.
+    """
+    record_change(sender, instance, ChangeJournalAction.DELETED)
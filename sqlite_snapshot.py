@@ -0,0 +1,152 @@
+"""
+Indexed SQLite snapshot of the rows of a backup.
+
+The snapshot is stored uncompressed inside the archive next to the regular
+data entries. Once extracted it is queried read-only with memory-mapped I/O,
+so looking up single rows does not require parsing the backup data.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zipfile
+
+from superapp.apps.backups.archive import ARCHIVE_MANIFEST_FILE, COPY_BUFFER_SIZE, encode_fixture_object
+from superapp.apps.backups.serializers import loads
+
+logger = logging.getLogger(__name__)
+
+SQLITE_SNAPSHOT_FILE = 'backup.sqlite3'
+SQLITE_INSERT_BATCH_SIZE = 5000
+DEFAULT_MMAP_SIZE = 1024 * 1024 * 1024
+
+
+class SqliteSnapshotWriter:
+    """
+    Collect serialized rows ({'model', 'pk', 'fields'}) into a SQLite database indexed by model and primary key.
+
+    Rows can be added from several dump worker threads, they are inserted in
+    batches under a lock. The index is built once all rows are inserted.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode = OFF')
+        self.connection.execute('PRAGMA synchronous = OFF')
+        self.connection.execute('CREATE TABLE rows (model TEXT NOT NULL, pk TEXT NOT NULL, object TEXT NOT NULL)')
+        self.lock = threading.Lock()
+        self.pending = []
+        self.count = 0
+
+    def add(self, row):
+        values = (row['model'], str(row['pk']), encode_fixture_object(row).decode('utf-8'))
+        with self.lock:
+            self.pending.append(values)
+            if len(self.pending) >= SQLITE_INSERT_BATCH_SIZE:
+                self._flush()
+
+    def _flush(self):
+        self.connection.executemany('INSERT INTO rows (model, pk, object) VALUES (?, ?, ?)', self.pending)
+        self.count += len(self.pending)
+        self.pending = []
+
+    def close(self):
+        """
+        Insert the remaining rows and build the index.
+
+        Returns:
+            Number of rows in the snapshot
+        """
+        with self.lock:
+            self._flush()
+            self.connection.execute('CREATE INDEX rows_model_pk ON rows (model, pk)')
+            self.connection.commit()
+            self.connection.close()
+        logger.info(f"Indexed {self.count} rows in the SQLite snapshot")
+        return self.count
+
+
+class SqliteSnapshot:
+    """
+    Query the SQLite snapshot of a backup, read-only and memory-mapped.
+    """
+
+    def __init__(self, path, mmap_size=DEFAULT_MMAP_SIZE):
+        self.connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        self.connection.execute(f'PRAGMA mmap_size = {int(mmap_size)}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_models(self):
+        """
+        Returns:
+            List of (model label, row count) tuples
+        """
+        return self.connection.execute('SELECT model, COUNT(*) FROM rows GROUP BY model ORDER BY model').fetchall()
+
+    def get_rows(self, model, pks=None, filters=None, limit=None):
+        """
+        Get the serialized rows of a model.
+
+        Args:
+            model: Model label
+            pks: Optional primary keys to look up, using the index
+            filters: Optional dict mapping field name -> value the rows must match
+            limit: Optional maximum number of rows
+
+        Returns:
+            List of fixture objects ({'model', 'pk', 'fields'})
+        """
+        sql = 'SELECT object FROM rows WHERE model = ?'
+        params = [model.lower()]
+        if pks:
+            sql += f" AND pk IN ({', '.join('?' * len(pks))})"
+            params.extend(str(pk) for pk in pks)
+        for field_name, value in (filters or {}).items():
+            sql += ' AND json_extract(object, ?) = ?'
+            params.extend([f'$.fields.{field_name}', value])
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [loads(obj) for obj, in self.connection.execute(sql, params)]
+
+    def close(self):
+        self.connection.close()
+
+
+def extract_sqlite_snapshot(archive_path, dest_path=None):
+    """
+    Extract the SQLite snapshot of a backup archive.
+
+    The snapshot is stored uncompressed, so this is a plain copy. By default it
+    is extracted next to the archive and reused as long as the archive did not change.
+
+    Args:
+        archive_path: Path to the ZIP archive
+        dest_path: Where to extract the snapshot, defaults to "<archive>.sqlite3"
+
+    Returns:
+        Path to the extracted snapshot
+    """
+    dest_path = dest_path or f'{archive_path}.sqlite3'
+    if os.path.exists(dest_path) and os.path.getmtime(dest_path) >= os.path.getmtime(archive_path):
+        return dest_path
+
+    with zipfile.ZipFile(archive_path, 'r') as zipf:
+        try:
+            manifest = json.loads(zipf.read(ARCHIVE_MANIFEST_FILE))
+        except KeyError:
+            manifest = {}
+        if not manifest.get('sqlite_snapshot'):
+            raise ValueError(f'{archive_path} has no SQLite snapshot, enable the "sqlite_snapshot" option')
+
+        with zipf.open(manifest['sqlite_snapshot']) as source, open(dest_path, 'wb') as dest:
+            for chunk in iter(lambda: source.read(COPY_BUFFER_SIZE), b''):
+                dest.write(chunk)
+    return dest_path
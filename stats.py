@@ -0,0 +1,106 @@
+"""
+Timing and volume statistics of backup and restore runs.
+
+The statistics are stored in the 'stats' field of Backup and Restore records,
+so regressions can be found and worker capacity planned from real runs.
+"""
+import sys
+import time
+from contextlib import contextmanager
+
+from superapp.apps.backups.instrumentation import get_instrumentation
+from superapp.apps.backups.instrumentation.base import BYTES_METRIC, ROWS_METRIC
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+
+def get_peak_rss():
+    """
+    Get the peak resident set size of the current process in bytes, or None if it cannot be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux and BSD kilobytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class PipelineStats:
+    """
+    Collect the duration of the phases of a backup or restore and the volume of data it processed.
+
+    Phases are timed by wall clock and add up when a phase runs several times
+    (e.g. once per backup of an incremental chain). Phases may overlap: the
+    archive is compressed while it is dumped, so the 'compress' phase records
+    the CPU time spent compressing rather than wall time.
+
+    Phases are also traced as '<pipeline>.<phase>' spans of the configured
+    instrumentation backend, rows and bytes are added to its counters.
+    """
+
+    def __init__(self, pipeline='backup', instrumentation=None):
+        self.pipeline = pipeline
+        self.instrumentation = instrumentation or get_instrumentation()
+        self.started = time.monotonic()
+        self.phases = {}
+        self.rows = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.media = {}
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Time the block as the given phase.
+        """
+        started = time.monotonic()
+        try:
+            with self.instrumentation.span(f'{self.pipeline}.{name}'):
+                yield
+        finally:
+            self.add_duration(name, time.monotonic() - started)
+
+    def add_duration(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_rows(self, row_counts):
+        """
+        Add the row counts of a dict mapping model label -> row count.
+        """
+        for label, row_count in row_counts.items():
+            self.rows[label] = self.rows.get(label, 0) + row_count
+            self.instrumentation.increment(ROWS_METRIC, row_count, pipeline=self.pipeline, model=label)
+
+    def add_bytes(self, bytes_in=0, bytes_out=0):
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        if bytes_in:
+            self.instrumentation.increment(BYTES_METRIC, bytes_in, pipeline=self.pipeline, direction='in')
+        if bytes_out:
+            self.instrumentation.increment(BYTES_METRIC, bytes_out, pipeline=self.pipeline, direction='out')
+
+    def add_media(self, media_result):
+        """
+        Add the counts of a media copy or restore result (dict of file lists and an optional 'bytes' total).
+        """
+        for key, value in media_result.items():
+            if isinstance(value, list):
+                self.media[key] = self.media.get(key, 0) + len(value)
+            elif key == 'bytes':
+                self.media['bytes'] = self.media.get('bytes', 0) + value
+
+    def as_dict(self):
+        return {
+            'duration': round(time.monotonic() - self.started, 3),
+            'phases': {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            'rows': dict(self.rows),
+            'total_rows': sum(self.rows.values()),
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'media': dict(self.media),
+            'peak_rss': get_peak_rss(),
+        }
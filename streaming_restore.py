@@ -0,0 +1,430 @@
+"""
+Restore fixture archives without extracting them.
+
+Data entries are read straight from the ZIP archive and parsed incrementally,
+JSON lines entries one line at a time and JSON fixtures one array element at
+a time. Objects are deserialized and saved in bounded batches and media
+entries are streamed into the storage, so memory and temporary disk use do
+not grow with the size of the backup.
+"""
+import codecs
+import hashlib
+import json
+import logging
+import tempfile
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core import serializers
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, IntegrityError, connections, router, transaction
+from django.db.models.signals import post_save, pre_save
+
+from superapp.apps.backups.archive import ARCHIVE_MEDIA_DIRECTORY, COPY_BUFFER_SIZE
+from superapp.apps.backups.compression import open_zstd_reader
+from superapp.apps.backups.media import MEDIA_SPOOL_SIZE, StorageInventory
+from superapp.apps.backups.media_store import MediaStore, get_blob_name
+from superapp.apps.backups.serializers import loads
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESTORE_BATCH_SIZE = 1000
+# How bulk inserts handle rows whose primary key already exists: fail, keep the existing row or overwrite it
+RESTORE_CONFLICT_MODES = ('error', 'ignore', 'update')
+# Raw saves of loaddata update existing rows
+DEFAULT_RESTORE_CONFLICTS = 'update'
+JSON_READ_SIZE = 64 * 1024
+JSON_WHITESPACE = ' \t\n\r'
+
+
+def get_archive_member_names(manifest):
+    """
+    Get the mapping of logical entry names to the ZIP members holding them (zstd entries are stored as "<entry>.zst").
+    """
+    return manifest.get('compression', {}).get('entries', {})
+
+
+@contextmanager
+def open_archive_entry(zipf, manifest, arcname):
+    """
+    Open an entry of a backup archive for reading, decompressing zstd entries on the fly.
+    """
+    member_name = get_archive_member_names(manifest).get(arcname, arcname)
+    with zipf.open(member_name) as member:
+        if member_name == arcname:
+            yield member
+        else:
+            with open_zstd_reader(member) as reader:
+                yield reader
+
+
+def iter_lines(stream, read_size=JSON_READ_SIZE):
+    """
+    Yield the lines of a binary stream without their line break.
+    """
+    pending = b''
+    for chunk in iter(lambda: stream.read(read_size), b''):
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def iter_json_array(stream, read_size=JSON_READ_SIZE):
+    """
+    Yield the elements of a JSON array read from a binary stream, one element at a time.
+
+    Only the element being parsed is held in memory. The read size grows with
+    elements larger than it, so parsing stays linear.
+    """
+    decoder = json.JSONDecoder()
+    utf8_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    position = 0
+    eof = False
+    expected = '['
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = stream.read(max(read_size, len(buffer) - position))
+        eof = not chunk
+        buffer = buffer[position:] + utf8_decoder.decode(chunk, final=eof)
+        position = 0
+
+    while True:
+        while position < len(buffer) and buffer[position] in JSON_WHITESPACE:
+            position += 1
+        if position == len(buffer):
+            if eof:
+                raise ValueError('Unexpected end of JSON fixture')
+            fill()
+            continue
+
+        char = buffer[position]
+        if char == ']' and expected != '[':
+            return
+        if expected in ('[', ','):
+            if char != expected:
+                raise ValueError(f'Invalid JSON fixture, expected "{expected}" but found "{char}"')
+            position += 1
+            expected = None
+            continue
+
+        try:
+            element, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        yield element
+        expected = ','
+
+
+def iter_entry_objects(stream, arcname):
+    """
+    Yield the fixture objects of a data entry, JSON lines or JSON.
+    """
+    if arcname.endswith('.jsonl'):
+        for line in iter_lines(stream):
+            if line.strip():
+                yield loads(line)
+    else:
+        yield from iter_json_array(stream)
+
+
+def iter_archive_objects(zipf, manifest, arcnames):
+    """
+    Yield the fixture objects of the given data entries of an archive, in order.
+    """
+    for arcname in arcnames:
+        with open_archive_entry(zipf, manifest, arcname) as stream:
+            yield from iter_entry_objects(stream, arcname)
+
+
+class BulkObjectWriter:
+    """
+    Group deserialized objects per model and insert them with bulk_create.
+
+    A model is inserted once batch_size of its objects are pending, the rows
+    of its auto-created many-to-many tables are inserted in bulk right after.
+    bulk_create does not send signals, models opted in with send_signals get
+    pre_save and post_save with raw=True like loaddata sends them.
+
+    Objects are saved one at a time like loaddata saves them when bulk_create
+    cannot be used: multi-table inherited models, and conflict modes the
+    database does not support (raw saves update existing rows).
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, batch_size=DEFAULT_RESTORE_BATCH_SIZE, conflicts=DEFAULT_RESTORE_CONFLICTS,
+                 send_signals=False):
+        if conflicts not in RESTORE_CONFLICT_MODES:
+            raise ValueError(f'Unknown conflict mode "{conflicts}". Available modes: {", ".join(RESTORE_CONFLICT_MODES)}')
+        self.using = using
+        self.connection = connections[using]
+        self.batch_size = batch_size
+        self.conflicts = conflicts
+        # True, False or a list of model labels
+        self.send_signals = send_signals
+        self.pending = defaultdict(list)
+        self.loaded = defaultdict(int)
+
+    def add(self, deserialized):
+        model_class = type(deserialized.object)
+        self.pending[model_class].append(deserialized)
+        if len(self.pending[model_class]) >= self.batch_size:
+            self.flush_model(model_class)
+
+    def flush(self):
+        for model_class in list(self.pending):
+            self.flush_model(model_class)
+
+    def sends_signals(self, model_class):
+        if isinstance(self.send_signals, bool):
+            return self.send_signals
+        return model_class._meta.label_lower in {label.lower() for label in self.send_signals}
+
+    def get_bulk_create_options(self, model_class):
+        """
+        Get the conflict handling arguments of bulk_create for a model, or None if it cannot be bulk created.
+        """
+        features = self.connection.features
+        if model_class._meta.parents:
+            return None
+        if self.conflicts == 'ignore':
+            return {'ignore_conflicts': True} if features.supports_ignore_conflicts else None
+        if self.conflicts == 'update':
+            update_fields = [field.name for field in model_class._meta.concrete_fields if not field.primary_key]
+            if not update_fields:
+                return {'ignore_conflicts': True} if features.supports_ignore_conflicts else None
+            if not getattr(features, 'supports_update_conflicts_with_target', False):
+                return None
+            return {
+                'update_conflicts': True,
+                'unique_fields': [model_class._meta.pk.name],
+                'update_fields': update_fields,
+            }
+        return {}
+
+    def flush_model(self, model_class):
+        batch = self.pending.pop(model_class, [])
+        if not batch:
+            return
+
+        label = model_class._meta.label_lower
+        options = self.get_bulk_create_options(model_class)
+        try:
+            if options is None:
+                for deserialized in batch:
+                    deserialized.save(using=self.using)
+            else:
+                objects = [deserialized.object for deserialized in batch]
+                send_signals = self.sends_signals(model_class)
+                if send_signals:
+                    for obj in objects:
+                        pre_save.send(sender=model_class, instance=obj, raw=True, using=self.using, update_fields=None)
+                model_class._base_manager.using(self.using).bulk_create(objects, batch_size=self.batch_size, **options)
+                if send_signals:
+                    for obj in objects:
+                        post_save.send(
+                            sender=model_class, instance=obj, created=True, update_fields=None, raw=True,
+                            using=self.using,
+                        )
+                self.insert_m2m_rows(model_class, batch)
+        except (DatabaseError, IntegrityError, ValueError) as e:
+            e.args = (f"Could not load a batch of {len(batch)} {model_class._meta.label} objects: {e}",)
+            raise
+        self.loaded[label] += len(batch)
+
+    def insert_m2m_rows(self, model_class, batch):
+        """
+        Insert the rows of the auto-created many-to-many tables of a batch of objects.
+        """
+        for field in model_class._meta.many_to_many:
+            through = field.remote_field.through
+            if not through._meta.auto_created:
+                continue
+            source_attname = through._meta.get_field(field.m2m_field_name()).attname
+            target_attname = through._meta.get_field(field.m2m_reverse_field_name()).attname
+
+            source_pks = []
+            rows = []
+            for deserialized in batch:
+                targets = (deserialized.m2m_data or {}).get(field.name)
+                if targets is None:
+                    continue
+                source_pks.append(deserialized.object.pk)
+                rows.extend(
+                    through(**{source_attname: deserialized.object.pk, target_attname: target}) for target in targets
+                )
+            if not source_pks:
+                continue
+
+            manager = through._base_manager.using(self.using)
+            if self.conflicts != 'error':
+                # Existing rows get the links of the backup, like the .set() of loaddata
+                manager.filter(**{f'{source_attname}__in': source_pks}).delete()
+            manager.bulk_create(rows, batch_size=self.batch_size)
+
+
+def load_fixture_objects(objects, exclude_models=None, using=DEFAULT_DB_ALIAS, batch_size=DEFAULT_RESTORE_BATCH_SIZE,
+                         bulk=False, conflicts=DEFAULT_RESTORE_CONFLICTS, send_signals=False):
+    """
+    Deserialize and save fixture objects in batches, the way loaddata does.
+
+    Everything is loaded in one transaction with constraint checks disabled,
+    objects are saved with raw=True, forward references are resolved at the
+    end, then constraints are checked and sequences reset.
+
+    Args:
+        objects: Iterable of fixture objects ({'model', 'pk', 'fields'})
+        exclude_models: List of model labels or app labels not to import
+        using: Database alias to load into
+        batch_size: Number of objects deserialized, and inserted per model with bulk, at a time
+        bulk: Insert the objects with bulk_create (see BulkObjectWriter) instead of one save per object
+        conflicts: With bulk, how rows whose primary key already exists are handled (RESTORE_CONFLICT_MODES)
+        send_signals: With bulk, True, False or the model labels pre_save and post_save are sent for
+
+    Returns:
+        Dict mapping model label -> loaded row count
+    """
+    connection = connections[using]
+    excluded = {label.lower() for label in (exclude_models or [])}
+    objects = (
+        obj for obj in objects
+        if obj['model'].lower() not in excluded and obj['model'].split('.')[0].lower() not in excluded
+    )
+
+    loaded = defaultdict(int)
+    loaded_models = set()
+    objects_with_deferred_fields = []
+    writer = BulkObjectWriter(using, batch_size, conflicts, send_signals) if bulk else None
+
+    with transaction.atomic(using=using):
+        with connection.constraint_checks_disabled():
+            while True:
+                batch = list(islice(objects, batch_size))
+                if not batch:
+                    break
+                for deserialized in serializers.deserialize(
+                    'python', batch, using=using, ignorenonexistent=True, handle_forward_references=True,
+                ):
+                    model_class = type(deserialized.object)
+                    if not router.allow_migrate_model(using, model_class):
+                        continue
+                    loaded_models.add(model_class)
+                    if deserialized.deferred_fields:
+                        objects_with_deferred_fields.append(deserialized)
+                    if writer is not None:
+                        writer.add(deserialized)
+                        continue
+                    try:
+                        deserialized.save(using=using)
+                    except (DatabaseError, IntegrityError, ValueError) as e:
+                        e.args = (
+                            f"Could not load {model_class._meta.label}(pk={deserialized.object.pk}): {e}",
+                        )
+                        raise
+                    loaded[model_class._meta.label_lower] += 1
+
+            if writer is not None:
+                writer.flush()
+                loaded = writer.loaded
+
+            for deserialized in objects_with_deferred_fields:
+                deserialized.save_deferred_fields(using=using)
+
+        connection.check_constraints(table_names=[model_class._meta.db_table for model_class in loaded_models])
+
+        # Rows are saved with their primary keys, reset sequences like loaddata does
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), loaded_models):
+                cursor.execute(sql)
+
+    return dict(loaded)
+
+
+def _spool_stream(stream, spool_size=MEDIA_SPOOL_SIZE):
+    """
+    Copy a binary stream into a spooled temporary file.
+
+    Returns:
+        Tuple of (spooled file positioned at its start, size, MD5 hex digest)
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_size)
+    md5 = hashlib.md5()
+    size = 0
+    for chunk in iter(lambda: stream.read(COPY_BUFFER_SIZE), b''):
+        spool.write(chunk)
+        md5.update(chunk)
+        size += len(chunk)
+    spool.seek(0)
+    return spool, size, md5.hexdigest()
+
+
+def _save_media_file(storage_path, open_source, inventory, result, storage):
+    try:
+        with open_source() as source:
+            spool, size, md5 = _spool_stream(source)
+        with spool:
+            if inventory.exists(storage_path):
+                etag = inventory.etag(storage_path)
+                # The ETag of objects uploaded in a single part is the MD5 of their content
+                if inventory.size(storage_path) == size and etag and etag == md5:
+                    result['unchanged'].append(storage_path)
+                    return
+                storage.delete(storage_path)
+            storage.save(storage_path, File(spool))
+        result['restored'].append(storage_path)
+    except Exception as e:
+        result['failed'].append(storage_path)
+        logger.error(f"Failed to restore media file {storage_path}: {e}")
+
+
+def restore_archive_media(zipf, manifest, storage=None):
+    """
+    Stream the media entries of an archive, or the media store blobs it references, into the media storage.
+
+    Files whose stored size and ETag match are left untouched. Files are
+    spooled one at a time, in memory up to MEDIA_SPOOL_SIZE.
+
+    Returns:
+        Dict with 'restored', 'unchanged' and 'failed' file lists
+    """
+    storage = storage or default_storage
+    result = {'restored': [], 'unchanged': [], 'failed': []}
+
+    if manifest.get('media_manifest'):
+        with open_archive_entry(zipf, manifest, manifest['media_manifest']) as stream:
+            media_manifest = loads(stream.read())
+        media_store = MediaStore()
+        sources = {
+            file_path: (lambda sha256=entry['sha256']: media_store.storage.open(get_blob_name(sha256), 'rb'))
+            for file_path, entry in media_manifest.items()
+        }
+    else:
+        member_names = {member: arcname for arcname, member in get_archive_member_names(manifest).items()}
+        sources = {}
+        for member in zipf.namelist():
+            arcname = member_names.get(member, member)
+            if arcname.startswith(ARCHIVE_MEDIA_DIRECTORY) and not arcname.endswith('/'):
+                sources[arcname[len(ARCHIVE_MEDIA_DIRECTORY):]] = (
+                    lambda arcname=arcname: open_archive_entry(zipf, manifest, arcname)
+                )
+
+    if not sources:
+        logger.info("No media files found in backup archive")
+        return result
+
+    # List the target prefixes once instead of checking every file separately
+    inventory = StorageInventory.for_paths(sources.keys(), storage=storage)
+    for storage_path, open_source in sources.items():
+        _save_media_file(storage_path, open_source, inventory, result, storage)
+
+    logger.info(f"Restored {len(result['restored'])} media files, {len(result['unchanged'])} unchanged, "
+                f"{len(result['failed'])} failed")
+    return result
@@ -1,21 +1,57 @@
+import json
 import logging
 from celery import shared_task
 import tempfile
+import time
 import os
-import json
-import zipfile
 import shutil
 from pathlib import Path
-from urllib.parse import urlparse
 from django.conf import settings
 from django.core.files.base import ContentFile, File
 from django.core.files.storage import default_storage
-from django.core.management import call_command
 from django.utils import timezone
 from django.apps import apps
 from django.db import models
 
-from superapp.apps.backups.models.backup import Backup
+from superapp.apps.backups.archive import ARCHIVE_DATA_FILE, ARCHIVE_MEDIA_DIRECTORY, BackupArchiveWriter
+from superapp.apps.backups.compression import CompressionPolicy
+from superapp.apps.backups.engines import get_backup_engine
+from superapp.apps.backups.conf import get_backup_type_option
+from superapp.apps.backups.media import (
+    DEFAULT_INVENTORY_DEPTH,
+    DEFAULT_MEDIA_RETRIES,
+    DEFAULT_MEDIA_RETRY_BACKOFF,
+    DEFAULT_MEDIA_WORKERS,
+    MediaFetcher,
+    MediaTransferStats,
+    StorageInventory,
+    normalize_media_path,
+)
+from superapp.apps.backups.media_store import (
+    MEDIA_BLOB_PREFIX,
+    MEDIA_MANIFEST_FILE,
+    MediaStore,
+    collect_unreferenced_blobs,
+)
+from superapp.apps.backups.incremental import (
+    ARCHIVE_DELETIONS_FILE,
+    IncrementalPlan,
+    choose_parent_backup,
+    get_previous_backup,
+    has_changes_since,
+    is_incremental_backup_type,
+)
+from superapp.apps.backups.instrumentation import get_instrumentation
+from superapp.apps.backups.models.backup import Backup, BackupMode
+from superapp.apps.backups.models.backup_model_state import BackupModelState
+from superapp.apps.backups.sqlite_snapshot import SQLITE_SNAPSHOT_FILE, SqliteSnapshotWriter
+from superapp.apps.backups.stats import PipelineStats
+from superapp.apps.backups.upload import (
+    DEFAULT_UPLOAD_PART_SIZE,
+    DEFAULT_UPLOAD_WORKERS,
+    open_field_file_upload,
+    supports_multipart_upload,
+)
 
 # Conditional imports for multi-tenant support
 try:
@@ -72,23 +108,9 @@ def extract_media_files_from_fixture(fixture_data):
 
                     # Check if it's a FileField or ImageField
                     if isinstance(field, (models.FileField, models.ImageField)):
-                        # Extract the file path (remove any URL prefixes)
-                        if isinstance(field_value, str) and field_value.strip():
-                            # Handle both relative paths and full URLs
-                            if field_value.startswith('http'):
-                                parsed_url = urlparse(field_value)
-                                file_path = parsed_url.path.lstrip('/')
-                            else:
-                                file_path = field_value.lstrip('/')
-
-                            # Remove media URL prefix if present
-                            if hasattr(settings, 'MEDIA_URL') and settings.MEDIA_URL:
-                                media_url = settings.MEDIA_URL.strip('/')
-                                if file_path.startswith(media_url + '/'):
-                                    file_path = file_path[len(media_url) + 1:]
-
-                            if file_path:
-                                media_files.add(file_path)
+                        file_path = normalize_media_path(field_value)
+                        if file_path:
+                            media_files.add(file_path)
 
                 except Exception as e:
                     # Field might not exist or be accessible, skip it
@@ -102,56 +124,85 @@ def extract_media_files_from_fixture(fixture_data):
     return media_files
 
 
-def copy_media_files_to_backup(media_files, backup_dir):
+def copy_media_files_to_backup(media_files, backup_dir, workers=DEFAULT_MEDIA_WORKERS,
+                               max_retries=DEFAULT_MEDIA_RETRIES, retry_backoff=DEFAULT_MEDIA_RETRY_BACKOFF,
+                               inventory=None):
     """
     Copy media files to the backup directory, preserving the directory structure.
     Handles both local filesystem and remote storage (S3, etc.) via Django's storage system.
 
+    Files are fetched concurrently by a bounded thread pool and transient
+    storage errors are retried per file with exponential backoff.
+
     Args:
         media_files: Set of media file paths to copy
         backup_dir: Directory where media files should be copied
+        workers: Number of files copied concurrently
+        max_retries: Number of retries per file on transient errors
+        retry_backoff: Initial retry delay in seconds, doubled on every retry
+        inventory: Optional StorageInventory answering existence checks without storage requests
 
     Returns:
-        Dict with 'copied' and 'missing' file lists
+        Dict with 'copied', 'missing' and 'failed' file lists, plus 'bytes',
+        'duration', 'files_per_second' and 'megabytes_per_second'
     """
-    copied_files = []
-    missing_files = []
-
-    backup_media_dir = Path(backup_dir) / 'media'
-    backup_media_dir.mkdir(parents=True, exist_ok=True)
-
-    for file_path in media_files:
-        dest_path = backup_media_dir / file_path
-
-        try:
-            # Check if file exists in the storage backend (local, S3, etc.)
-            if default_storage.exists(file_path):
-                # Create destination directory if it doesn't exist
-                dest_path.parent.mkdir(parents=True, exist_ok=True)
-
-                # Open the file from storage (works with S3, local, etc.)
-                with default_storage.open(file_path, 'rb') as source_file:
-                    # Write to local backup directory
-                    with open(dest_path, 'wb') as dest_file:
-                        # Copy in chunks to handle large files efficiently
-                        for chunk in iter(lambda: source_file.read(8192), b''):
-                            dest_file.write(chunk)
-
-                copied_files.append(file_path)
-                logger.debug(f"Copied media file from storage: {file_path}")
+    fetcher = MediaFetcher(
+        storage=default_storage,
+        workers=workers,
+        max_retries=max_retries,
+        retry_backoff=retry_backoff,
+        inventory=inventory,
+    )
+    result = fetcher.copy_to_directory(media_files, Path(backup_dir) / 'media')
+    logger.info(f"Media throughput: {result['files_per_second']} files/s, "
+                f"{result['megabytes_per_second']} MB/s")
+    return result
+
+
+def stream_media_files_to_archive(media_files, archive, workers=DEFAULT_MEDIA_WORKERS,
+                                  max_retries=DEFAULT_MEDIA_RETRIES, retry_backoff=DEFAULT_MEDIA_RETRY_BACKOFF,
+                                  inventory=None):
+    """
+    Stream media files from the storage straight into the "media/" folder of the archive.
 
-            else:
-                missing_files.append(file_path)
-                logger.warning(f"Media file not found in storage: {file_path}")
+    Files are fetched and compressed concurrently into bounded spooled
+    temporary files and appended to the archive in sorted order, so the media
+    never has to be staged in a local directory.
 
-        except Exception as e:
-            missing_files.append(file_path)
-            logger.error(f"Error copying media file {file_path}: {e}")
+    Args:
+        media_files: Set of media file paths to copy
+        archive: BackupArchiveWriter receiving the media entries
+        workers: Number of files fetched concurrently
+        max_retries: Number of retries per file on transient errors
+        retry_backoff: Initial retry delay in seconds, doubled on every retry
+        inventory: Optional StorageInventory answering existence checks without storage requests
 
-    return {
-        'copied': copied_files,
-        'missing': missing_files
-    }
+    Returns:
+        Dict with the same keys as copy_media_files_to_backup
+    """
+    fetcher = MediaFetcher(
+        storage=default_storage,
+        workers=workers,
+        max_retries=max_retries,
+        retry_backoff=retry_backoff,
+        inventory=inventory,
+    )
+    stats = MediaTransferStats()
+    # Workers fetch and prepare the files, they are added to the archive in sorted order
+    prepared_entries = fetcher.iter_fetched(
+        sorted(media_files),
+        stats,
+        prepare=lambda file_path, spooled_file: archive.prepare_media_entry(
+            spooled_file, f"{ARCHIVE_MEDIA_DIRECTORY}{file_path}"
+        ),
+    )
+    for file_path, entry in prepared_entries:
+        archive.write_prepared(entry)
+
+    result = stats.as_dict()
+    logger.info(f"Media throughput: {result['files_per_second']} files/s, "
+                f"{result['megabytes_per_second']} MB/s")
+    return result
 
 
 def create_backup_archive(json_file_path, backup_dir, archive_name):
@@ -168,35 +219,219 @@ def create_backup_archive(json_file_path, backup_dir, archive_name):
     """
     archive_path = Path(backup_dir) / f"{archive_name}.zip"
 
-    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+    with BackupArchiveWriter(archive_path) as archive:
         # Add the JSON file to the root of the archive with standardized name
-        zipf.write(json_file_path, "backup.json")
+        archive.write_file(json_file_path, ARCHIVE_DATA_FILE)
 
         # Add all media files in a "media" folder within the archive
-        media_dir = Path(backup_dir) / 'media'
-        if media_dir.exists():
-            for file_path in media_dir.rglob('*'):
-                if file_path.is_file():
-                    # Calculate relative path from media directory
-                    relative_path = file_path.relative_to(media_dir)
-                    # Ensure all media files are placed inside "media/" folder in the archive
-                    archive_media_path = f"media/{relative_path}"
-                    zipf.write(file_path, archive_media_path)
-                    logger.debug(f"Added to archive: {archive_media_path}")
+        archive.write_media_directory(Path(backup_dir) / 'media')
 
         # Add a manifest file with backup information
-        manifest = {
-            'backup_type': 'data_with_media',
-            'created_at': timezone.now().isoformat(),
-            'json_file': "backup.json",
-            'media_directory': 'media/',
-            'format_version': '1.0'
+        archive.write_manifest()
+
+    return archive_path
+
+
+def mark_backup_unchanged(backup, tenant=None):
+    """
+    Mark a backup as unchanged if no model changed since the previous backup of its type.
+
+    The model fingerprints recorded for the previous backup are compared with
+    the current ones. Unchanged backups get no archive of their own, they point
+    at the archive of the previous backup.
+
+    Returns:
+        True if the backup was marked as unchanged
+    """
+    previous = get_previous_backup(backup)
+    if previous is None or not previous.file:
+        return False
+
+    engine = get_backup_engine(backup.type, tenant=tenant)
+    if has_changes_since(previous, engine.get_models(), tenant=tenant, using=engine.using):
+        return False
+
+    backup.mode = BackupMode.UNCHANGED
+    backup.parent = previous
+    backup.file.name = previous.file.name
+    backup.finished_at = timezone.now()
+    backup.done = True
+    backup.save(update_fields=['mode', 'parent', 'file', 'finished_at', 'done'])
+    logger.info(f"Nothing changed since backup {previous.pk}, marked backup {backup.pk} as unchanged")
+    return True
+
+
+def get_backup_archive_name(backup_type, timestamp, tenant=None):
+    """
+    Get the archive name (without extension) of a backup taken at the given time.
+    """
+    if MULTI_TENANT_ENABLED and tenant:
+        return f'backup_{tenant.pk}_{backup_type}_{timestamp.strftime("%Y%m%d_%H%M%S")}'
+    return f'backup_{backup_type}_{timestamp.strftime("%Y%m%d_%H%M%S")}'
+
+
+def build_backup_archive(backup_type, archive_file, work_dir, tenant=None, backup=None, stats=None):
+    """
+    Build a backup archive using the engine configured for the backup type.
+
+    The engine writes the data entry straight into the archive, then the
+    referenced media files are collected and added next to it.
+
+    Args:
+        backup_type: The backup type from BACKUPS.BACKUP_TYPES settings
+        archive_file: Path where the zip archive is created, or a writable binary stream
+        work_dir: Temporary directory used to stage media files when 'stream_media' is disabled
+        tenant: Optional tenant object for multi-tenant setups
+        backup: The Backup being built, required to link its media files with the 'media_store' option
+        stats: Optional PipelineStats receiving the phase durations and data volumes
+
+    Returns:
+        Dict with 'models' (model label -> row count), 'media_stats', 'compression_stats' and 'stats'
+    """
+    stats = stats or PipelineStats()
+    engine = get_backup_engine(backup_type, tenant=tenant)
+    engine.stats = stats
+    logger.info(f"Creating backup archive of type {backup_type} with the {engine.name} engine")
+
+    # Incremental backups only dump the rows changed since their parent backup, the recorded
+    # model states are also what unchanged backups are detected with
+    incremental_plan = None
+    model_states = []
+    incremental_entries = {}
+    track_changes = is_incremental_backup_type(backup_type) or get_backup_type_option(backup_type, 'skip_unchanged', False)
+    if backup is not None and track_changes:
+        parent = choose_parent_backup(backup)
+        if parent is not None and not engine.supports_incremental:
+            logger.warning(f"The {engine.name} engine cannot dump incremental backups, taking a full backup")
+            parent = None
+        incremental_plan = IncrementalPlan(backup_type, parent=parent, tenant=tenant, using=engine.using)
+        model_classes = engine.get_models()
+        model_states = incremental_plan.capture_states(model_classes)
+        engine.row_filters = incremental_plan.get_row_filters(model_classes)
+        backup.mode = BackupMode.INCREMENTAL if parent is not None else BackupMode.FULL
+        backup.parent = parent
+        if parent is not None:
+            incremental_entries = {'mode': backup.mode, 'parent_backup_id': parent.pk}
+        logger.info(f"Taking {backup.mode} backup" + (f" based on backup {parent.pk}" if parent else ""))
+
+    # Rows are also collected into an indexed SQLite database for lookups without a full restore
+    snapshot_entries = {}
+    if get_backup_type_option(backup_type, 'sqlite_snapshot', False):
+        if engine.supports_sqlite_snapshot:
+            engine.sqlite_snapshot = SqliteSnapshotWriter(str(Path(work_dir) / SQLITE_SNAPSHOT_FILE))
+        else:
+            logger.warning(f"The {engine.name} engine cannot build a SQLite snapshot, skipping it")
+
+    policy = CompressionPolicy.for_backup_type(backup_type)
+    with BackupArchiveWriter(archive_file, policy=policy) as archive:
+        with stats.phase('dump'):
+            dump_result = engine.dump(archive)
+
+        if engine.sqlite_snapshot is not None:
+            engine.sqlite_snapshot.close()
+            # Stored uncompressed, so extracting it is a plain copy
+            with open(engine.sqlite_snapshot.path, 'rb') as snapshot_file:
+                archive.write_stored_file(snapshot_file, SQLITE_SNAPSHOT_FILE)
+            os.unlink(engine.sqlite_snapshot.path)
+            snapshot_entries = {'sqlite_snapshot': SQLITE_SNAPSHOT_FILE}
+
+        if incremental_plan is not None and incremental_plan.parent is not None:
+            deletions = incremental_plan.get_deletions(model_classes)
+            with archive.open_entry(ARCHIVE_DELETIONS_FILE) as entry:
+                entry.write(json.dumps(deletions).encode('utf-8'))
+            incremental_entries['deletions'] = ARCHIVE_DELETIONS_FILE
+            logger.info(f"Recorded {sum(len(pks) for pks in deletions.values())} deleted rows")
+
+        media_files = dump_result['media_files']
+        logger.info(f"Found {len(media_files)} media files referenced in backup")
+        media_started = time.monotonic()
+
+        # List the media prefixes once instead of checking every file separately
+        inventory = None
+        if media_files and get_backup_type_option(backup_type, 'media_inventory', True):
+            inventory = StorageInventory.for_paths(
+                media_files,
+                storage=default_storage,
+                depth=get_backup_type_option(backup_type, 'media_inventory_depth', DEFAULT_INVENTORY_DEPTH),
+            )
+
+        media_options = {
+            'workers': get_backup_type_option(backup_type, 'media_workers', DEFAULT_MEDIA_WORKERS),
+            'max_retries': get_backup_type_option(backup_type, 'media_retries', DEFAULT_MEDIA_RETRIES),
+            'retry_backoff': get_backup_type_option(backup_type, 'media_retry_backoff', DEFAULT_MEDIA_RETRY_BACKOFF),
+            'inventory': inventory,
         }
+        use_media_store = get_backup_type_option(backup_type, 'media_store', False)
+        if use_media_store and backup is None:
+            logger.warning("The media store needs a backup record, adding media files to the archive instead")
+            use_media_store = False
+
+        media_manifest_entries = {}
+        media_descriptions = None
+        if use_media_store:
+            # Only a manifest of content-addressed blobs goes into the archive
+            media_manifest, media_copy_result = MediaStore().store_media_files(
+                backup,
+                media_files,
+                MediaFetcher(storage=default_storage, **media_options),
+                inventory=inventory,
+            )
+            with archive.open_entry(MEDIA_MANIFEST_FILE) as entry:
+                entry.write(json.dumps(media_manifest, indent=2).encode('utf-8'))
+            media_manifest_entries = {'media_manifest': MEDIA_MANIFEST_FILE, 'media_store': MEDIA_BLOB_PREFIX}
+            media_descriptions = media_manifest
+        elif get_backup_type_option(backup_type, 'stream_media', True):
+            media_copy_result = stream_media_files_to_archive(media_files, archive, **media_options)
+        else:
+            # Stage media files in the work directory, then add them to the archive
+            media_copy_result = copy_media_files_to_backup(media_files, work_dir, **media_options)
+            archive.write_media_directory(Path(work_dir) / 'media')
+        stats.add_duration('media', time.monotonic() - media_started)
+
+        logger.info(f"Copied {len(media_copy_result['copied'])} media files, "
+                   f"{len(media_copy_result['missing'])} files were missing, "
+                   f"{len(media_copy_result['failed'])} failed")
+        archive.write_manifest(
+            row_counts=dump_result['models'],
+            schemas={
+                label: engine.get_schema_fingerprint(apps.get_model(label))
+                for label in dump_result['models']
+            },
+            media=media_descriptions,
+            engine=engine.name,
+            tenant_id=tenant.pk if tenant else None,
+            **media_manifest_entries,
+            **snapshot_entries,
+            **incremental_entries,
+            **dump_result.get('manifest', {})
+        )
 
-        manifest_json = json.dumps(manifest, indent=2)
-        zipf.writestr('backup_manifest.json', manifest_json)
+    if incremental_plan is not None:
+        backup.save(update_fields=['mode', 'parent'])
+        BackupModelState.objects.filter(backup=backup).delete()
+        for state in model_states:
+            state.backup = backup
+            state.row_count = dump_result['models'].get(state.model, 0)
+        BackupModelState.objects.bulk_create(model_states)
+
+    compression_stats = archive.compression_stats.as_dict()
+    logger.info(f"Compression used {compression_stats['cpu_seconds']}s of CPU time "
+                f"(data: {policy.data_codec}, media: {policy.media_codec}, entries: {compression_stats['entries']})")
+
+    stats.add_duration('compress', compression_stats['cpu_seconds'])
+    stats.add_rows(dump_result['models'])
+    stats.add_bytes(
+        bytes_in=sum(entry['size'] for entry in archive.entries.values()),
+        bytes_out=sum(entry['compressed_size'] for entry in archive.entries.values()),
+    )
+    stats.add_media(media_copy_result)
 
-    return archive_path
+    return {
+        'models': dump_result['models'],
+        'media_stats': media_copy_result,
+        'compression_stats': compression_stats,
+        'stats': stats,
+    }
 
 
 def get_models_for_backup_type(backup_type):
@@ -318,85 +553,57 @@ def process_backup(self, backup_pk):
         backup.started_at = timezone.now()
         backup.save(update_fields=['started_at'])
 
-        # Get models to backup based on backup type
-        models_to_backup = get_models_for_backup_type(backup.type)
-
-        # If models_to_backup is '*', backup all models
-        if models_to_backup == '*':
-            # Get all installed models
-            args = []
-            for app_config in apps.get_app_configs():
-                for model in app_config.get_models():
-                    model_name = f"{model._meta.app_label}.{model._meta.model_name}"
-                    args.append(model_name)
-        else:
-            # Use the specific models defined in the backup type
-            args = models_to_backup
-
-        print(args)
-
-        # Create a temporary directory for the backup process
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_file_path = os.path.join(temp_dir, 'backup.json')
-
-            # Set up options for the dumpdata command
-            options = {
-                'output': temp_file_path,
-                'format': 'json',
-                'indent': 2,
-                'database': 'default',
-            }
-
-            # If multi-tenant is enabled and we have a tenant, use tenant-specific commands
-            if MULTI_TENANT_ENABLED and tenant:
-                options['tenant_pk'] = tenant.pk
-                call_command('tenant_dumpdata', *args, **options)
+        if get_backup_type_option(backup.type, 'skip_unchanged', False) and mark_backup_unchanged(backup, tenant):
+            unset_current_tenant()
+            return backup.pk
+
+        stats = PipelineStats()
+        instrumentation = get_instrumentation()
+
+        # Create a temporary directory for the backup process, the stages are traced as children of the 'backup' span
+        with instrumentation.span('backup', backup_id=backup.pk, backup_type=backup.type), \
+                tempfile.TemporaryDirectory() as temp_dir:
+            if (get_backup_type_option(backup.type, 'multipart_upload', True)
+                    and supports_multipart_upload(backup.file.storage)):
+                # Upload the archive while it is being built, no local copy is written.
+                # The name has to be known up front, so it uses the start time.
+                archive_name = get_backup_archive_name(backup.type, backup.started_at, tenant)
+                with open_field_file_upload(
+                    backup.file,
+                    f'{archive_name}.zip',
+                    part_size=get_backup_type_option(backup.type, 'upload_part_size', DEFAULT_UPLOAD_PART_SIZE),
+                    workers=get_backup_type_option(backup.type, 'upload_workers', DEFAULT_UPLOAD_WORKERS),
+                ) as upload:
+                    build_result = build_backup_archive(
+                        backup.type, upload, temp_dir, tenant=tenant, backup=backup, stats=stats
+                    )
+                    # Parts are uploaded while the archive is built, only waiting for the last ones is counted
+                    upload_started = time.monotonic()
+                stats.add_duration('upload', time.monotonic() - upload_started)
+                backup.file.name = upload.name
+                backup.finished_at = timezone.now()
             else:
-                call_command('dumpdata', *args, **options)
-
-            # Read the generated JSON file to extract media file references
-            with open(temp_file_path, 'r') as f:
-                fixture_data = json.load(f)
-
-            # Get excluded fields configuration and filter the fixture data
-            excluded_fields = get_excluded_fields_for_backup_type(backup.type)
-            if excluded_fields:
-                logger.info(f"Applying field exclusions: {excluded_fields}")
-                fixture_data = filter_excluded_fields_from_fixture(fixture_data, excluded_fields)
-                
-                # Write the filtered data back to the file
-                with open(temp_file_path, 'w') as f:
-                    json.dump(fixture_data, f, indent=2)
-
-            # Extract media files referenced in the fixture
-            media_files = extract_media_files_from_fixture(fixture_data)
-            logger.info(f"Found {len(media_files)} media files referenced in backup")
-
-            # Copy media files to backup directory
-            media_copy_result = copy_media_files_to_backup(media_files, temp_dir)
-            logger.info(f"Copied {len(media_copy_result['copied'])} media files, "
-                       f"{len(media_copy_result['missing'])} files were missing")
-
-            # Create backup filename
-            backup.finished_at = timezone.now()
-            if MULTI_TENANT_ENABLED and tenant:
-                archive_name = f'backup_{tenant.pk}_{backup.type}_{backup.finished_at.strftime("%Y%m%d_%H%M%S")}'
-            else:
-                archive_name = f'backup_{backup.type}_{backup.finished_at.strftime("%Y%m%d_%H%M%S")}'
+                archive_path = os.path.join(temp_dir, 'backup.zip')
+                build_result = build_backup_archive(
+                    backup.type, archive_path, temp_dir, tenant=tenant, backup=backup, stats=stats
+                )
 
-            # Create zip archive with JSON data and media files
-            archive_path = create_backup_archive(temp_file_path, temp_dir, archive_name)
+                # Create backup filename
+                backup.finished_at = timezone.now()
+                archive_name = get_backup_archive_name(backup.type, backup.finished_at, tenant)
 
-            # Save the zip archive as the backup file
-            with open(archive_path, 'rb') as archive_file:
-                backup.file.save(
-                    name=f'{archive_name}.zip',
-                    content=File(archive_file),
-                    save=True
-                )
+                # Save the zip archive as the backup file
+                with stats.phase('upload'), open(archive_path, 'rb') as archive_file:
+                    backup.file.save(
+                        name=f'{archive_name}.zip',
+                        content=File(archive_file),
+                        save=True
+                    )
+            media_copy_result = build_result['media_stats']
 
             backup.done = True
-            backup.save(update_fields=['file', 'done', 'finished_at'])
+            backup.stats = stats.as_dict()
+            backup.save(update_fields=['file', 'done', 'finished_at', 'stats'])
 
             # Log backup statistics
             logger.info(f"Backup completed: {archive_name}.zip")
@@ -404,6 +611,8 @@ def process_backup(self, backup_pk):
                        f"{len(media_copy_result['missing'])} missing")
             if media_copy_result['missing']:
                 logger.warning(f"Missing media files: {media_copy_result['missing']}")
+            if media_copy_result['failed']:
+                logger.warning(f"Failed media files: {media_copy_result['failed']}")
 
             # Cleanup old backups after successful backup creation
             try:
@@ -498,9 +707,16 @@ def cleanup_old_backups_for_type(backup_type):
 
             logger.info(f"Found {total_backups} backups, will delete {delete_count} old backups")
 
-            # Delete old backup files and records
+            # Delete old backup files and records, newest first so incremental children go before their parents
+            delete_count = 0
             for backup in backups_to_delete:
-                if backup.file:
+                if Backup.objects.filter(parent=backup).exists():
+                    logger.info(f"Keeping backup {backup.name}, a retained incremental backup is based on it")
+                    continue
+
+                # Unchanged backups share the archive of the backup they point at
+                shares_file = Backup.objects.filter(file=backup.file.name).exclude(pk=backup.pk).exists()
+                if backup.file and not shares_file:
                     try:
                         backup.file.delete(save=False)
                         logger.info(f"Deleted backup file: {backup.file.name}")
@@ -508,9 +724,13 @@ def cleanup_old_backups_for_type(backup_type):
                         logger.warning(f"Could not delete backup file {backup.file.name}: {e}")
 
                 backup.delete()
+                delete_count += 1
                 logger.info(f"Deleted backup record: {backup.name}")
 
             logger.info(f"Cleanup completed. Deleted {delete_count} old backups")
+
+            # Media blobs only referenced by the deleted backups are not needed anymore
+            collect_unreferenced_blobs()
             return delete_count
         else:
             logger.info(f"No cleanup needed. Found {total_backups} backups, limit is {max_backups}")
@@ -557,79 +777,20 @@ def create_backup_synchronously(backup_type, target_file_path=None, tenant=None)
         backup.started_at = timezone.now()
         backup.save(update_fields=['started_at'])
 
-        # Get models to backup based on backup type
-        models_to_backup = get_models_for_backup_type(backup_type)
-
-        # If models_to_backup is '*', backup all models
-        if models_to_backup == '*':
-            args = []
-            for app_config in apps.get_app_configs():
-                for model in app_config.get_models():
-                    model_name = f"{model._meta.app_label}.{model._meta.model_name}"
-                    args.append(model_name)
-        else:
-            args = models_to_backup
-
-        logger.info(f"Backing up models: {args}")
-
         # Create a temporary directory for the backup process
         with tempfile.TemporaryDirectory() as temp_dir:
-            temp_file_path = os.path.join(temp_dir, 'backup.json')
-
-            # Set up options for the dumpdata command
-            options = {
-                'output': temp_file_path,
-                'format': 'json',
-                'indent': 2,
-                'database': 'default',
-            }
-
-            # If multi-tenant is enabled and we have a tenant, use tenant-specific commands
-            if MULTI_TENANT_ENABLED and tenant:
-                options['tenant_pk'] = tenant.pk
-                call_command('tenant_dumpdata', *args, **options)
-            else:
-                call_command('dumpdata', *args, **options)
-
-            # Read the generated JSON file to extract media file references
-            with open(temp_file_path, 'r') as f:
-                fixture_data = json.load(f)
-
-            # Get excluded fields configuration and filter the fixture data
-            excluded_fields = get_excluded_fields_for_backup_type(backup_type)
-            if excluded_fields:
-                logger.info(f"Applying field exclusions: {excluded_fields}")
-                fixture_data = filter_excluded_fields_from_fixture(fixture_data, excluded_fields)
-                
-                # Write the filtered data back to the file
-                with open(temp_file_path, 'w') as f:
-                    json.dump(fixture_data, f, indent=2)
-
-            # Extract media files referenced in the fixture
-            media_files = extract_media_files_from_fixture(fixture_data)
-            logger.info(f"Found {len(media_files)} media files referenced in backup")
-
-            # Copy media files to backup directory
-            media_copy_result = copy_media_files_to_backup(media_files, temp_dir)
-            logger.info(f"Copied {len(media_copy_result['copied'])} media files, "
-                       f"{len(media_copy_result['missing'])} files were missing")
+            archive_path = os.path.join(temp_dir, 'backup.zip')
+            build_result = build_backup_archive(backup_type, archive_path, temp_dir, tenant=tenant, backup=backup)
+            media_copy_result = build_result['media_stats']
+            stats = build_result['stats']
 
             # Create backup filename
             backup.finished_at = timezone.now()
-            if MULTI_TENANT_ENABLED and tenant:
-                archive_name = f'backup_{tenant.pk}_{backup.type}_{backup.finished_at.strftime("%Y%m%d_%H%M%S")}'
-            else:
-                archive_name = f'backup_{backup.type}_{backup.finished_at.strftime("%Y%m%d_%H%M%S")}'
-
-            # Create zip archive with JSON data and media files
-            archive_path = create_backup_archive(temp_file_path, temp_dir, archive_name)
+            archive_name = get_backup_archive_name(backup.type, backup.finished_at, tenant)
 
             # Save to target file path if specified
             final_file_path = None
             if target_file_path:
-                import shutil
-                from pathlib import Path
-
                 # Create target directory if it doesn't exist
                 target_path = Path(target_file_path)
                 target_dir = target_path.parent
@@ -641,7 +802,7 @@ def create_backup_synchronously(backup_type, target_file_path=None, tenant=None)
                 final_file_path = target_file_path
 
             # Save the zip archive as the backup file for record keeping
-            with open(archive_path, 'rb') as archive_file:
+            with stats.phase('upload'), open(archive_path, 'rb') as archive_file:
                 backup.file.save(
                     name=f'{archive_name}.zip',
                     content=File(archive_file),
@@ -649,7 +810,8 @@ def create_backup_synchronously(backup_type, target_file_path=None, tenant=None)
                 )
 
             backup.done = True
-            backup.save(update_fields=['file', 'done', 'finished_at'])
+            backup.stats = stats.as_dict()
+            backup.save(update_fields=['file', 'done', 'finished_at', 'stats'])
 
             # Log backup statistics
             logger.info(f"Backup completed: {archive_name}.zip")
@@ -657,6 +819,8 @@ def create_backup_synchronously(backup_type, target_file_path=None, tenant=None)
                        f"{len(media_copy_result['missing'])} missing")
             if media_copy_result['missing']:
                 logger.warning(f"Missing media files: {media_copy_result['missing']}")
+            if media_copy_result['failed']:
+                logger.warning(f"Failed media files: {media_copy_result['failed']}")
 
             # Cleanup old backups after successful backup creation
             try:
@@ -673,7 +837,9 @@ def create_backup_synchronously(backup_type, target_file_path=None, tenant=None)
             'backup_id': backup.id,
             'file_path': final_file_path or backup.file.path,
             'archive_path': str(archive_path),
-            'media_stats': media_copy_result
+            'media_stats': media_copy_result,
+            'compression_stats': build_result['compression_stats'],
+            'stats': backup.stats,
         }
 
     except Exception as exc:
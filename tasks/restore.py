@@ -1,10 +1,11 @@
+import hashlib
 import json
 import logging
 import os
 import shutil
 import tempfile
+import time
 import zipfile
-from collections import defaultdict
 from pathlib import Path
 
 from celery import shared_task
@@ -14,10 +15,42 @@ from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.core.management import call_command
 from django.db import transaction, DEFAULT_DB_ALIAS
-from django.db.models import ForeignKey
 from django.utils import timezone
 
+from superapp.apps.backups.archive import (
+    ARCHIVE_DATA_FILE,
+    ARCHIVE_MANIFEST_FILE,
+    extract_archive,
+    read_archive_manifest,
+)
+from superapp.apps.backups.cleanup import DEFAULT_CLEANUP_STRATEGY, delete_existing_rows
+from superapp.apps.backups.conf import get_backup_type_option
+from superapp.apps.backups.dependency_graph import get_delete_order, get_load_order, get_restore_plan
+from superapp.apps.backups.engines.base import get_schema_fingerprint
+from superapp.apps.backups.engines.parquet import load_parquet_tables
+from superapp.apps.backups.engines.postgres_copy import load_copy_tables
+from superapp.apps.backups.incremental import get_backup_chain
+from superapp.apps.backups.instrumentation import get_instrumentation
+from superapp.apps.backups.media import DEFAULT_MEDIA_WORKERS, StorageInventory
+from superapp.apps.backups.media_store import MediaStore
 from superapp.apps.backups.models.restore import Restore
+from superapp.apps.backups.parallel_restore import (
+    DEFAULT_RESTORE_WORKERS,
+    get_restore_workers,
+    run_restore_waves,
+)
+from superapp.apps.backups.serializers import loads
+from superapp.apps.backups.stats import PipelineStats
+from superapp.apps.backups.streaming_restore import (
+    DEFAULT_RESTORE_BATCH_SIZE,
+    DEFAULT_RESTORE_CONFLICTS,
+    get_archive_member_names,
+    iter_archive_objects,
+    iter_json_array,
+    load_fixture_objects,
+    open_archive_entry,
+    restore_archive_media,
+)
 
 # Conditional imports for multi-tenant support
 try:
@@ -35,126 +68,256 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# 'loaddata' extracts the archive and runs loaddata, 'streaming' reads the data straight from the archive
+RESTORE_ENGINES = ('loaddata', 'streaming')
+DEFAULT_RESTORE_ENGINE = 'loaddata'
+
 
-def extract_backup_archive(archive_path, extract_dir):
+def extract_backup_archive(archive_path, extract_dir, exclude_models=None):
     """
     Extract a backup ZIP archive and return the path to the JSON file.
 
     Args:
         archive_path: Path to the ZIP archive
         extract_dir: Directory to extract files to
+        exclude_models: List of model labels not to import, their data entries are not extracted
 
     Returns:
-        Path to the extracted JSON backup file
+        Path to the extracted JSON backup file, or None for archives made of
+        per-model entries or COPY tables (see read_backup_manifest)
     """
-    with zipfile.ZipFile(archive_path, 'r') as zipf:
-        # Extract all files
-        zipf.extractall(extract_dir)
-        logger.info(f"Extracted backup archive to {extract_dir}")
+    # Extract all files, zstd compressed data entries are decompressed to their original names
+    skip_entries = get_excluded_entries(read_archive_manifest(archive_path), exclude_models)
+    extract_archive(archive_path, extract_dir, skip_entries=skip_entries)
+    logger.info(f"Extracted backup archive to {extract_dir}"
+                + (f", skipped {len(skip_entries)} entries of excluded models" if skip_entries else ""))
 
     # Return path to the standardized JSON file
-    json_file_path = Path(extract_dir) / "backup.json"
+    json_file_path = Path(extract_dir) / ARCHIVE_DATA_FILE
     if not json_file_path.exists():
+        manifest = read_backup_manifest(extract_dir)
+        if manifest.get('tables') or ('json_file' in manifest and manifest['json_file'] is None):
+            return None
         raise FileNotFoundError(f"backup.json not found in archive at {json_file_path}")
 
     return str(json_file_path)
 
 
-def restore_media_files_after_loaddata(extract_dir, backup_data):
+def get_excluded_entries(manifest, exclude_models=None):
+    """
+    Get the data entries of an archive only holding rows of excluded models.
+    """
+    excluded = {label.lower() for label in (exclude_models or [])}
+    if not excluded:
+        return set()
+    entries = {segment['entry'] for segment in manifest.get('data_segments', []) if segment['model'] in excluded}
+    entries.update(
+        table['entry'] for table in manifest.get('tables', []) + manifest.get('parquet_tables', [])
+        if table['model'] in excluded or table.get('m2m_of') in excluded
+    )
+    return entries
+
+
+def iter_fixture_objects(fixture_paths):
+    """
+    Yield the objects of fixture files one at a time.
+
+    JSON lines fixtures are read one row at a time, JSON fixtures are parsed incrementally.
+    """
+    for path in fixture_paths:
+        with open(path, 'rb') as f:
+            if str(path).endswith('.jsonl'):
+                for line in f:
+                    if line.strip():
+                        yield loads(line)
+            else:
+                yield from iter_json_array(f)
+
+
+def read_backup_manifest(extract_dir):
+    """
+    Read the manifest of an extracted archive.
+
+    Args:
+        extract_dir: Directory where archive was extracted
+
+    Returns:
+        The parsed manifest, or an empty dict for archives without a manifest
+    """
+    manifest_path = Path(extract_dir) / ARCHIVE_MANIFEST_FILE
+    if not manifest_path.exists():
+        return {}
+
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+
+def check_backup_schema(manifest, backup_type):
+    """
+    Compare the schema fingerprints of a format version 2 manifest with the current models.
+
+    Args:
+        manifest: Parsed backup manifest
+        backup_type: The backup type used to read the excluded fields
+
+    Returns:
+        List of labels of the models whose fields changed since the backup
+    """
+    excluded_fields = get_backup_type_option(backup_type, 'exclude_fields', {}) or {}
+    changed = []
+    for label, model_manifest in manifest.get('models', {}).items():
+        if not model_manifest.get('schema'):
+            continue
+        try:
+            model_class = apps.get_model(label)
+        except LookupError:
+            changed.append(label)
+            continue
+        if get_schema_fingerprint(model_class, excluded_fields.get(label, [])) != model_manifest['schema']:
+            changed.append(label)
+
+    if changed:
+        logger.warning(f"The fields of these models changed since the backup was taken: {', '.join(changed)}")
+    return changed
+
+
+def get_backup_fixture_paths(extract_dir, json_file_path, exclude_models=None):
     """
-    Restore media files from extracted archive and update file fields in the database.
-    This should be called AFTER loaddata commands to ensure proper field updates.
+    Get all fixture files of an extracted archive in load order.
+
+    The main backup.json comes first, followed by the data segments listed in
+    the manifest (per-model JSON lines entries and primary key partitions of
+    large models) with referenced models first. Segments of excluded models
+    are left out.
 
     Args:
         extract_dir: Directory where archive was extracted
-        backup_data: Parsed JSON backup data to identify file fields
+        json_file_path: Path to the extracted backup.json file
+        exclude_models: List of model labels not to import
 
     Returns:
-        Dict with 'restored' and 'failed' file lists
+        List of fixture file paths
+    """
+    fixture_paths = [json_file_path] if json_file_path else []
+
+    manifest = read_backup_manifest(extract_dir)
+    excluded_entries = get_excluded_entries(manifest, exclude_models)
+    for segment in get_segments_in_load_order(manifest):
+        if segment['entry'] in excluded_entries:
+            continue
+        segment_path = Path(extract_dir) / segment['entry']
+        if not segment_path.exists():
+            raise FileNotFoundError(f"Data segment {segment['entry']} not found in archive")
+        fixture_paths.append(str(segment_path))
+
+    if manifest.get('data_segments'):
+        logger.info(f"Archive contains {len(manifest['data_segments'])} data segments")
+    return fixture_paths
+
+
+def fetch_media_store_files(extract_dir, manifest, workers=DEFAULT_MEDIA_WORKERS):
+    """
+    Download the media blobs referenced by the media manifest of an archive into its media directory.
+
+    Archives built with the 'media_store' option do not contain media files,
+    once fetched they are restored like the media of any other archive.
+
+    Args:
+        extract_dir: Directory where archive was extracted
+        manifest: Parsed backup manifest
+        workers: Number of media blobs downloaded concurrently
+
+    Returns:
+        Dict with 'copied' and 'failed' file lists, or None if the archive has no media manifest
+    """
+    if not manifest.get('media_manifest'):
+        return None
+
+    with open(Path(extract_dir) / manifest['media_manifest'], 'r') as f:
+        media_manifest = json.load(f)
+
+    logger.info(f"Fetching {len(media_manifest)} media files from the media store")
+    result = MediaStore().fetch_to_directory(media_manifest, Path(extract_dir) / 'media', workers=workers)
+    if result['failed']:
+        logger.warning(f"Failed to fetch media files from the media store: {result['failed']}")
+    return result
+
+
+def restore_media_files_after_loaddata(extract_dir):
+    """
+    Restore media files from extracted archive into the default storage.
+    Files keep their original paths, so the restored file fields point at them without being updated.
+
+    Args:
+        extract_dir: Directory where archive was extracted
+
+    Returns:
+        Dict with 'restored', 'unchanged' and 'failed' file lists
     """
     restored_files = []
+    unchanged_files = []
     failed_files = []
 
     media_dir = Path(extract_dir) / 'media'
     if not media_dir.exists():
         logger.info("No media directory found in backup archive")
-        return {'restored': [], 'failed': [],}
+        return {'restored': [], 'unchanged': [], 'failed': [],}
 
-    # First, restore all media files to storage
-    logger.info("Restoring media files to storage...")
+    media_files = {}
     for file_path in media_dir.rglob('*'):
         if file_path.is_file():
             # Calculate relative path from media directory
             relative_path = file_path.relative_to(media_dir)
             storage_path = str(relative_path).replace('\\', '/')  # Ensure forward slashes
+            media_files[storage_path] = file_path
 
-            try:
-                # Read the file content
-                with open(file_path, 'rb') as f:
-                    file_content = f.read()
+    # List the target prefixes once instead of checking every file separately
+    inventory = StorageInventory.for_paths(media_files.keys(), storage=default_storage)
 
-                # Save to Django storage (handles local, S3, etc.)
-                if default_storage.exists(storage_path):
-                    # Delete existing file first
-                    default_storage.delete(storage_path)
+    # First, restore all media files to storage
+    logger.info("Restoring media files to storage...")
+    for storage_path, file_path in media_files.items():
+        try:
+            # Read the file content
+            with open(file_path, 'rb') as f:
+                file_content = f.read()
 
-                default_storage.save(storage_path, ContentFile(file_content))
-                restored_files.append(storage_path)
-                logger.debug(f"Restored media file: {storage_path}")
+            # Save to Django storage (handles local, S3, etc.)
+            if inventory.exists(storage_path):
+                if _is_stored_file_unchanged(inventory, storage_path, file_content):
+                    unchanged_files.append(storage_path)
+                    logger.debug(f"Media file is unchanged in storage: {storage_path}")
+                    continue
 
-            except Exception as e:
-                failed_files.append(storage_path)
-                logger.error(f"Failed to restore media file {storage_path}: {e}")
+                # Delete existing file first
+                default_storage.delete(storage_path)
 
-    # Second, update file fields in database objects
-    logger.info("Updating file fields in database objects...")
-    file_field_references = _extract_file_field_references(backup_data)
+            default_storage.save(storage_path, ContentFile(file_content))
+            restored_files.append(storage_path)
+            logger.debug(f"Restored media file: {storage_path}")
 
-    logger.info(f"Restored {len(restored_files)} media files, {len(failed_files)} failed")
+        except Exception as e:
+            failed_files.append(storage_path)
+            logger.error(f"Failed to restore media file {storage_path}: {e}")
+
+    logger.info(f"Restored {len(restored_files)} media files, {len(unchanged_files)} unchanged, "
+                f"{len(failed_files)} failed")
     return {
         'restored': restored_files,
+        'unchanged': unchanged_files,
         'failed': failed_files,
     }
 
 
-def _extract_file_field_references(backup_data):
+def _is_stored_file_unchanged(inventory, storage_path, file_content):
     """
-    Extract file field references from backup data.
-
-    Args:
-        backup_data: Parsed JSON backup data
-
-    Returns:
-        Dict mapping model_name -> {pk: {field_name: file_path}}
+    Check whether a stored object already holds the given content, using the
+    listed size and ETag (the MD5 of objects uploaded in a single part).
     """
-    file_field_references = defaultdict(lambda: defaultdict(dict))
-
-    for obj_data in backup_data:
-        model_name = obj_data['model']
-        pk = obj_data['pk']
-        fields = obj_data['fields']
-
-        try:
-            app_label, model_class_name = model_name.split('.')
-            model_class = apps.get_model(app_label, model_class_name)
-
-            # Check each field to see if it's a file field
-            for field_name, field_value in fields.items():
-                try:
-                    field = model_class._meta.get_field(field_name)
-                    # Check if it's a FileField or ImageField
-                    if hasattr(field, 'upload_to') and field_value:
-                        file_field_references[model_name][pk][field_name] = field_value
-                        logger.debug(f"Found file field: {model_name}[{pk}].{field_name} = {field_value}")
-                except Exception:
-                    # Field doesn't exist or isn't a file field, skip
-                    continue
-
-        except (ValueError, LookupError):
-            # Model doesn't exist, skip
-            continue
-
-    return file_field_references
+    if inventory.size(storage_path) != len(file_content):
+        return False
+    etag = inventory.etag(storage_path)
+    return bool(etag) and etag == hashlib.md5(file_content).hexdigest()
 
 
 def determine_backup_type(file_path):
@@ -185,42 +348,67 @@ def determine_backup_type(file_path):
             return 'json'  # Default to JSON
 
 
-def _cleanup_existing_data_for_non_tenant_restore(file_path, exclude_models=None, using=DEFAULT_DB_ALIAS):
+def _cleanup_existing_data_for_non_tenant_restore(file_path, exclude_models=None, using=DEFAULT_DB_ALIAS,
+                                                  manifest=None, strategy=DEFAULT_CLEANUP_STRATEGY):
     """
     Clean up existing data before performing a non-tenant restore.
 
     This function:
-    1. Parses the fixture file to identify which models will be loaded
+    1. Identifies which models will be loaded, from the manifest when it lists
+       the models of the archive, otherwise by reading the fixture file(s)
     2. Deletes all existing data for those models (excluding excluded models)
-    3. Handles foreign key constraints properly by deleting in dependency order
+       with _cleanup_existing_data_for_models
 
     Args:
-        file_path: Path to the fixture JSON file
+        file_path: Path to the fixture JSON file, or a list of fixture paths
         exclude_models: List of model names to exclude from cleanup (format: 'app_label.model_name')
         using: Database alias to use
+        manifest: Optional parsed backup manifest
+        strategy: Cleanup strategy (see cleanup.CLEANUP_STRATEGIES)
     """
-    if exclude_models is None:
-        exclude_models = []
-
     logger.info(f"Starting cleanup of existing data for non-tenant restore from {file_path}")
 
     try:
-        # Parse the fixture file to get the models that will be loaded
-        with open(file_path, 'r') as f:
-            fixture_data = json.load(f)
+        file_paths = [file_path] if isinstance(file_path, (str, Path)) else file_path
 
-        # Get unique model names from the fixture
-        models_in_fixture = set()
-        for obj in fixture_data:
-            model_name = obj['model'].lower()
-            models_in_fixture.add(model_name)
+        if manifest and manifest.get('models'):
+            models_in_fixture = {label for label, model in manifest['models'].items() if model['rows']}
+        else:
+            # Read the fixture files to get the unique models that will be loaded
+            models_in_fixture = {obj['model'].lower() for obj in iter_fixture_objects(file_paths)}
 
         logger.info(f"Found {len(models_in_fixture)} unique models in fixture: {models_in_fixture}")
 
+    except Exception as e:
+        logger.error(f"Error during cleanup of existing data: {e}")
+        raise
+
+    _cleanup_existing_data_for_models(models_in_fixture, exclude_models=exclude_models, using=using,
+                                      strategy=strategy)
+
+
+def _cleanup_existing_data_for_models(model_names, exclude_models=None, using=DEFAULT_DB_ALIAS,
+                                      strategy=DEFAULT_CLEANUP_STRATEGY):
+    """
+    Delete all existing data of the given models before they are restored.
+    Models are deleted in reverse dependency order to respect foreign key constraints,
+    with set-based statements or the Django deletion collector (see delete_existing_rows).
+
+    Args:
+        model_names: Iterable of model names (format: 'app_label.model_name')
+        exclude_models: List of model names to exclude from cleanup
+        using: Database alias to use
+        strategy: Cleanup strategy (see cleanup.CLEANUP_STRATEGIES)
+    """
+    if exclude_models is None:
+        exclude_models = []
+
+    try:
         # Filter out excluded models
         models_to_cleanup = []
-        for model_name in models_in_fixture:
-            if model_name.lower() not in [ex.lower() for ex in exclude_models]:
+        for model_name in model_names:
+            model_name = model_name.lower()
+            if model_name not in [ex.lower() for ex in exclude_models]:
                 try:
                     app_label, model_class_name = model_name.split('.')
                     model_class = apps.get_model(app_label, model_class_name)
@@ -235,17 +423,12 @@ def _cleanup_existing_data_for_non_tenant_restore(file_path, exclude_models=None
             logger.info("No models to cleanup")
             return
 
-        # Group models by their dependency level to handle foreign key constraints
-        dependency_levels = _calculate_model_dependency_levels(models_to_cleanup, using)
-
         # Delete in reverse dependency order (most dependent first)
-        with transaction.atomic(using=using):
-            for level in sorted(dependency_levels.keys(), reverse=True):
-                level_models = dependency_levels[level]
-                for model_name, model_class in level_models:
-                    logger.info(f"Deleting all data from {model_name}")
-                    deleted_count, _ = model_class.objects.using(using).all().delete()
-                    logger.info(f"Deleted {deleted_count} records from {model_name}")
+        delete_existing_rows(
+            get_delete_order(model_class for model_name, model_class in models_to_cleanup),
+            using=using,
+            strategy=strategy,
+        )
 
         logger.info("Successfully completed cleanup of existing data")
 
@@ -254,54 +437,649 @@ def _cleanup_existing_data_for_non_tenant_restore(file_path, exclude_models=None
         raise
 
 
-def _calculate_model_dependency_levels(models_to_cleanup, using=DEFAULT_DB_ALIAS):
+def apply_backup_deletions(extract_dir, manifest, exclude_models=None, using=DEFAULT_DB_ALIAS):
+    """
+    Delete the rows recorded as deleted by an incremental backup.
+
+    Args:
+        extract_dir: Directory where archive was extracted
+        manifest: Parsed backup manifest
+        exclude_models: List of model labels not to import
+        using: Database alias to delete from
+
+    Returns:
+        Dict mapping model label -> number of deleted rows
+    """
+    if not manifest.get('deletions'):
+        return {}
+
+    with open(Path(extract_dir) / manifest['deletions'], 'r') as f:
+        deletions = json.load(f)
+    return delete_backup_deletions(deletions, exclude_models=exclude_models, using=using)
+
+
+def delete_backup_deletions(deletions, exclude_models=None, using=DEFAULT_DB_ALIAS):
+    """
+    Delete the rows of a deletions entry (dict mapping model label -> primary keys).
+
+    Returns:
+        Dict mapping model label -> number of deleted rows
+    """
+    excluded = {label.lower() for label in (exclude_models or [])}
+    deleted = {}
+    with transaction.atomic(using=using):
+        for model_name, pks in deletions.items():
+            if model_name in excluded:
+                continue
+            model_class = apps.get_model(model_name)
+            deleted_count, _ = model_class._default_manager.using(using).filter(pk__in=pks).delete()
+            deleted[model_name] = deleted_count
+            logger.info(f"Deleted {deleted_count} rows removed since the parent backup from {model_name}")
+    return deleted
+
+
+def restore_copy_archive(extract_dir, manifest, exclude_models=None, cleanup_existing_data=False,
+                         tenant=None, using=DEFAULT_DB_ALIAS, cleanup_strategy=DEFAULT_CLEANUP_STRATEGY):
+    """
+    Restore an archive created by the postgres_copy engine with `COPY ... FROM STDIN`.
+
+    COPY loads rows exactly as they were exported, so a tenant archive can only
+    be restored into the tenant it was created for. With cleanup enabled the
+    existing rows of the archived models are deleted first; when a tenant
+    context is set, the deletes are scoped to that tenant.
+
+    Args:
+        extract_dir: Directory where archive was extracted
+        manifest: Parsed backup manifest
+        exclude_models: List of model names to exclude from import
+        cleanup_existing_data: Whether to delete existing data of the archived models first
+        tenant: Optional tenant the restore runs for
+        using: Database alias to use
+        cleanup_strategy: Cleanup strategy (see cleanup.CLEANUP_STRATEGIES)
+
+    Returns:
+        Dict mapping model label -> loaded row count
+    """
+    backup_tenant_id = manifest.get('tenant_id')
+    restore_tenant_id = tenant.pk if tenant else None
+    if backup_tenant_id != restore_tenant_id:
+        raise ValueError(
+            f"COPY archive was created for tenant {backup_tenant_id} "
+            f"and cannot be restored for tenant {restore_tenant_id}"
+        )
+
+    if cleanup_existing_data:
+        logger.info("Cleanup existing data is enabled, cleaning up existing data from archived tables")
+        _cleanup_existing_data_for_models(
+            [table['model'] for table in manifest.get('tables', [])],
+            exclude_models=exclude_models,
+            using=using,
+            strategy=cleanup_strategy,
+        )
+
+    return load_copy_tables(extract_dir, manifest, exclude_models=exclude_models, using=using)
+
+
+def restore_parquet_archive(extract_dir, manifest, exclude_models=None, cleanup_existing_data=False,
+                            tenant=None, using=DEFAULT_DB_ALIAS, cleanup_strategy=DEFAULT_CLEANUP_STRATEGY):
+    """
+    Restore an archive created by the parquet engine with bulk inserts.
+
+    Rows are loaded with the primary keys and tenant columns they were
+    exported with, so a tenant archive can only be restored into the tenant
+    it was created for.
+
+    Args:
+        extract_dir: Directory where archive was extracted
+        manifest: Parsed backup manifest
+        exclude_models: List of model names to exclude from import
+        cleanup_existing_data: Whether to delete existing data of the archived models first
+        tenant: Optional tenant the restore runs for
+        using: Database alias to use
+        cleanup_strategy: Cleanup strategy (see cleanup.CLEANUP_STRATEGIES)
+
+    Returns:
+        Dict mapping model label -> loaded row count
+    """
+    backup_tenant_id = manifest.get('tenant_id')
+    restore_tenant_id = tenant.pk if tenant else None
+    if backup_tenant_id != restore_tenant_id:
+        raise ValueError(
+            f"Parquet archive was created for tenant {backup_tenant_id} "
+            f"and cannot be restored for tenant {restore_tenant_id}"
+        )
+
+    if cleanup_existing_data:
+        logger.info("Cleanup existing data is enabled, cleaning up existing data from archived tables")
+        _cleanup_existing_data_for_models(
+            [table['model'] for table in manifest.get('parquet_tables', []) if table.get('m2m_of') is None],
+            exclude_models=exclude_models,
+            using=using,
+            strategy=cleanup_strategy,
+        )
+
+    return load_parquet_tables(extract_dir, manifest, exclude_models=exclude_models, using=using)
+
+
+def get_restore_waves(model_names):
+    """
+    Group the restored models into waves of units loaded concurrently (see run_restore_waves).
+
+    Every model is a unit of its own, except models depending on each other
+    in a cycle, which form one unit (see dependency_graph.get_restore_plan).
+    Labels of models that do not exist anymore are units of the first wave,
+    so loading them fails like loaddata does.
+
+    Returns:
+        List of waves, each a list of units (lists of model labels)
+    """
+    models = []
+    unknown_models = []
+    for model_name in model_names:
+        try:
+            models.append(apps.get_model(model_name))
+        except (ValueError, LookupError):
+            unknown_models.append(model_name)
+
+    waves = [
+        [[model_class._meta.label_lower for model_class in component] for component in wave]
+        for wave in get_restore_plan(models).waves
+    ]
+    if unknown_models:
+        if waves:
+            waves[0] = [[model_name] for model_name in unknown_models] + waves[0]
+        else:
+            waves.append([[model_name] for model_name in unknown_models])
+    logger.info(f"Planned restore waves: {waves}")
+    return waves
+
+
+def get_segments_in_load_order(manifest):
+    """
+    Get the data segments of a manifest with the segments of referenced models first.
+
+    Segments of one model keep their order, segments of unknown models come first.
+    """
+    segments = manifest.get('data_segments', [])
+    model_classes = []
+    for model_name in {segment['model'] for segment in segments}:
+        try:
+            model_classes.append(apps.get_model(model_name))
+        except (ValueError, LookupError):
+            pass
+    positions = {
+        model_class._meta.label_lower: position
+        for position, model_class in enumerate(get_load_order(model_classes))
+    }
+    return sorted(segments, key=lambda segment: positions.get(segment['model'], -1))
+
+
+def get_segments_by_model(manifest, exclude_models=None):
+    """
+    Get the data segments of the models of an archive whose rows are all in per-model segments.
+
+    Returns:
+        Dict mapping model label -> list of entry names, in manifest order
     """
-    Calculate dependency levels for models to determine deletion order.
-    Models with higher levels depend on models with lower levels.
+    excluded_entries = get_excluded_entries(manifest, exclude_models)
+    segments_by_model = {}
+    for segment in manifest.get('data_segments', []):
+        if segment['entry'] not in excluded_entries:
+            segments_by_model.setdefault(segment['model'], []).append(segment['entry'])
+    return segments_by_model
+
+
+def load_fixtures_in_waves(fixtures_by_model, iter_objects, restore_type, exclude_models=None,
+                           using=DEFAULT_DB_ALIAS, tenant=None):
+    """
+    Load the fixtures of every model in dependency waves of 'restore_workers' concurrent workers.
+
+    Every unit of models is loaded in its own transaction, so a failure
+    leaves the units of the earlier waves loaded.
+
+    Args:
+        fixtures_by_model: Dict mapping model label -> fixtures (archive entries or file paths) holding its rows
+        iter_objects: Callable returning an iterator over the objects of a list of fixtures
+        restore_type: The backup type used to read the import options
+        exclude_models: List of model labels not to import
+        using: Database alias to load into
+        tenant: Optional tenant the restore runs for
 
     Returns:
-        dict: {level: [(model_name, model_class), ...]}
+        Dict mapping model label -> loaded row count
     """
-    model_map = {model_name: model_class for model_name, model_class in models_to_cleanup}
-    dependency_levels = defaultdict(list)
-    model_levels = {}
+    load_options = get_fixture_load_options(restore_type)
+    workers = get_restore_workers(
+        get_backup_type_option(restore_type, 'restore_workers', DEFAULT_RESTORE_WORKERS), using
+    )
+    waves = get_restore_waves(fixtures_by_model)
+    logger.info(f"Loading {len(fixtures_by_model)} models in {len(waves)} waves with {workers} workers")
 
-    def get_model_level(model_name, model_class, visited=None):
-        if visited is None:
-            visited = set()
+    def load_unit(model_names):
+        fixtures = [fixture for model_name in model_names for fixture in fixtures_by_model.get(model_name, [])]
+        return load_fixture_objects(iter_objects(fixtures), exclude_models=exclude_models, using=using, **load_options)
 
-        if model_name in visited:
-            # Circular dependency detected, assign a high level
-            return 100
+    return run_restore_waves(waves, load_unit, workers=workers, using=using, tenant=tenant)
 
-        if model_name in model_levels:
-            return model_levels[model_name]
 
-        visited.add(model_name)
-        max_dependency_level = 0
+def get_fixture_load_options(restore_type):
+    """
+    Get the load_fixture_objects arguments configured for a backup type.
+    """
+    return {
+        'batch_size': get_backup_type_option(restore_type, 'restore_batch_size', DEFAULT_RESTORE_BATCH_SIZE),
+        'bulk': get_backup_type_option(restore_type, 'restore_bulk_create', False),
+        'conflicts': get_backup_type_option(restore_type, 'restore_conflicts', DEFAULT_RESTORE_CONFLICTS),
+        'send_signals': get_backup_type_option(restore_type, 'restore_send_signals', False),
+    }
 
-        # Check all foreign key fields
-        for field in model_class._meta.fields:
-            if isinstance(field, ForeignKey):
-                related_model = field.related_model
-                related_model_name = f"{related_model._meta.app_label}.{related_model._meta.model_name}".lower()
 
-                # Only consider dependencies on models that are also being cleaned up
-                if related_model_name in model_map:
-                    dependency_level = get_model_level(related_model_name, related_model, visited.copy())
-                    max_dependency_level = max(max_dependency_level, dependency_level + 1)
+def restore_archive_streaming(archive_path, restore_type, exclude_models=None, cleanup_existing_data=False,
+                              using=DEFAULT_DB_ALIAS, stats=None, tenant=None):
+    """
+    Restore a fixture archive without extracting it (the 'streaming' restore engine).
 
-        visited.remove(model_name)
-        model_levels[model_name] = max_dependency_level
-        return max_dependency_level
+    Data entries are parsed incrementally straight from the archive and saved
+    in batches of 'restore_batch_size' objects, media entries are streamed
+    into the storage one file at a time. Archives made of per-model entries
+    are loaded in dependency waves when 'restore_workers' is above 1.
 
-    # Calculate levels for all models
-    for model_name, model_class in models_to_cleanup:
-        level = get_model_level(model_name, model_class)
-        dependency_levels[level].append((model_name, model_class))
+    Args:
+        archive_path: Path to the ZIP archive, or to a JSON fixture
+        restore_type: The backup type used to read the import options
+        exclude_models: List of model labels not to import
+        cleanup_existing_data: Whether to delete the existing rows of the restored models first
+        using: Database alias to load into
+        stats: Optional PipelineStats receiving the phase durations and data volumes
+        tenant: Optional tenant the restore runs for, set as the current tenant of the restore workers
+
+    Returns:
+        The media restore result, or None for JSON fixtures
+    """
+    stats = stats or PipelineStats(pipeline='restore')
+    load_options = get_fixture_load_options(restore_type)
+    cleanup_strategy = get_backup_type_option(restore_type, 'cleanup_strategy', DEFAULT_CLEANUP_STRATEGY)
+
+    if not zipfile.is_zipfile(archive_path):
+        if cleanup_existing_data:
+            with stats.phase('cleanup'):
+                _cleanup_existing_data_for_non_tenant_restore(archive_path, exclude_models=exclude_models, using=using,
+                                                              strategy=cleanup_strategy)
+        with stats.phase('load'), open(archive_path, 'rb') as f:
+            loaded = load_fixture_objects(
+                iter_json_array(f), exclude_models=exclude_models, using=using, **load_options
+            )
+        stats.add_rows(loaded)
+        stats.add_bytes(bytes_out=os.path.getsize(archive_path))
+        return None
+
+    with zipfile.ZipFile(archive_path, 'r') as zipf:
+        manifest = read_archive_manifest(archive_path)
+        if manifest.get('tables') or manifest.get('parquet_tables'):
+            raise ValueError(f"Archives of the {manifest.get('engine')} engine cannot be restored by the streaming "
+                             f"restore engine, use the 'loaddata' restore engine")
+        if manifest.get('models'):
+            check_backup_schema(manifest, restore_type)
+
+        entries = get_fixture_entries(manifest, zipf.namelist(), exclude_models=exclude_models)
+        logger.info(f"Streaming {len(entries)} data entries from the archive")
+        stats.add_bytes(bytes_out=get_restored_data_size(manifest, [], exclude_models))
+
+        if cleanup_existing_data:
+            with stats.phase('cleanup'):
+                if manifest.get('models'):
+                    model_names = {label for label, model in manifest['models'].items() if model['rows']}
+                else:
+                    model_names = {obj['model'].lower() for obj in iter_archive_objects(zipf, manifest, entries)}
+                _cleanup_existing_data_for_models(model_names, exclude_models=exclude_models, using=using,
+                                                  strategy=cleanup_strategy)
+
+        segments_by_model = get_segments_by_model(manifest, exclude_models)
+        parallel = (
+            get_backup_type_option(restore_type, 'restore_workers', DEFAULT_RESTORE_WORKERS) > 1
+            and sum(len(segments) for segments in segments_by_model.values()) == len(entries)
+        )
+
+        def iter_segment_objects(segments):
+            # Every worker reads the archive through its own file handle
+            with zipfile.ZipFile(archive_path, 'r') as worker_zipf:
+                yield from iter_archive_objects(worker_zipf, manifest, segments)
+
+        with stats.phase('load'):
+            if parallel:
+                loaded = load_fixtures_in_waves(
+                    segments_by_model,
+                    iter_segment_objects,
+                    restore_type,
+                    exclude_models=exclude_models,
+                    using=using,
+                    tenant=tenant,
+                )
+            else:
+                loaded = load_fixture_objects(
+                    iter_archive_objects(zipf, manifest, entries),
+                    exclude_models=exclude_models,
+                    using=using,
+                    **load_options,
+                )
+            if manifest.get('deletions'):
+                with open_archive_entry(zipf, manifest, manifest['deletions']) as stream:
+                    deletions = loads(stream.read())
+                delete_backup_deletions(deletions, exclude_models=exclude_models, using=using)
+        stats.add_rows(loaded)
+
+        with stats.phase('media'):
+            media_restore_result = restore_archive_media(zipf, manifest)
+        stats.add_media(media_restore_result)
+    return media_restore_result
+
+
+def get_fixture_entries(manifest, names, exclude_models=None):
+    """
+    Get the data entries of an archive in load order, like get_backup_fixture_paths but without extracting.
+
+    Args:
+        manifest: Parsed backup manifest
+        names: Names of the ZIP members of the archive
+        exclude_models: List of model labels not to import
+
+    Returns:
+        List of logical entry names
+    """
+    member_names = get_archive_member_names(manifest)
+    entries = []
+    json_file = manifest.get('json_file', ARCHIVE_DATA_FILE)
+    if json_file and member_names.get(json_file, json_file) in names:
+        entries.append(json_file)
+
+    excluded_entries = get_excluded_entries(manifest, exclude_models)
+    for segment in get_segments_in_load_order(manifest):
+        if segment['entry'] in excluded_entries:
+            continue
+        if member_names.get(segment['entry'], segment['entry']) not in names:
+            raise FileNotFoundError(f"Data segment {segment['entry']} not found in archive")
+        entries.append(segment['entry'])
 
-    logger.info(f"Calculated dependency levels: {dict(dependency_levels)}")
-    return dependency_levels
+    if not entries:
+        raise FileNotFoundError("No data entries found in archive")
+    return entries
+
+
+def get_manifest_row_counts(manifest, exclude_models=None):
+    """
+    Get the row counts of the models of a manifest that are restored.
+
+    Returns:
+        Dict mapping model label -> row count, empty for archives without model descriptions
+    """
+    excluded = {label.lower() for label in (exclude_models or [])}
+    return {
+        label: model['rows']
+        for label, model in manifest.get('models', {}).items()
+        if label not in excluded and model.get('rows') is not None
+    }
+
+
+def get_restored_data_size(manifest, fixture_paths, exclude_models=None):
+    """
+    Get the uncompressed size of the data entries that are restored.
+
+    Uses the entry sizes of the manifest when available, the size of the fixture files otherwise.
+    """
+    if manifest.get('entries') and manifest.get('models'):
+        excluded_entries = get_excluded_entries(manifest, exclude_models)
+        data_entries = {
+            entry['entry']
+            for model in manifest['models'].values()
+            for entry in model.get('entries', [])
+        } - set(excluded_entries)
+        return sum(manifest['entries'][name]['size'] for name in data_entries if name in manifest['entries'])
+    return sum(os.path.getsize(path) for path in fixture_paths if os.path.exists(path))
+
+
+def restore_backup_file(source_file, restore_type, tenant=None, cleanup_existing_data=False, stats=None):
+    """
+    Restore the data and media of a single backup file (ZIP archive or JSON fixture).
+
+    Args:
+        source_file: The file to restore (e.g. restore.file or backup.file)
+        restore_type: The backup type used to read the import options
+        tenant: Optional tenant object for multi-tenant setups
+        cleanup_existing_data: Whether to delete the existing rows of the restored models first
+        stats: Optional PipelineStats receiving the phase durations and data volumes
+
+    Returns:
+        The media restore result, or None if the file has no media
+    """
+    stats = stats or PipelineStats(pipeline='restore')
+    temp_dir = None
+    temp_source_path = None
+    json_file_path = None
+    media_restore_result = None
+    has_media_files = False
+    manifest = {}
+    exclude_models = settings.BACKUPS.get('BACKUP_TYPES', {}).get(restore_type, {}).get('exclude_models_from_import', [])
+
+    try:
+        # First, copy the source file to a temporary location
+        original_name = source_file.name
+        logger.info(f"Processing backup file: {original_name}")
+
+        # Create a temporary file with appropriate suffix based on source file
+        file_extension = '.zip' if original_name.lower().endswith('.zip') else '.json'
+        with stats.phase('download'), tempfile.NamedTemporaryFile(suffix=file_extension, delete=False) as temp_file:
+            temp_source_path = temp_file.name
+
+            with source_file.open('rb') as src:
+                # Copy file content in chunks to avoid memory issues
+                for chunk in src.chunks():
+                    temp_file.write(chunk)
+
+            # Ensure data is written to disk before returning
+            temp_file.flush()
+        source_size = os.path.getsize(temp_source_path)
+        stats.add_bytes(bytes_in=source_size)
+
+        # Determine backup type and handle accordingly
+        backup_type = determine_backup_type(temp_source_path)
+        logger.info(f"Detected backup type: {backup_type}")
+
+        restore_engine = get_backup_type_option(restore_type, 'restore_engine', DEFAULT_RESTORE_ENGINE)
+        if restore_engine not in RESTORE_ENGINES:
+            raise ValueError(f'Unknown restore engine "{restore_engine}". Available engines: {", ".join(RESTORE_ENGINES)}')
+        # Table files of COPY and Parquet archives are loaded by their engine from an extracted archive
+        has_table_files = backup_type == 'zip' and any(
+            read_archive_manifest(temp_source_path).get(key) for key in ('tables', 'parquet_tables')
+        )
+        if restore_engine == 'streaming' and not has_table_files:
+            return restore_archive_streaming(
+                temp_source_path,
+                restore_type,
+                exclude_models=exclude_models,
+                cleanup_existing_data=cleanup_existing_data,
+                stats=stats,
+                tenant=tenant,
+            )
+
+        if backup_type == 'zip':
+            # Handle ZIP archive with media files
+            temp_dir = tempfile.mkdtemp(prefix='restore_')
+            logger.info(f"Created temporary directory for extraction: {temp_dir}")
+
+            # Extract the archive and get JSON file path
+            with stats.phase('extract'):
+                json_file_path = extract_backup_archive(temp_source_path, temp_dir, exclude_models=exclude_models)
+                fixture_paths = get_backup_fixture_paths(temp_dir, json_file_path, exclude_models=exclude_models)
+                manifest = read_backup_manifest(temp_dir)
+            logger.info(f"Extracted {len(fixture_paths)} fixture files")
+            if manifest.get('models'):
+                logger.info(f"Archive holds {sum(model['rows'] for model in manifest['models'].values())} rows "
+                            f"of {len(manifest['models'])} models")
+                check_backup_schema(manifest, restore_type)
+            with stats.phase('media'):
+                fetch_media_store_files(
+                    temp_dir, manifest,
+                    workers=get_backup_type_option(restore_type, 'media_workers', DEFAULT_MEDIA_WORKERS),
+                )
+
+            # Check if media directory exists
+            media_dir = Path(temp_dir) / 'media'
+            has_media_files = media_dir.exists() and any(media_dir.rglob('*'))
+            logger.info(f"Archive contains media files: {has_media_files}")
+
+        else:
+            # Handle direct JSON file
+            json_file_path = temp_source_path
+            fixture_paths = [json_file_path]
+            logger.info(f"Using JSON file directly: {json_file_path}")
+        stats.add_bytes(bytes_out=get_restored_data_size(manifest, fixture_paths, exclude_models))
+
+        # Clean up the temporary source file if we extracted it
+        if backup_type == 'zip':
+            try:
+                os.unlink(temp_source_path)
+            except Exception as e:
+                logger.warning(f"Failed to clean up temporary source file: {e}")
+
+        # Set up options for the loaddata command
+        options = {
+            'database': 'default',
+            'exclude': exclude_models,
+        }
+
+        # Archives made of per-model entries can be loaded by several workers,
+        # tenant restores keep using tenant_loaddata
+        parallel_load = (
+            tenant is None
+            and get_backup_type_option(restore_type, 'restore_workers', DEFAULT_RESTORE_WORKERS) > 1
+            and backup_type == 'zip'
+            and json_file_path is None
+            and bool(manifest.get('data_segments'))
+        )
+
+        cleanup_strategy = get_backup_type_option(restore_type, 'cleanup_strategy', DEFAULT_CLEANUP_STRATEGY)
+        load_started = time.monotonic()
+        loaded = None
+        if manifest.get('tables'):
+            # Archive created by the postgres_copy engine, load tables with COPY
+            logger.info(f"Loading {len(manifest['tables'])} tables with COPY")
+            loaded = restore_copy_archive(
+                temp_dir,
+                manifest,
+                exclude_models=options['exclude'],
+                cleanup_existing_data=cleanup_existing_data,
+                tenant=tenant,
+                using=options['database'],
+                cleanup_strategy=cleanup_strategy,
+            )
+        elif manifest.get('parquet_tables'):
+            # Archive created by the parquet engine, bulk insert the record batches
+            logger.info(f"Loading {len(manifest['parquet_tables'])} Parquet tables")
+            loaded = restore_parquet_archive(
+                temp_dir,
+                manifest,
+                exclude_models=options['exclude'],
+                cleanup_existing_data=cleanup_existing_data,
+                tenant=tenant,
+                using=options['database'],
+                cleanup_strategy=cleanup_strategy,
+            )
+        elif parallel_load or (tenant is None and get_backup_type_option(restore_type, 'restore_bulk_create', False)):
+            # Objects are grouped per model and inserted with bulk_create instead of one save per object,
+            # and archives made of per-model entries are loaded in dependency waves by several workers.
+            # Tenant restores keep using tenant_loaddata, which scopes the cleanup and load to the tenant
+            logger.info("Loading fixtures with " + ("restore workers" if parallel_load else "bulk_create"))
+            if cleanup_existing_data:
+                with stats.phase('cleanup'):
+                    _cleanup_existing_data_for_non_tenant_restore(
+                        file_path=fixture_paths,
+                        exclude_models=options['exclude'],
+                        using=options['database'],
+                        manifest=manifest,
+                        strategy=cleanup_strategy,
+                    )
+                load_started = time.monotonic()
+            if parallel_load:
+                loaded = load_fixtures_in_waves(
+                    {
+                        model_name: [str(Path(temp_dir) / segment) for segment in segments]
+                        for model_name, segments in get_segments_by_model(manifest, exclude_models).items()
+                    },
+                    iter_fixture_objects,
+                    restore_type,
+                    exclude_models=options['exclude'],
+                    using=options['database'],
+                    tenant=tenant,
+                )
+            else:
+                loaded = load_fixture_objects(
+                    iter_fixture_objects(fixture_paths),
+                    exclude_models=options['exclude'],
+                    using=options['database'],
+                    **get_fixture_load_options(restore_type),
+                )
+        # If we have a tenant, use tenant_loaddata
+        elif MULTI_TENANT_ENABLED and tenant:
+            options['no_cleanup'] = not cleanup_existing_data
+            options['tenant_pk'] = tenant.pk
+            logger.info(f"Running tenant_loaddata for tenant {tenant.pk}")
+            call_command('tenant_loaddata', *fixture_paths, **options)
+        else:
+            logger.info("Running loaddata (no tenant)")
+            if cleanup_existing_data:
+                logger.info("Cleanup existing data is enabled, cleaning up existing data from fixture models")
+                with stats.phase('cleanup'):
+                    _cleanup_existing_data_for_non_tenant_restore(
+                        file_path=fixture_paths,
+                        exclude_models=options.get('exclude', []),
+                        using=options.get('database', 'default'),
+                        manifest=manifest,
+                        strategy=cleanup_strategy,
+                    )
+                # Cleanup is timed separately
+                load_started = time.monotonic()
+
+            call_command('loaddata', *fixture_paths, **options)
+
+        # Rows deleted since the parent of an incremental backup
+        apply_backup_deletions(temp_dir, manifest, exclude_models=options['exclude'], using=options['database'])
+        stats.add_duration('load', time.monotonic() - load_started)
+        stats.add_rows(loaded if loaded is not None else get_manifest_row_counts(manifest, exclude_models))
+
+        # Now restore media files AFTER loaddata commands are complete
+        if has_media_files:
+            logger.info("Starting media file restoration after successful data load...")
+            with stats.phase('media'):
+                media_restore_result = restore_media_files_after_loaddata(temp_dir)
+            stats.add_media(media_restore_result)
+            logger.info(f"Media restoration completed: {len(media_restore_result['restored'])} files restored, "
+                       f"{len(media_restore_result['failed'])} failed")
+        else:
+            logger.info("No media files to restore")
+
+        return media_restore_result
+
+    finally:
+        # Clean up temporary files and directories
+        if temp_source_path and os.path.exists(temp_source_path):
+            try:
+                os.unlink(temp_source_path)
+            except Exception as e:
+                logger.warning(f"Failed to clean up temporary source file: {e}")
+
+        if json_file_path and os.path.exists(json_file_path):
+            try:
+                os.unlink(json_file_path)
+                logger.debug(f"Cleaned up temporary JSON file: {json_file_path}")
+            except Exception as e:
+                logger.warning(f"Failed to clean up temporary JSON file: {e}")
+
+        if temp_dir and os.path.exists(temp_dir):
+            try:
+                shutil.rmtree(temp_dir)
+                logger.debug(f"Cleaned up temporary directory: {temp_dir}")
+            except Exception as e:
+                logger.warning(f"Failed to clean up temporary directory: {e}")
 
 
 @shared_task(
@@ -339,128 +1117,38 @@ def process_restore(self, restore_pk):
         restore.started_at = timezone.now()
         restore.save(update_fields=['started_at'])
 
-        # Determine which file to use: backup file or uploaded file
-        temp_dir = None
-        json_file_path = None
-        media_restore_result = None
-        backup_data = None
-        has_media_files = False
-
-        try:
-            # First, copy the source file to a temporary location
-            source_file = restore.file
-            original_name = source_file.name
-            logger.info(f"Processing backup file: {original_name}")
-
-            # Create a temporary file with appropriate suffix based on source file
-            file_extension = '.zip' if original_name.lower().endswith('.zip') else '.json'
-            with tempfile.NamedTemporaryFile(suffix=file_extension, delete=False) as temp_file:
-                temp_source_path = temp_file.name
-
-                with source_file.open('rb') as src:
-                    # Copy file content in chunks to avoid memory issues
-                    for chunk in src.chunks():
-                        temp_file.write(chunk)
-
-                # Ensure data is written to disk before returning
-                temp_file.flush()
-
-            # Determine backup type and handle accordingly
-            backup_type = determine_backup_type(temp_source_path)
-            logger.info(f"Detected backup type: {backup_type}")
-
-            if backup_type == 'zip':
-                # Handle ZIP archive with media files
-                temp_dir = tempfile.mkdtemp(prefix='restore_')
-                logger.info(f"Created temporary directory for extraction: {temp_dir}")
-
-                # Extract the archive and get JSON file path
-                json_file_path = extract_backup_archive(temp_source_path, temp_dir)
-                logger.info(f"Extracted JSON file to: {json_file_path}")
-
-                # Check if media directory exists
-                media_dir = Path(temp_dir) / 'media'
-                has_media_files = media_dir.exists() and any(media_dir.rglob('*'))
-                logger.info(f"Archive contains media files: {has_media_files}")
-
-            else:
-                # Handle direct JSON file
-                json_file_path = temp_source_path
-                logger.info(f"Using JSON file directly: {json_file_path}")
-
-            # Parse backup data for later use in media restoration
-            if has_media_files:
-                logger.info("Parsing backup data for media file restoration...")
-                with open(json_file_path, 'r') as f:
-                    backup_data = json.load(f)
-
-            # Clean up the temporary source file if we extracted it
-            if backup_type == 'zip':
-                try:
-                    os.unlink(temp_source_path)
-                except Exception as e:
-                    logger.warning(f"Failed to clean up temporary source file: {e}")
-
-            # Set up options for the loaddata command
-            options = {
-                'database': 'default',
-                'exclude':  settings.BACKUPS.get('BACKUP_TYPES', {}).get(restore.type, {}).get('exclude_models_from_import', []),
-            }
-
-            # If we have a tenant, use tenant_loaddata
-            if MULTI_TENANT_ENABLED and tenant:
-                options['no_cleanup'] = not restore.cleanup_existing_data
-                options['tenant_pk'] = tenant.pk
-                logger.info(f"Running tenant_loaddata for tenant {tenant.pk}")
-                call_command('tenant_loaddata', json_file_path, **options)
-            else:
-                logger.info("Running loaddata (no tenant)")
-                if restore.cleanup_existing_data:
-                    logger.info("Cleanup existing data is enabled, cleaning up existing data from fixture models")
-                    _cleanup_existing_data_for_non_tenant_restore(
-                        file_path=json_file_path,
-                        exclude_models=options.get('exclude', []),
-                        using=options.get('database', 'default')
-                    )
-
-                call_command('loaddata', json_file_path, **options)
-
-            # Now restore media files AFTER loaddata commands are complete
-            if has_media_files and backup_data:
-                logger.info("Starting media file restoration after successful data load...")
-                media_restore_result = restore_media_files_after_loaddata(temp_dir, backup_data)
-                logger.info(f"Media restoration completed: {len(media_restore_result['restored'])} files restored, "
-                           f"{len(media_restore_result['failed'])} failed")
-            else:
-                logger.info("No media files to restore")
-
-            # Clean up tenant context
-            unset_current_tenant()
-
-            # Set restore completion info
-            restore.finished_at = timezone.now()
-            restore.tenant = tenant
-            restore.done = True
+        # Incremental backups are restored by applying their whole chain, from the full backup on
+        if restore.backup is not None and restore.backup.parent_id is not None:
+            source_files = [backup.file for backup in get_backup_chain(restore.backup)]
+            logger.info(f"Restoring a chain of {len(source_files)} backups")
+        else:
+            source_files = [restore.file]
+
+        stats = PipelineStats(pipeline='restore')
+        with get_instrumentation().span('restore', restore_id=restore.pk, restore_type=restore.type):
+            for index, source_file in enumerate(source_files):
+                restore_backup_file(
+                    source_file,
+                    restore.type,
+                    tenant=tenant,
+                    # Existing data is only cleaned up before the full backup of a chain
+                    cleanup_existing_data=restore.cleanup_existing_data and index == 0,
+                    stats=stats,
+                )
+
+        # Clean up tenant context
+        unset_current_tenant()
 
-            restore.save(force_update=True)
+        # Set restore completion info
+        restore.finished_at = timezone.now()
+        restore.tenant = tenant
+        restore.done = True
+        restore.stats = stats.as_dict()
 
-            return restore.id
+        restore.save(force_update=True)
 
-        finally:
-            # Clean up temporary files and directories
-            if json_file_path and os.path.exists(json_file_path):
-                try:
-                    os.unlink(json_file_path)
-                    logger.debug(f"Cleaned up temporary JSON file: {json_file_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to clean up temporary JSON file: {e}")
+        return restore.id
 
-            if temp_dir and os.path.exists(temp_dir):
-                try:
-                    shutil.rmtree(temp_dir)
-                    logger.debug(f"Cleaned up temporary directory: {temp_dir}")
-                except Exception as e:
-                    logger.warning(f"Failed to clean up temporary directory: {e}")
     except Exception as exc:
         logger.exception(f"Error during restore process: {exc}")
         self.retry(exc=exc)
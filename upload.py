@@ -0,0 +1,186 @@
+"""
+Streaming multipart upload of backup archives to S3 compatible storages.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from superapp.apps.backups.instrumentation import get_instrumentation
+from superapp.apps.backups.instrumentation.base import STORAGE_CALLS_METRIC
+
+logger = logging.getLogger(__name__)
+
+# S3 rejects parts smaller than 5 MiB (except the last one) and more than 10000 parts
+MIN_UPLOAD_PART_SIZE = 5 * 1024 * 1024
+MAX_UPLOAD_PARTS = 10000
+DEFAULT_UPLOAD_PART_SIZE = 64 * 1024 * 1024
+DEFAULT_UPLOAD_WORKERS = 4
+
+
+def supports_multipart_upload(storage):
+    """
+    Check whether a storage exposes a boto3 bucket that multipart uploads can be sent to.
+    """
+    return hasattr(storage, 'bucket')
+
+
+class MultipartUploadStream:
+    """
+    Write-only, non-seekable stream uploading its content as an S3 multipart upload.
+
+    Written bytes are buffered until a full part is available, which is then
+    uploaded by a thread pool while writing continues. At most twice the
+    number of workers parts are buffered at a time, so memory use is bounded
+    by the part size. The upload is completed on close() and aborted if the
+    stream is left with an exception, no partial object is ever visible.
+
+    ZipFile detects that the stream cannot seek and writes its entries with
+    data descriptors instead of rewriting the local headers.
+    """
+
+    def __init__(self, storage, name, part_size=DEFAULT_UPLOAD_PART_SIZE, workers=DEFAULT_UPLOAD_WORKERS,
+                 content_type='application/zip'):
+        self.storage = storage
+        self.name = name
+        self.part_size = max(part_size, MIN_UPLOAD_PART_SIZE)
+        self.client = storage.bucket.meta.client
+        self.bucket_name = storage.bucket.name
+
+        location = getattr(storage, 'location', '').strip('/')
+        self.key = f"{location}/{name}" if location else name
+
+        parameters = dict(getattr(storage, 'object_parameters', {}) or {})
+        parameters.setdefault('ContentType', content_type)
+        if getattr(storage, 'default_acl', None):
+            parameters.setdefault('ACL', storage.default_acl)
+
+        self.instrumentation = get_instrumentation()
+        self.instrumentation.increment(STORAGE_CALLS_METRIC, operation='create_multipart_upload')
+        response = self.client.create_multipart_upload(Bucket=self.bucket_name, Key=self.key, **parameters)
+        self.upload_id = response['UploadId']
+
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='backup-upload')
+        self.slots = threading.BoundedSemaphore(max(1, workers) * 2)
+        self.buffer = bytearray()
+        self.futures = []
+        self.position = 0
+        self.closed = False
+        logger.info(f"Started multipart upload of {self.key} ({self.part_size} byte parts)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self.position
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError('write to closed upload stream')
+        self.buffer += data
+        self.position += len(data)
+        while len(self.buffer) >= self.part_size:
+            part = bytes(self.buffer[:self.part_size])
+            del self.buffer[:self.part_size]
+            self._submit_part(part)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def _submit_part(self, data):
+        part_number = len(self.futures) + 1
+        if part_number > MAX_UPLOAD_PARTS:
+            raise ValueError(f'Archive exceeds {MAX_UPLOAD_PARTS} upload parts, increase upload_part_size')
+
+        # Block the writer while too many parts are in flight
+        self.slots.acquire()
+        future = self.executor.submit(self._upload_part, part_number, data)
+        future.add_done_callback(lambda _: self.slots.release())
+        self.futures.append(future)
+
+    def _upload_part(self, part_number, data):
+        self.instrumentation.increment(STORAGE_CALLS_METRIC, operation='upload_part')
+        response = self.client.upload_part(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=data,
+        )
+        logger.debug(f"Uploaded part {part_number} of {self.key} ({len(data)} bytes)")
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+    def close(self):
+        """
+        Upload the remaining buffer and complete the multipart upload.
+        """
+        if self.closed:
+            return
+        try:
+            # A multipart upload needs at least one part, even if it is empty
+            if self.buffer or not self.futures:
+                self._submit_part(bytes(self.buffer))
+                self.buffer.clear()
+            parts = [future.result() for future in self.futures]
+            self.instrumentation.increment(STORAGE_CALLS_METRIC, operation='complete_multipart_upload')
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.key,
+                UploadId=self.upload_id,
+                MultipartUpload={'Parts': parts},
+            )
+        except Exception:
+            self.abort()
+            raise
+        self.closed = True
+        self.executor.shutdown()
+        logger.info(f"Completed multipart upload of {self.key}: {self.position} bytes in {len(self.futures)} parts")
+
+    def abort(self):
+        """
+        Abort the multipart upload and discard the uploaded parts.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.executor.shutdown(cancel_futures=True)
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket_name, Key=self.key, UploadId=self.upload_id)
+            logger.warning(f"Aborted multipart upload of {self.key}")
+        except Exception as e:
+            logger.error(f"Error aborting multipart upload of {self.key}: {e}")
+
+
+def open_field_file_upload(field_file, filename, part_size=DEFAULT_UPLOAD_PART_SIZE, workers=DEFAULT_UPLOAD_WORKERS):
+    """
+    Open a multipart upload stream for the file of a FileField.
+
+    The storage name is generated like FieldFile.save() does (upload_to and an
+    available name), so the uploaded object can be assigned to the field once
+    the stream is closed.
+
+    Args:
+        field_file: The FieldFile receiving the upload (e.g. backup.file)
+        filename: The file name to store the upload under
+        part_size: Size in bytes of each uploaded part
+        workers: Number of parts uploaded concurrently
+
+    Returns:
+        A MultipartUploadStream, its 'name' attribute holds the storage name
+    """
+    storage = field_file.storage
+    name = field_file.field.generate_filename(field_file.instance, filename)
+    name = storage.get_available_name(name, max_length=field_file.field.max_length)
+    return MultipartUploadStream(storage, name, part_size=part_size, workers=workers)